@@ -1,11 +1,308 @@
+import bisect
+import json
 import os
-from typing import List, Tuple
+import random
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
-import gradio as gr
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_BASE = os.getenv("API_BASE", "https://sr-bsm.onrender.com")
 TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "30"))
+STREAM_RESPONSES = os.getenv("API_STREAM", "true").lower() not in {"0", "false", "no"}
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "32"))
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.3"))
+HEALTH_INTERVAL_SECONDS = float(os.getenv("HEALTH_INTERVAL_SECONDS", "15"))
+HEALTH_JITTER = float(os.getenv("HEALTH_JITTER", "0.2"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("HEALTH_TIMEOUT_SECONDS", "5"))
+FAIL_FAST_AFTER = int(os.getenv("HEALTH_FAIL_FAST_AFTER", "2"))
+STREAM_ACCEPT = "text/event-stream, application/x-ndjson, application/json"
+DEFAULT_REPLY = "تم استلام الرسالة"
+AGENT_CONTEXT = os.getenv("AGENT_CONTEXT", "chat")
+DEFAULT_AGENT = "agent-auto"
+AGENT_LABELS = {
+    "agent-auto": "🤖 Auto Router - توجيه تلقائي",
+    "legal-agent": "⚖️ Legal Expert - الخبير القانوني",
+    "governance-agent": "🏛️ Governance Agent - حوكمة",
+    "security-agent": "🔒 Security Scanner - الأمان",
+}
+# Used when the repository's agent registry is not available (e.g. a standalone Space upload).
+FALLBACK_AGENTS = ["agent-auto", "legal-agent", "governance-agent", "security-agent"]
+
+
+def _build_session() -> requests.Session:
+    """Keep-alive session shared by every sync request to ``API_BASE``.
+
+    Connection failures and 502/503/504 answers are retried with exponential
+    backoff; POSTs are only retried when the request never reached the server.
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+    http = requests.Session()
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    return http
+
+
+session = _build_session()
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared async client, creating it on first use."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        _async_client = httpx.AsyncClient(
+            base_url=API_BASE,
+            timeout=TIMEOUT_SECONDS,
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=MAX_RETRIES),
+        )
+    return _async_client
+
+
+class HealthMonitor:
+    """Probes ``/health`` in a background thread and caches the result.
+
+    Probes run every ``interval`` seconds with +/- ``jitter`` spread so many
+    Space replicas do not hit the backend in lockstep. Readers get the last
+    status, its latency and a histogram over the last ``window`` probes
+    without doing any I/O.
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(
+        self,
+        url: str,
+        interval: float = HEALTH_INTERVAL_SECONDS,
+        jitter: float = HEALTH_JITTER,
+        timeout: float = HEALTH_TIMEOUT_SECONDS,
+        window: int = 100,
+    ) -> None:
+        self.url = url
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.status_code: Optional[int] = None
+        self.healthy: Optional[bool] = None
+        self.latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.consecutive_failures = 0
+
+    def probe(self) -> bool:
+        started = time.perf_counter()
+        try:
+            response = session.get(self.url, timeout=self.timeout)
+            status_code, healthy = response.status_code, response.status_code == 200
+        except requests.exceptions.RequestException:
+            status_code, healthy = None, False
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            self.status_code = status_code
+            self.healthy = healthy
+            self.latency = latency
+            self.checked_at = time.monotonic()
+            self.consecutive_failures = 0 if healthy else self.consecutive_failures + 1
+            if healthy:
+                self._latencies.append(latency)
+        return healthy
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.probe()
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def start(self) -> "HealthMonitor":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="lexbank-health", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        """Ask for an immediate probe, e.g. after a failed chat request."""
+        self._wake.set()
+
+    def is_down(self) -> bool:
+        """True while recent probes agree the backend is unreachable."""
+        with self._lock:
+            if self.checked_at is None or self.consecutive_failures < FAIL_FAST_AFTER:
+                return False
+            return time.monotonic() - self.checked_at < 2 * self.interval
+
+    def histogram(self) -> List[Tuple[float, int]]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        counts = [(bound, bisect.bisect_right(latencies, bound)) for bound in self.BUCKETS]
+        return counts + [(float("inf"), len(latencies))]
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(pct * len(latencies)))]
+
+    def status_text(self) -> str:
+        with self._lock:
+            healthy, status_code, latency = self.healthy, self.status_code, self.latency
+        if healthy is None:
+            return "غير معروف"
+        if healthy:
+            p95 = self.percentile(0.95)
+            return f"✅ متصل ({latency * 1000:.0f} ms، p95 {p95 * 1000:.0f} ms)"
+        if status_code is not None:
+            return f"⚠️ خطأ: {status_code}"
+        return "❌ غير متصل"
+
+
+health_monitor = HealthMonitor(f"{API_BASE}/health")
+
+
+def _request_headers(accept: str = "application/json") -> dict:
+    return {
+        "Content-Type": "application/json",
+        "Accept": accept,
+        "x-mode": "chat",
+        "x-actor": "huggingface-user",
+    }
+
+
+def _error_reply(error: Exception) -> str:
+    if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+        return "⏱️ انتهت مهلة الاتصال. يرجى المحاولة مرة أخرى."
+    if isinstance(error, (requests.exceptions.ConnectionError, httpx.TransportError)):
+        return "🔌 لا يمكن الاتصال بالخادم. تأكد من أن الخادم يعمل."
+    return f"❌ خطأ غير متوقع: {str(error)}"
+
+
+def _on_request_error(error: Exception) -> str:
+    if isinstance(error, (requests.exceptions.RequestException, httpx.TransportError)):
+        health_monitor.wake()
+    return _error_reply(error)
+
+
+def _backend_down_reply() -> Optional[str]:
+    if health_monitor.start().is_down():
+        return "🔌 الخادم غير متاح حاليًا. يرجى المحاولة بعد قليل."
+    return None
+
+
+def _parse_stream_payload(payload: str) -> Tuple[str, str]:
+    """Map one SSE/NDJSON payload to ("delta" | "result", text)."""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return "delta", payload
+    if not isinstance(data, dict):
+        return "delta", str(data)
+    if data.get("result") is not None:
+        return "result", str(data["result"])
+    for key in ("delta", "token", "content", "text"):
+        if data.get(key):
+            return "delta", str(data[key])
+    return "delta", ""
+
+
+_STREAM_DONE = ("done", "")
+
+
+def _parse_stream_line(line: str, content_type: str) -> Optional[Tuple[str, str]]:
+    if not line:
+        return None
+    if "text/event-stream" in content_type:
+        if not line.startswith("data:"):
+            return None
+        payload = line[5:].removeprefix(" ")
+        if payload == "[DONE]":
+            return _STREAM_DONE
+        return _parse_stream_payload(payload)
+    return _parse_stream_payload(line)
+
+
+def _is_line_delimited(content_type: str) -> bool:
+    return "text/event-stream" in content_type or "ndjson" in content_type
+
+
+def _is_streaming(content_type: str) -> bool:
+    return _is_line_delimited(content_type) or "text/plain" in content_type
+
+
+def iter_stream(response: requests.Response) -> Iterator[Tuple[str, str]]:
+    """Yield text pieces from an SSE, NDJSON or chunked plain-text response."""
+    content_type = response.headers.get("Content-Type", "")
+    response.encoding = response.encoding or "utf-8"
+
+    if _is_line_delimited(content_type):
+        for line in response.iter_lines(decode_unicode=True):
+            piece = _parse_stream_line(line, content_type)
+            if piece is _STREAM_DONE:
+                return
+            if piece:
+                yield piece
+    else:
+        for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+            if chunk:
+                yield "delta", chunk
+
+
+async def aiter_stream(response: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """Async counterpart of ``iter_stream`` for httpx responses."""
+    content_type = response.headers.get("Content-Type", "")
+
+    if _is_line_delimited(content_type):
+        async for line in response.aiter_lines():
+            piece = _parse_stream_line(line, content_type)
+            if piece is _STREAM_DONE:
+                return
+            if piece:
+                yield piece
+    else:
+        async for chunk in response.aiter_text():
+            if chunk:
+                yield "delta", chunk
+
+
+def _merge_piece(reply: str, kind: str, piece: str) -> str:
+    if kind == "result":
+        return reply or piece
+    return reply + piece
+
+
+def _format_timing(ttft: Optional[float], total: float) -> str:
+    if ttft is None:
+        return f"⏱️ الإجمالي: {total:.2f} ث"
+    return f"⚡ أول رمز: {ttft:.2f} ث | ⏱️ الإجمالي: {total:.2f} ث"
 
 
 def chat(message: str, history: List[Tuple[str, str]], agent_type: str):
@@ -16,96 +313,284 @@ def chat(message: str, history: List[Tuple[str, str]], agent_type: str):
 
     history = history or []
 
+    down_reply = _backend_down_reply()
+    if down_reply:
+        history.append((cleaned_message, down_reply))
+        return history, ""
+
     try:
-        response = requests.post(
+        response = session.post(
             f"{API_BASE}/api/control/run",
             json={"agents": [agent_type], "query": cleaned_message},
-            headers={
-                "Content-Type": "application/json",
-                "x-mode": "chat",
-                "x-actor": "huggingface-user",
-            },
+            headers=_request_headers(),
             timeout=TIMEOUT_SECONDS,
         )
 
         if response.ok:
             data = response.json()
-            bot_reply = data.get("result") or "تم استلام الرسالة"
+            bot_reply = data.get("result") or DEFAULT_REPLY
         else:
             bot_reply = f"⚠️ خطأ: {response.status_code} - {response.text}"
 
-    except requests.exceptions.Timeout:
-        bot_reply = "⏱️ انتهت مهلة الاتصال. يرجى المحاولة مرة أخرى."
-    except requests.exceptions.ConnectionError:
-        bot_reply = "🔌 لا يمكن الاتصال بالخادم. تأكد من أن الخادم يعمل."
     except Exception as error:
-        bot_reply = f"❌ خطأ غير متوقع: {str(error)}"
+        bot_reply = _on_request_error(error)
 
     history.append((cleaned_message, bot_reply))
     return history, ""
 
 
-def check_connection():
-    """Validate backend health endpoint connectivity."""
+async def chat_async(message: str, history: List[Tuple[str, str]], agent_type: str):
+    """Async ``chat()``: waits on the shared httpx client without holding a worker thread."""
+    cleaned_message = (message or "").strip()
+    if not cleaned_message:
+        return history, ""
+
+    history = history or []
+
+    down_reply = _backend_down_reply()
+    if down_reply:
+        history.append((cleaned_message, down_reply))
+        return history, ""
+
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
-        if response.status_code == 200:
-            return "✅ متصل"
-        return f"⚠️ خطأ: {response.status_code}"
-    except requests.exceptions.RequestException:
-        return "❌ غير متصل"
+        response = await get_async_client().post(
+            "/api/control/run",
+            json={"agents": [agent_type], "query": cleaned_message},
+            headers=_request_headers(),
+        )
+
+        if response.is_success:
+            bot_reply = response.json().get("result") or DEFAULT_REPLY
+        else:
+            bot_reply = f"⚠️ خطأ: {response.status_code} - {response.text}"
+
+    except Exception as error:
+        bot_reply = _on_request_error(error)
+
+    history.append((cleaned_message, bot_reply))
+    return history, ""
+
+
+def chat_stream(message: str, history: List[Tuple[str, str]], agent_type: str):
+    """Stream the bot reply into the chat history as it arrives.
+
+    Yields ``(history, "", timing)`` after every received piece. Falls back to
+    the blocking ``chat()`` path when streaming is disabled or the backend
+    answers with a plain JSON body.
+    """
+    cleaned_message = (message or "").strip()
+    if not cleaned_message:
+        yield history, "", ""
+        return
+
+    history = history or []
+    started = time.perf_counter()
+
+    down_reply = _backend_down_reply()
+    if down_reply:
+        history.append((cleaned_message, down_reply))
+        yield history, "", ""
+        return
+
+    if not STREAM_RESPONSES:
+        history, _ = chat(cleaned_message, history, agent_type)
+        yield history, "", _format_timing(None, time.perf_counter() - started)
+        return
+
+    history.append((cleaned_message, ""))
+    ttft = None
+    reply = ""
+
+    try:
+        with session.post(
+            f"{API_BASE}/api/control/run",
+            json={"agents": [agent_type], "query": cleaned_message, "stream": True},
+            headers=_request_headers(STREAM_ACCEPT),
+            timeout=TIMEOUT_SECONDS,
+            stream=True,
+        ) as response:
+            if not response.ok:
+                reply = f"⚠️ خطأ: {response.status_code} - {response.text}"
+            elif not _is_streaming(response.headers.get("Content-Type", "")):
+                reply = response.json().get("result") or DEFAULT_REPLY
+            else:
+                for kind, piece in iter_stream(response):
+                    if not piece:
+                        continue
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    reply = _merge_piece(reply, kind, piece)
+                    history[-1] = (cleaned_message, reply)
+                    yield history, "", _format_timing(ttft, time.perf_counter() - started)
+                reply = reply or DEFAULT_REPLY
+    except Exception as error:
+        error_reply = _on_request_error(error)
+        reply = f"{reply}\n\n{error_reply}" if reply else error_reply
+
+    history[-1] = (cleaned_message, reply)
+    yield history, "", _format_timing(ttft, time.perf_counter() - started)
+
+
+async def chat_stream_async(message: str, history: List[Tuple[str, str]], agent_type: str):
+    """Async ``chat_stream()`` used by the UI so one process serves many chats."""
+    cleaned_message = (message or "").strip()
+    if not cleaned_message:
+        yield history, "", ""
+        return
+
+    history = history or []
+    started = time.perf_counter()
+
+    down_reply = _backend_down_reply()
+    if down_reply:
+        history.append((cleaned_message, down_reply))
+        yield history, "", ""
+        return
+
+    if not STREAM_RESPONSES:
+        history, _ = await chat_async(cleaned_message, history, agent_type)
+        yield history, "", _format_timing(None, time.perf_counter() - started)
+        return
+
+    history.append((cleaned_message, ""))
+    ttft = None
+    reply = ""
+
+    try:
+        async with get_async_client().stream(
+            "POST",
+            "/api/control/run",
+            json={"agents": [agent_type], "query": cleaned_message, "stream": True},
+            headers=_request_headers(STREAM_ACCEPT),
+        ) as response:
+            if not response.is_success:
+                body = (await response.aread()).decode("utf-8", "replace")
+                reply = f"⚠️ خطأ: {response.status_code} - {body}"
+            elif not _is_streaming(response.headers.get("Content-Type", "")):
+                await response.aread()
+                reply = response.json().get("result") or DEFAULT_REPLY
+            else:
+                async for kind, piece in aiter_stream(response):
+                    if not piece:
+                        continue
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    reply = _merge_piece(reply, kind, piece)
+                    history[-1] = (cleaned_message, reply)
+                    yield history, "", _format_timing(ttft, time.perf_counter() - started)
+                reply = reply or DEFAULT_REPLY
+    except Exception as error:
+        error_reply = _on_request_error(error)
+        reply = f"{reply}\n\n{error_reply}" if reply else error_reply
+
+    history[-1] = (cleaned_message, reply)
+    yield history, "", _format_timing(ttft, time.perf_counter() - started)
+
 
+def agent_choices() -> List[Tuple[str, str]]:
+    """Dropdown entries for the agents selectable in ``AGENT_CONTEXT``.
 
-with gr.Blocks(title="LexBANK Chat") as demo:
-    gr.Markdown(
-        """
+    Read from the compiled registry snapshot (a few ``stat`` calls once it is
+    built); falls back to ``FALLBACK_AGENTS`` when the repository is not
+    around the app.
+    """
+    root = Path(os.getenv("AGENT_REGISTRY_ROOT") or Path(__file__).resolve().parents[1])
+    agents: List[Tuple[str, str]] = []
+    if (root / "bsm_config").is_dir():
+        if str(root) not in sys.path:
+            sys.path.append(str(root))
+        try:
+            from bsm_config.src.registry import loadRegistry
+
+            registry = loadRegistry(root)
+            agents = [
+                (agent_id, registry.summaries[agent_id].get("name") or agent_id)
+                for agent_id in registry.find(context=AGENT_CONTEXT, selectable=True, status="active")
+            ]
+        except Exception as error:  # the chat must still start with a broken registry
+            print(f"Agent registry unavailable, using defaults: {error}")
+    if not agents:
+        agents = [(agent_id, agent_id) for agent_id in FALLBACK_AGENTS]
+    agents.sort(key=lambda item: (item[0] != DEFAULT_AGENT, item[0]))
+    return [(AGENT_LABELS.get(agent_id, f"🤖 {name}"), agent_id) for agent_id, name in agents]
+
+
+def check_connection():
+    """Report backend health from the background monitor's cached state."""
+    health_monitor.start()
+    if health_monitor.checked_at is None:
+        health_monitor.probe()
+    return health_monitor.status_text()
+
+
+def build_demo():
+    """Build the chat UI.
+
+    Gradio is imported here rather than at module level, so load tests and
+    benchmarks that only call ``chat``/``chat_async`` start without it.
+    """
+    import gradio as gr
+
+    with gr.Blocks(title="LexBANK Chat") as demo:
+        gr.Markdown(
+            """
     <div style="text-align: center;">
         <h1>🏦 LexBANK - المنصة المصرفية الذكية</h1>
         <p>محادثة آمنة مع وكلاء الذكاء الاصطناعي المتخصصين</p>
     </div>
     """
-    )
+        )
 
-    with gr.Row():
-        with gr.Column(scale=3):
-            chatbot = gr.Chatbot(label="المحادثة", height=500, rtl=True, elem_classes=["rtl-text"])
+        with gr.Row():
+            with gr.Column(scale=3):
+                chatbot = gr.Chatbot(label="المحادثة", height=500, rtl=True, elem_classes=["rtl-text"])
 
-            with gr.Row():
-                msg = gr.Textbox(
-                    label="رسالتك",
-                    placeholder="اكتب استفسارك المصرفي هنا...",
-                    scale=4,
-                    rtl=True,
+                with gr.Row():
+                    msg = gr.Textbox(
+                        label="رسالتك",
+                        placeholder="اكتب استفسارك المصرفي هنا...",
+                        scale=4,
+                        rtl=True,
+                    )
+                    submit = gr.Button("📤 إرسال", scale=1, variant="primary")
+
+            with gr.Column(scale=1):
+                gr.Markdown("### ⚙️ الإعدادات")
+
+                choices = agent_choices()
+                agent_type = gr.Dropdown(
+                    choices=choices,
+                    value=DEFAULT_AGENT if any(value == DEFAULT_AGENT for _, value in choices) else choices[0][1],
+                    label="اختر الوكيل",
                 )
-                submit = gr.Button("📤 إرسال", scale=1, variant="primary")
 
-        with gr.Column(scale=1):
-            gr.Markdown("### ⚙️ الإعدادات")
+                gr.Markdown("---")
+                gr.Markdown("### 📊 الحالة")
+                status = gr.Textbox(label="حالة الاتصال", value="غير معروف", interactive=False)
+                timing = gr.Textbox(label="زمن الاستجابة", value="", interactive=False)
 
-            agent_type = gr.Dropdown(
-                choices=[
-                    ("🤖 Auto Router - توجيه تلقائي", "agent-auto"),
-                    ("⚖️ Legal Expert - الخبير القانوني", "legal-agent"),
-                    ("🏛️ Governance Agent - حوكمة", "governance-agent"),
-                    ("🔒 Security Scanner - الأمان", "security-agent"),
-                ],
-                value="agent-auto",
-                label="اختر الوكيل",
-            )
+                check_btn = gr.Button("🔍 فحص الاتصال")
 
-            gr.Markdown("---")
-            gr.Markdown("### 📊 الحالة")
-            status = gr.Textbox(label="حالة الاتصال", value="غير معروف", interactive=False)
+        submit.click(fn=chat_stream_async, inputs=[msg, chatbot, agent_type], outputs=[chatbot, msg, timing])
+        msg.submit(fn=chat_stream_async, inputs=[msg, chatbot, agent_type], outputs=[chatbot, msg, timing])
+        check_btn.click(fn=check_connection, outputs=status)
 
-            check_btn = gr.Button("🔍 فحص الاتصال")
+    return demo
 
-    submit.click(fn=chat, inputs=[msg, chatbot, agent_type], outputs=[chatbot, msg])
-    msg.submit(fn=chat, inputs=[msg, chatbot, agent_type], outputs=[chatbot, msg])
-    check_btn.click(fn=check_connection, outputs=status)
+
+def __getattr__(name: str):
+    # ``demo`` is built on first access, e.g. by ``gradio app.py`` reload mode.
+    if name == "demo":
+        globals()["demo"] = build_demo()
+        return globals()["demo"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    demo.launch(
+    import gradio as gr
+
+    health_monitor.start()
+    build_demo().launch(
         server_name="0.0.0.0",
         theme=gr.themes.Soft(primary_hue="teal"),
         css="""
@@ -1,57 +1,905 @@
+import argparse
 import json
+import logging
 import os
-from datetime import datetime
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
 
-import requests
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
+from bsm_config.src.instrumentation import TELEMETRY, counter, currentSpan, histogram, propagate, span, traced
+
+CF_API_URL = "https://api.cloudflare.com/client/v4"
+DEFAULT_ZONE_FILE = "dns/lexdo-uk-zone.txt"
+DEFAULT_STATE_PATH = ".cache/nexus-sync.json"
+# Cloudflare allows 1200 API calls per five minutes per user; leave headroom for other jobs sharing the token.
+DEFAULT_RATE_LIMIT = 1000
+DEFAULT_RATE_WINDOW = 300.0
+DEFAULT_INTERVAL = 30.0
+MAX_BACKOFF = 600.0
+# Record types whose content is a host name, compared case-insensitively without the trailing dot.
+HOSTNAME_TYPES = {"CNAME", "MX", "NS", "PTR", "SRV"}
+CF_REQUESTS = counter("bsm_cloudflare_requests_total", "Cloudflare API responses by method and status")
+CF_SECONDS = histogram("bsm_cloudflare_request_seconds", "Cloudflare API request latency")
+DNS_CHANGES = counter("bsm_dns_changes_total", "Planned DNS record changes by zone, action and outcome")
+
+
+def parse_interval(value, default=DEFAULT_INTERVAL):
+    """Seconds from a config value such as ``45``, ``"30s"``, ``"5m"`` or ``"real-time"``."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", str(value or ""))
+    if not match:
+        return default
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def normalize_name(name, origin):
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name[:-1].lower()
+    return f"{name}.{origin}".lower()
+
+
+def normalize_content(kind, content):
+    content = content.strip()
+    if kind in HOSTNAME_TYPES:
+        return content.rstrip(".").lower()
+    if kind == "TXT":
+        return content.strip('"')
+    return content.lower() if kind == "AAAA" else content
+
+
+def record_key(record):
+    return record["name"].lower(), record["type"].upper()
+
+
+def _strip_comment(line):
+    quoted = False
+    for i, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ";" and not quoted:
+            return line[:i]
+    return line
+
+
+def parse_zone_file(path, origin):
+    """Records of a BIND-style zone file, shaped like Cloudflare DNS records.
+
+    Relative owner names resolve against ``$ORIGIN`` or, as Cloudflare's
+    import does, against the zone name. Parenthesised multi-line records are
+    not supported.
+    """
+    records = []
+    default_ttl = 1
+    previous = origin
+    for raw in Path(path).read_text(encoding="utf-8").splitlines():
+        line = _strip_comment(raw).rstrip()
+        if not line.strip():
+            continue
+        fields = line.split()
+        if fields[0] == "$ORIGIN":
+            origin = fields[1].rstrip(".").lower()
+            continue
+        if fields[0] == "$TTL":
+            default_ttl = int(fields[1])
+            continue
+        name = previous if line[0].isspace() else normalize_name(fields.pop(0), origin)
+        previous = name
+        ttl = default_ttl
+        while fields and (fields[0].isdigit() or fields[0].upper() in ("IN", "CH", "HS")):
+            token = fields.pop(0)
+            if token.isdigit():
+                ttl = int(token)
+        if len(fields) < 2:
+            raise ValueError(f"{path}: cannot parse record: {raw.strip()}")
+        kind = fields[0].upper()
+        record = {"type": kind, "name": name, "ttl": ttl}
+        if kind == "MX":
+            record["priority"] = int(fields[1])
+            record["content"] = normalize_content(kind, fields[2])
+        else:
+            record["content"] = normalize_content(kind, " ".join(fields[1:]))
+        records.append(record)
+    return records
+
+
+logger = logging.getLogger("bsu_nexus")
+STATUS_LEVELS = {"ERROR": logging.ERROR, "WARN": logging.WARNING, "BACKOFF": logging.WARNING, "PARTIAL": logging.WARNING}
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: ``ts``, ``level``, ``event`` plus the event's fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextLogFormatter(logging.Formatter):
+    def format(self, record):
+        fields = dict(getattr(record, "fields", {}))
+        status = fields.pop("status", record.levelname)
+        line = f"[{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')}] [BSU-NEXUS] {record.getMessage()} | {status}"
+        return " ".join([line] + [f"{key}={value}" for key, value in fields.items()])
+
+
+def configure_logging(fmt="json", level=logging.INFO):
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonLogFormatter() if fmt == "json" else TextLogFormatter())
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log_event(event, status="INFO", **fields):
+    current = currentSpan()
+    if current is not None:
+        fields.setdefault("trace_id", current.trace_id)
+    logger.log(STATUS_LEVELS.get(status, logging.INFO), event, extra={"fields": {"status": status, **fields}})
+
+
+@contextmanager
+def timed(event, **fields):
+    """Log ``event`` with its ``duration_ms`` and trace it as a span; the block may add fields or a ``status``."""
+    extra = {}
+    started = time.perf_counter()
+    with span(event, **fields) as current:
+        try:
+            yield extra
+        except Exception as exc:
+            log_event(event, "ERROR", **fields, **extra, error=str(exc), duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            raise
+        status = extra.pop("status", "OK")
+        current.setAttribute("status", status)
+        log_event(event, status, **fields, **extra, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+
+
+class RateLimiter:
+    """Sliding-window request budget shared by every zone's requests.
+
+    Mirrors how Cloudflare counts (``limit`` calls per ``window`` seconds), so
+    a busy scheduler waits here rather than collecting 429s. ``pause`` holds
+    every caller back after the API answers 429 anyway.
+    """
+
+    def __init__(self, limit=DEFAULT_RATE_LIMIT, window=DEFAULT_RATE_WINDOW):
+        self.limit = limit
+        self.window = window
+        self.waited = 0.0
+        self._sent = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request fits in the budget; returns a slot for ``settle``."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and self._sent[0][0] <= now - self.window:
+                    self._sent.popleft()
+                delay = self._paused_until - now
+                if delay <= 0:
+                    if len(self._sent) < self.limit:
+                        slot = [now]
+                        self._sent.append(slot)
+                        self.waited += waited
+                        return slot
+                    delay = self._sent[0][0] + self.window - now
+            time.sleep(delay)
+            waited += delay
+
+    def settle(self, slot):
+        # The API counts a request when it arrives, which is after we sent it;
+        # restamping at the response keeps our window from freeing up early.
+        with self._lock:
+            slot[0] = time.monotonic()
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CloudflareError(RuntimeError):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CloudflareClient:
+    """Pooled Cloudflare API session; ``map`` runs calls on a shared thread pool.
+
+    Every request, retries included, first takes a slot from ``limiter``.
+    """
+
+    def __init__(self, token, api_url=CF_API_URL, workers=8, timeout=15, max_retries=3, limiter=None):
+        # requests is imported here so runs that never reach the API start without it.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = api_url.rstrip("/")
+        self.limiter = limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
+        self._request_errors = requests.RequestException
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cloudflare")
+        self.requests = 0
+
+    def request(self, method, path, params=None, body=None, etag=None):
+        """Returns ``(status, payload, etag)``; 304 answers carry no payload.
+
+        429 responses are retried after ``Retry-After``; other failures raise
+        ``CloudflareError``.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        for attempt in range(self.max_retries + 1):
+            slot = self.limiter.acquire() if self.limiter is not None else None
+            self.requests += 1
+            started = time.perf_counter()
+            with span("cloudflare.request", method=method, path=path, attempt=attempt) as current:
+                try:
+                    response = self.session.request(
+                        method, f"{self.api_url}{path}", params=params, json=body, headers=headers, timeout=self.timeout
+                    )
+                except self._request_errors as exc:
+                    CF_REQUESTS.add(method=method, status="error")
+                    raise CloudflareError(f"{method} {path}: {exc}") from exc
+                finally:
+                    if slot is not None:
+                        self.limiter.settle(slot)
+                current.setAttribute("status", response.status_code)
+            CF_REQUESTS.add(method=method, status=response.status_code)
+            CF_SECONDS.observe(time.perf_counter() - started, method=method)
+            if response.status_code == 304:
+                return 304, None, etag
+            if response.status_code == 429:
+                retry_after = float(response.headers.get("Retry-After") or 2**attempt)
+                if attempt < self.max_retries:
+                    if self.limiter is not None:
+                        self.limiter.pause(retry_after)
+                    else:
+                        time.sleep(retry_after)
+                    continue
+                raise CloudflareError(f"{method} {path}: rate limited", 429, retry_after)
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = {}
+            if response.status_code >= 400 or payload.get("success") is False:
+                errors = "; ".join(e.get("message", "") for e in payload.get("errors") or []) or response.reason
+                raise CloudflareError(f"{method} {path}: {response.status_code} {errors}", response.status_code)
+            return response.status_code, payload, response.headers.get("ETag")
+        raise AssertionError("unreachable")
+
+    def map(self, fn, items):
+        return list(self._pool.map(propagate(fn), items))
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+
+class DnsSnapshot:
+    """The zone's Cloudflare records as last listed, indexed by (name, type).
+
+    Listing pages are kept with their ETags so a refresh can ask for each page
+    conditionally and only re-read the ones that changed.
+    """
 
-class BSUNexusAgent:
     def __init__(self):
-        with open("docs/nexus.config.json", "r", encoding="utf-8") as config_file:
+        self.pages = {}
+        self.total_pages = 0
+        self.records = {}
+        self.index = {}
+        self.fetched_at = None
+
+    def rebuild(self):
+        self.records = {}
+        self.index = {}
+        for page in sorted(self.pages):
+            for record in self.pages[page][1]:
+                self.add(record)
+
+    def add(self, record):
+        self.remove(record["id"])
+        self.records[record["id"]] = record
+        self.index.setdefault(record_key(record), {})[record["id"]] = record
+
+    def remove(self, record_id):
+        record = self.records.pop(record_id, None)
+        if record is not None:
+            bucket = self.index.get(record_key(record), {})
+            bucket.pop(record_id, None)
+            if not bucket:
+                self.index.pop(record_key(record), None)
+
+    def lookup(self, name, kind):
+        return list(self.index.get((name.lower(), kind.upper()), {}).values())
+
+
+@dataclass
+class DnsChange:
+    action: str
+    desired: dict = None
+    existing: dict = None
+
+    def describe(self):
+        record = self.desired or self.existing
+        text = f"{self.action} {record['type']} {record['name']} -> {record['content']}"
+        if self.action == "update":
+            text += f" (was {self.existing['content']}, ttl {self.existing.get('ttl')})"
+        return text
+
+
+def _needs_update(desired, existing):
+    if desired.get("priority") is not None and desired.get("priority") != existing.get("priority"):
+        return True
+    # Proxied records always report ttl 1 (automatic).
+    return not existing.get("proxied") and desired["ttl"] != existing.get("ttl")
+
+
+def diff_records(desired, snapshot):
+    """Minimal changes to bring ``snapshot`` in line with ``desired``.
+
+    Only (name, type) pairs present in ``desired`` are managed; other records
+    in the zone are left alone. A surplus record is repurposed for a missing
+    one of the same key (one PATCH instead of a DELETE plus a POST).
+    """
+    wanted = {}
+    for record in desired:
+        wanted.setdefault(record_key(record), {})[record["content"]] = record
+    changes = []
+    for key, by_content in wanted.items():
+        missing = dict(by_content)
+        surplus = []
+        for existing in snapshot.lookup(*key):
+            content = normalize_content(existing["type"], existing["content"])
+            target = missing.pop(content, None)
+            if target is None:
+                surplus.append(existing)
+            elif _needs_update(target, existing):
+                changes.append(DnsChange("update", target, existing))
+        for target, existing in zip(list(missing.values()), list(surplus)):
+            changes.append(DnsChange("update", target, existing))
+        changes.extend(DnsChange("create", target) for target in list(missing.values())[len(surplus) :])
+        changes.extend(DnsChange("delete", existing=existing) for existing in surplus[len(missing) :])
+    return changes
+
+
+@dataclass
+class SyncResult:
+    zone: str
+    changes: list = field(default_factory=list)
+    applied: int = 0
+    failed: list = field(default_factory=list)
+    pages: int = 0
+    not_modified: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+
+    @property
+    def in_sync(self):
+        return not self.failed and len(self.changes) == self.applied
+
+
+class ZoneSync:
+    """Keeps one Cloudflare zone in line with a zone file."""
+
+    def __init__(self, client, zone_id, zone_file, per_page=1000):
+        self.client = client
+        self.zone_id = zone_id
+        self.zone_file = Path(zone_file)
+        self.per_page = per_page
+        self.zone_name = None
+        self.snapshot = DnsSnapshot()
+        self.skipped = []
+        self._desired = None
+        self._desired_mtime = None
+        self._last_plan = None
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    def _request(self, *args, **kwargs):
+        # Counted here rather than on the client, which other zones share.
+        with self._count_lock:
+            self.requests += 1
+        return self.client.request(*args, **kwargs)
+
+    def _page(self, page):
+        cached = self.snapshot.pages.get(page)
+        status, payload, etag = self._request(
+            "GET",
+            f"/zones/{self.zone_id}/dns_records",
+            params={"page": page, "per_page": self.per_page},
+            etag=cached[0] if cached else None,
+        )
+        if status == 304:
+            return page, None, None, cached[2]
+        return page, etag, payload.get("result") or [], (payload.get("result_info") or {}).get("total_pages", 1)
+
+    def refresh(self):
+        """Re-list the zone; returns ``(pages requested, pages not modified)``."""
+        if self.zone_name is None:
+            _, payload, _ = self._request("GET", f"/zones/{self.zone_id}")
+            self.zone_name = payload["result"]["name"].lower()
+        # Page 1 tells us how many pages there are; the rest are fetched concurrently.
+        results = [self._page(1)]
+        total = results[0][3]
+        results += self.client.map(self._page, range(2, total + 1))
+        changed = total != self.snapshot.total_pages
+        for page, etag, records, total_pages in results:
+            if records is not None:
+                self.snapshot.pages[page] = (etag, records, total_pages)
+                changed = True
+        for page in [p for p in self.snapshot.pages if p > total]:
+            del self.snapshot.pages[page]
+        self.snapshot.total_pages = total
+        if changed:
+            self.snapshot.rebuild()
+        self.snapshot.fetched_at = time.time()
+        return len(results), sum(1 for r in results if r[2] is None)
+
+    def desired(self):
+        """Parsed zone file, re-read only when it changes on disk."""
+        mtime = self.zone_file.stat().st_mtime_ns
+        if self._desired is None or mtime != self._desired_mtime:
+            records = parse_zone_file(self.zone_file, self.zone_name)
+            suffix = f".{self.zone_name}"
+            self._desired = [r for r in records if r["name"] == self.zone_name or r["name"].endswith(suffix)]
+            self.skipped = [r for r in records if r not in self._desired]
+            self._desired_mtime = mtime
+            self._last_plan = None
+        return self._desired
+
+    def _apply(self, change):
+        base = f"/zones/{self.zone_id}/dns_records"
+        if change.action == "delete":
+            self._request("DELETE", f"{base}/{change.existing['id']}")
+            self.snapshot.remove(change.existing["id"])
+            return
+        body = {k: v for k, v in change.desired.items() if k in ("type", "name", "content", "ttl", "priority")}
+        if change.action == "create":
+            _, payload, _ = self._request("POST", base, body=body)
+        else:
+            _, payload, _ = self._request("PATCH", f"{base}/{change.existing['id']}", body=body)
+        self.snapshot.add(payload["result"])
+
+    def sync(self, apply=True):
+        started = time.perf_counter()
+        requests_before = self.requests
+        pages, not_modified = self.refresh()
+        desired = self.desired()
+        result = SyncResult(self.zone_name, pages=pages, not_modified=not_modified)
+        if not (pages == not_modified and self._last_plan == []):
+            # Nothing to diff when every page came back 304 and the last plan was empty.
+            result.changes = diff_records(desired, self.snapshot)
+        if apply and result.changes:
+
+            def attempt(change):
+                try:
+                    self._apply(change)
+                    return None
+                except CloudflareError as exc:
+                    return change, exc
+
+            failures = [f for f in self.client.map(attempt, result.changes) if f]
+            result.failed = failures
+            result.applied = len(result.changes) - len(failures)
+            # Our own writes changed the listing; the next refresh re-reads those pages.
+            self._last_plan = None if failures else []
+        else:
+            self._last_plan = result.changes
+        result.requests = self.requests - requests_before
+        result.seconds = time.perf_counter() - started
+        return result
+
+
+@dataclass
+class ZoneState:
+    """Schedule and outcome of one zone, persisted between runs."""
+
+    zone_id: str
+    zone_file: str
+    interval: float
+    domain: str = ""
+    last_success: float = None
+    last_duration: float = None
+    last_error: str = None
+    failures: int = 0
+    next_due: float = 0.0
+    records: int = 0
+    attempts: int = 0
+
+    def fresh(self, now):
+        return self.last_success is not None and now - self.last_success < self.interval
+
+
+PERSISTED_FIELDS = ("domain", "last_success", "last_duration", "last_error", "failures", "next_due", "records")
+
+
+class SyncScheduler:
+    """Runs the sync cycles of many zones concurrently under one request budget.
+
+    A zone is due ``interval`` seconds after its last success; zones synced
+    more recently, in this process or a previous run recorded in
+    ``state_path``, are skipped as fresh. A failing zone backs off on its own
+    schedule without holding up the others.
+    """
+
+    def __init__(self, client, zones, per_page=1000, workers=4, apply=True, state_path=None):
+        self.client = client
+        self.zones = {zone.zone_id: zone for zone in zones}
+        self.per_page = per_page
+        self.apply = apply
+        self.state_path = Path(state_path) if state_path else None
+        self._syncs = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="zone")
+        self._stop = threading.Event()
+        self.load_state()
+
+    def load_state(self):
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            saved = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for zone_id, values in saved.get("zones", {}).items():
+            if zone_id in self.zones:
+                state = self.zones[zone_id]
+                for key in PERSISTED_FIELDS:
+                    if key in values and not (key == "domain" and state.domain):
+                        setattr(state, key, values[key])
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            zones = {zone_id: {k: v for k, v in asdict(z).items() if k in PERSISTED_FIELDS} for zone_id, z in self.zones.items()}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"zones": zones}, indent=2), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    def _sync_for(self, state):
+        if state.zone_id not in self._syncs:
+            self._syncs[state.zone_id] = ZoneSync(self.client, state.zone_id, state.zone_file, per_page=self.per_page)
+        return self._syncs[state.zone_id]
+
+    def _finish(self, state, started, error=None, retry_after=None):
+        now = time.time()
+        with self._lock:
+            state.attempts += 1
+            state.last_duration = round(time.perf_counter() - started, 3)
+            if error is None:
+                state.last_success, state.last_error, state.failures = now, None, 0
+                state.next_due = now + state.interval
+                return
+            state.failures += 1
+            state.last_error = str(error)
+            delay = min(MAX_BACKOFF, state.interval * 2**state.failures) * random.uniform(0.5, 1.0)
+            state.next_due = now + max(delay, retry_after or 0)
+        log_event("zone.backoff", "BACKOFF", zone=state.zone_id, failures=state.failures, retry_in_s=round(state.next_due - now, 1))
+
+    def sync_zone(self, state):
+        """One cycle for one zone; returns its ``SyncResult`` or None on failure."""
+        sync = self._sync_for(state)
+        started = time.perf_counter()
+        try:
+            with span("zone.sync", zone=state.zone_id, domain=state.domain, apply=self.apply):
+                result = sync.sync(apply=self.apply)
+        except (CloudflareError, OSError, ValueError) as exc:
+            log_event("zone.sync", "ERROR", zone=state.zone_id, domain=state.domain, error=str(exc),
+                      duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            self._finish(state, started, exc, getattr(exc, "retry_after", None))
+            return None
+
+        skipped, sync.skipped = sync.skipped, []
+        for record in skipped:
+            log_event("dns.skip", "WARN", zone=sync.zone_name, type=record["type"], name=record["name"], reason="outside zone")
+        for change in result.changes:
+            log_event("dns.change", "APPLY" if self.apply else "DRIFT", zone=result.zone, **_change_fields(change))
+            DNS_CHANGES.add(zone=result.zone, action=change.action, outcome="apply" if self.apply else "drift")
+        for change, exc in result.failed:
+            log_event("dns.change", "ERROR", zone=result.zone, error=str(exc), **_change_fields(change))
+            DNS_CHANGES.add(zone=result.zone, action=change.action, outcome="failed")
+        state.domain = state.domain or result.zone
+        state.records = len(sync.snapshot.records)
+        ok = result.in_sync or not self.apply
+        self._finish(state, started, None if ok else f"{len(result.failed)} changes failed")
+        status = ("OK" if ok else "PARTIAL") if self.apply else ("DRIFT" if result.changes else "OK")
+        log_event(
+            "zone.sync",
+            status,
+            zone=state.zone_id,
+            domain=result.zone,
+            records=state.records,
+            changes=len(result.changes),
+            applied=result.applied,
+            failed=len(result.failed),
+            pages=result.pages,
+            not_modified=result.not_modified,
+            requests=result.requests,
+            duration_ms=round(result.seconds * 1000, 1),
+        )
+        return result
+
+    def _run(self, state):
+        try:
+            return state.zone_id, self.sync_zone(state)
+        finally:
+            with self._lock:
+                self._running.discard(state.zone_id)
+
+    def _claim(self, now, force=False):
+        """Zones due at ``now``, marked as running."""
+        with self._lock:
+            due = [
+                z
+                for z in self.zones.values()
+                if z.zone_id not in self._running and (force or (now >= z.next_due and not z.fresh(now)))
+            ]
+            self._running.update(z.zone_id for z in due)
+        return due
+
+    def run_once(self, force=False):
+        """Sync every due zone (all of them with ``force``) concurrently.
+
+        Returns ``{zone_id: SyncResult or None}`` for the zones that ran.
+        """
+        now = time.time()
+        due = self._claim(now, force)
+        for state in self.zones.values():
+            if state not in due:
+                log_event("zone.skip", "SKIP", zone=state.zone_id, domain=state.domain, reason="fresh",
+                          age_s=round(now - state.last_success, 1) if state.last_success else None,
+                          next_in_s=round(max(0.0, state.next_due - now), 1))
+        with timed("cycle", zones=len(due), skipped=len(self.zones) - len(due)) as fields:
+            results = dict(self._pool.map(propagate(self._run), due))
+            fields["failed"] = sum(1 for zone_id in results if self.zones[zone_id].failures)
+            fields["status"] = "PARTIAL" if fields["failed"] else "OK"
+        self.save_state()
+        return results
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, max_cycles=None):
+        """Keep every zone on its own schedule until stopped.
+
+        With ``max_cycles`` it returns once every zone has been attempted that
+        many times. Returns True when no zone is failing.
+        """
+        pending = set()
+        while not self._stop.is_set():
+            for state in self._claim(time.time()):
+                if max_cycles and state.attempts >= max_cycles:
+                    with self._lock:
+                        self._running.discard(state.zone_id)
+                    continue
+                pending.add(self._pool.submit(self._run, state))
+            if max_cycles and not pending and all(z.attempts >= max_cycles for z in self.zones.values()):
+                break
+            with self._lock:
+                idle = [z.next_due for z in self.zones.values() if z.zone_id not in self._running]
+            timeout = max(0.05, min(idle, default=time.time() + 1.0) - time.time())
+            if pending:
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if done:
+                    self.save_state()
+            else:
+                self._stop.wait(timeout)
+        wait(pending)
+        self.save_state()
+        return all(z.failures == 0 for z in self.zones.values())
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+def _change_fields(change):
+    record = change.desired or change.existing
+    fields = {"action": change.action, "type": record["type"], "name": record["name"], "content": record["content"]}
+    if change.action == "update":
+        fields["previous"] = change.existing["content"]
+        fields["previous_ttl"] = change.existing.get("ttl")
+    return fields
+
+
+class BSUNexusAgent:
+    def __init__(
+        self,
+        config_path="docs/nexus.config.json",
+        api_url=None,
+        zone_file=None,
+        workers=8,
+        per_page=1000,
+        zone_workers=4,
+        rate_limit=DEFAULT_RATE_LIMIT,
+        rate_window=DEFAULT_RATE_WINDOW,
+        state_path=None,
+    ):
+        with open(config_path, "r", encoding="utf-8") as config_file:
             self.config = json.load(config_file)
 
         self.cf_token = os.getenv("CLOUDFLARE_TOKEN")
         # Allow override from env while preserving config fallback.
         self.cf_zone = os.getenv("CLOUDFLARE_ZONE_ID") or self.config["infrastructure"]["zone_id"]
+        self.api_url = api_url or os.getenv("CLOUDFLARE_API_URL") or CF_API_URL
+        self.zone_file = zone_file or self.config["infrastructure"].get("dns_zone_file", DEFAULT_ZONE_FILE)
+        self.interval = parse_interval(self.config.get("agents", {}).get("sync_manager", {}).get("sync_interval"))
+        self.workers = workers
+        self.per_page = per_page
+        self.zone_workers = zone_workers
+        self.limiter = RateLimiter(rate_limit, rate_window)
+        self.state_path = state_path
+        self._scheduler = None
 
-    def log(self, action, status="INFO"):
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] [BSU-NEXUS] {action} | {status}")
+    def log(self, action, status="INFO", **fields):
+        log_event(action, status, **fields)
 
-    def verify_dns(self):
-        self.log("Verifying DNS...", "CHECK")
+    def zone_states(self, interval=None):
+        """Zones to sync: ``infrastructure.zones`` in the config, unless the
+        environment names zones (comma-separated ``id`` or ``id=zone-file``);
+        otherwise the single ``zone_id``/``domain``.
+        """
+        infra = self.config["infrastructure"]
+        if infra.get("zones") and not os.getenv("CLOUDFLARE_ZONE_ID") and self.cf_zone == infra["zone_id"]:
+            entries = infra["zones"]
+        else:
+            entries = []
+            for item in str(self.cf_zone or "").split(","):
+                zone_id, _, zone_file = item.strip().partition("=")
+                if zone_id:
+                    domain = infra.get("domain", "") if zone_id == infra["zone_id"] else ""
+                    entries.append({"zone_id": zone_id, "zone_file": zone_file or None, "domain": domain})
+        return [
+            ZoneState(
+                zone_id=entry["zone_id"],
+                zone_file=entry.get("zone_file") or self.zone_file,
+                interval=interval if interval is not None else parse_interval(entry.get("sync_interval"), self.interval),
+                domain=entry.get("domain", ""),
+            )
+            for entry in entries
+        ]
+
+    def scheduler(self, apply=True, interval=None):
+        if self._scheduler is None or self._scheduler.apply != apply:
+            client = CloudflareClient(self.cf_token, self.api_url, workers=self.workers, limiter=self.limiter)
+            self._scheduler = SyncScheduler(
+                client,
+                self.zone_states(interval),
+                per_page=self.per_page,
+                workers=self.zone_workers,
+                apply=apply,
+                state_path=self.state_path,
+            )
+        return self._scheduler
 
+    def _ready(self):
         if not self.cf_token:
-            self.log("Missing Cloudflare token", "ERROR")
+            self.log("config", "ERROR", error="Missing Cloudflare token")
             return False
 
         if not self.cf_zone:
-            self.log("Missing Cloudflare zone id", "ERROR")
+            self.log("config", "ERROR", error="Missing Cloudflare zone id")
             return False
+        return True
 
-        headers = {
-            "Authorization": f"Bearer {self.cf_token}",
-            "Content-Type": "application/json",
-        }
+    @traced("nexus.sync_dns")
+    def sync_dns(self, apply=True):
+        """Sync every zone now, fresh or not; returns ``{zone_id: SyncResult or None}``."""
+        if not self._ready():
+            return {}
+        return self.scheduler(apply).run_once(force=True)
 
-        try:
-            response = requests.get(
-                f"https://api.cloudflare.com/client/v4/zones/{self.cf_zone}/dns_records",
-                headers=headers,
-                timeout=15,
-            )
-            response.raise_for_status()
-        except requests.RequestException as exc:
-            self.log(f"Cloudflare API error: {exc}", "ERROR")
+    @traced("nexus.verify_dns")
+    def verify_dns(self):
+        """Check every zone against its zone file without changing it; True when all are in sync."""
+        results = self.sync_dns(apply=False)
+        return bool(results) and all(r is not None and not r.changes for r in results.values())
+
+    def stop(self):
+        if self._scheduler is not None:
+            self._scheduler.stop()
+
+    def run(self, once=False, apply=True, interval=None, max_cycles=None, force=False):
+        """Sync zones on their intervals until stopped; ``once`` runs only the zones that are due."""
+        if not self._ready():
             return False
+        scheduler = self.scheduler(apply, interval)
+        try:
+            if once:
+                scheduler.run_once(force=force)
+                return all(z.failures == 0 for z in scheduler.zones.values())
+            return scheduler.run(max_cycles=max_cycles)
+        finally:
+            scheduler.close()
+            scheduler.client.close()
+            self._scheduler = None
 
-        self.log(f"DNS OK: {self.config['domain']}", "SUCCESS")
-        return True
 
-    def run(self):
-        self.log("Starting BSU Nexus Cycle", "START")
-        self.verify_dns()
-        self.log("Cycle Complete", "DONE")
+def main():
+    parser = argparse.ArgumentParser(description="Keep Cloudflare DNS in line with zone files.")
+    parser.add_argument("--config", default="docs/nexus.config.json")
+    parser.add_argument(
+        "--zone-id", action="append", default=[], help="Zone to sync as ID or ID=ZONE_FILE (repeatable; overrides env and config)"
+    )
+    parser.add_argument("--zone-file", default="", help=f"Default desired records (default: config or {DEFAULT_ZONE_FILE})")
+    parser.add_argument("--api-url", default="", help="Cloudflare API base URL (e.g. a local fake)")
+    parser.add_argument("--once", action="store_true", help="Sync the zones that are due and exit")
+    parser.add_argument("--force", action="store_true", help="With --once, also sync zones that are still fresh")
+    parser.add_argument("--interval", type=float, default=None, help="Seconds between cycles per zone (default: config)")
+    parser.add_argument("--max-cycles", type=int, default=0, help="Stop after this many cycles per zone")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--apply", action="store_true", help="Create, update and delete records to remove drift")
+    mode.add_argument("--dry-run", action="store_true", help="Report drift without changing records (the default)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent API requests")
+    parser.add_argument("--zone-workers", type=int, default=4, help="Zones synced concurrently")
+    parser.add_argument("--per-page", type=int, default=1000, help="Records per listing page")
+    parser.add_argument("--rate-limit", type=int, default=DEFAULT_RATE_LIMIT, help="API calls allowed per --rate-window")
+    parser.add_argument("--rate-window", type=float, default=DEFAULT_RATE_WINDOW, help="Rate-limit window in seconds")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Per-zone schedule state file")
+    parser.add_argument("--no-state", action="store_true", help="Do not read or write the state file")
+    parser.add_argument("--log-format", choices=["json", "text"], default="json")
+    parser.add_argument("--metrics-out", default="", help="Write metrics and traces here at exit (.json: OTLP, else Prometheus text)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus /metrics on this port while running")
+    args = parser.parse_args()
+
+    configure_logging(args.log_format)
+    if args.metrics_out:
+        TELEMETRY.configure(out=args.metrics_out)
+    if args.metrics_port:
+        TELEMETRY.configure(enabled=True)
+        TELEMETRY.serveMetrics(args.metrics_port)
+    agent = BSUNexusAgent(
+        args.config,
+        api_url=args.api_url or None,
+        zone_file=args.zone_file or None,
+        workers=args.workers,
+        per_page=args.per_page,
+        zone_workers=args.zone_workers,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        state_path=None if args.no_state else args.state,
+    )
+    if args.zone_id:
+        agent.cf_zone = ",".join(args.zone_id)
+    try:
+        ok = agent.run(
+            once=args.once, apply=args.apply, interval=args.interval, max_cycles=args.max_cycles, force=args.force
+        )
+    except KeyboardInterrupt:
+        ok = True
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
-    BSUNexusAgent().run()
+    raise SystemExit(main())
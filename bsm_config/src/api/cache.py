@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..instrumentation import counter
+
+DEFAULT_TTL_SECONDS = 3600.0
+CACHE_LOOKUPS = counter("bsm_cache_lookups_total", "Response cache lookups by result")
+
+
+def cacheKey(provider: str, operation: str, params: Any) -> str:
+    """Stable content hash of a provider call.
+
+    Raises ``TypeError`` for params that are not plain JSON: a ``repr``
+    fallback would give address-based keys that never hit, or one key to
+    unrelated objects.
+    """
+    model = params.get("model") if isinstance(params, dict) else None
+    canonical = json.dumps(
+        {"provider": provider, "model": model, "operation": operation, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MemoryCache:
+    """In-process LRU with per-entry TTL.
+
+    Values are stored as JSON and decoded on every hit, so a caller that
+    mutates its response cannot change what the next caller gets.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any], provider: str = "", ttl: Optional[float] = None) -> None:
+        encoded = json.dumps(value, ensure_ascii=False, default=repr)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), provider, encoded)
+            self._entries.move_to_end(key)
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+            if removed:
+                self.stats.invalidations += 1
+            return removed
+
+    def clear(self, provider: Optional[str] = None) -> int:
+        with self._lock:
+            keys = [k for k, (_, p, _) in self._entries.items() if provider is None or p == provider]
+            for key in keys:
+                del self._entries[key]
+            self.stats.invalidations += len(keys)
+            return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every process that opens the same file."""
+
+    def __init__(self, path: os.PathLike, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, provider TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_provider ON responses(provider)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """``(value, provider, seconds left)`` for a live entry, else None."""
+        row = self._connect().execute(
+            "SELECT expires_at, provider, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        expires_at, provider, value = row
+        remaining = expires_at - time.time()
+        if remaining < 0:
+            self._connect().execute("DELETE FROM responses WHERE key = ? AND expires_at = ?", (key, expires_at))
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(value), provider, remaining
+
+    def set(self, key: str, value: Dict[str, Any], provider: str = "", ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (key, provider, expires_at, value) VALUES (?, ?, ?, ?)",
+            (key, provider, expires_at, json.dumps(value, ensure_ascii=False, default=repr)),
+        )
+        self.stats.stores += 1
+
+    def invalidate(self, key: str) -> bool:
+        removed = self._connect().execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+        if removed:
+            self.stats.invalidations += 1
+        return removed
+
+    def clear(self, provider: Optional[str] = None) -> int:
+        if provider is None:
+            removed = self._connect().execute("DELETE FROM responses").rowcount
+        else:
+            removed = self._connect().execute("DELETE FROM responses WHERE provider = ?", (provider,)).rowcount
+        self.stats.invalidations += removed
+        return removed
+
+    def purgeExpired(self) -> int:
+        removed = self._connect().execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),)).rowcount
+        self.stats.expirations += removed
+        return removed
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class ResponseCache:
+    """Memory LRU in front of an optional shared on-disk store."""
+
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[SQLiteCache] = None) -> None:
+        self.memory = memory or MemoryCache()
+        self.disk = disk
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fromEnv(cls) -> "ResponseCache":
+        """Build a cache from ``BSM_AI_CACHE_*`` settings.
+
+        ``BSM_AI_CACHE_PATH`` enables the SQLite store, ``BSM_AI_CACHE_TTL``
+        sets the TTL in seconds and ``BSM_AI_CACHE_SIZE`` the LRU capacity.
+        """
+        ttl = float(os.getenv("BSM_AI_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        size = int(os.getenv("BSM_AI_CACHE_SIZE", "1024"))
+        path = os.getenv("BSM_AI_CACHE_PATH")
+        return cls(MemoryCache(size, ttl), SQLiteCache(path, ttl) if path else None)
+
+    def _count(self, hit: bool) -> None:
+        CACHE_LOOKUPS.add(result="hit" if hit else "miss")
+        with self._lock:
+            if hit:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = self.disk.lookup(key)
+            if entry is not None:
+                # Promote with the disk entry's remaining lifetime, not a fresh TTL.
+                value, provider, remaining = entry
+                self.memory.set(key, value, provider, ttl=remaining)
+        self._count(value is not None)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], provider: str = "", ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, provider, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, provider, ttl)
+        with self._lock:
+            self.stats.stores += 1
+
+    def invalidate(self, key: str) -> bool:
+        removed = self.memory.invalidate(key)
+        if self.disk is not None:
+            removed = self.disk.invalidate(key) or removed
+        if removed:
+            with self._lock:
+                self.stats.invalidations += 1
+        return removed
+
+    def clear(self, provider: Optional[str] = None) -> int:
+        removed = self.memory.clear(provider)
+        if self.disk is not None:
+            removed = max(removed, self.disk.clear(provider))
+        with self._lock:
+            self.stats.invalidations += removed
+        return removed
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+class CachingClient:
+    """Serves repeated provider calls from a ``ResponseCache``.
+
+    Calls whose params are not plain JSON bypass the cache. The async
+    methods run lookups and stores in a worker thread when the cache has a
+    SQLite tier, so disk I/O does not block the event loop.
+    """
+
+    def __init__(self, client: Any, cache: ResponseCache, name: str) -> None:
+        self.client = client
+        self.cache = cache
+        self.name = name
+
+    def keyFor(self, operation: str, params: Any) -> str:
+        return cacheKey(self.name, operation, params)
+
+    def invalidate(self, operation: str, params: Any) -> bool:
+        try:
+            return self.cache.invalidate(self.keyFor(operation, params))
+        except TypeError:
+            return False
+
+    def _cached(self, operation: str, params: Any) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        try:
+            key = self.keyFor(operation, params)
+        except TypeError:
+            return None, None
+        return key, self.cache.get(key)
+
+    def _store(self, key: Optional[str], value: Dict[str, Any]) -> None:
+        if key is not None:
+            self.cache.set(key, value, self.name)
+
+    async def _acached(self, operation: str, params: Any) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        if self.cache.disk is None:
+            return self._cached(operation, params)
+        return await asyncio.to_thread(self._cached, operation, params)
+
+    async def _astore(self, key: Optional[str], value: Dict[str, Any]) -> None:
+        if self.cache.disk is None:
+            self._store(key, value)
+        elif key is not None:
+            await asyncio.to_thread(self._store, key, value)
+
+    def generateReport(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key, value = self._cached("generateReport", params)
+        if value is None:
+            value = self.client.generateReport(params)
+            self._store(key, value)
+        return value
+
+    async def generateReportAsync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key, value = await self._acached("generateReport", params)
+        if value is None:
+            value = await self.client.generateReportAsync(params)
+            await self._astore(key, value)
+        return value
+
+    def analyzeDataSync(self, data: Any) -> Dict[str, Any]:
+        key, value = self._cached("analyzeData", data)
+        if value is None:
+            value = self.client.analyzeDataSync(data)
+            self._store(key, value)
+        return value
+
+    async def analyzeData(self, data: Any) -> Dict[str, Any]:
+        key, value = await self._acached("analyzeData", data)
+        if value is None:
+            value = await self.client.analyzeData(data)
+            await self._astore(key, value)
+        return value
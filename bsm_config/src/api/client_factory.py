@@ -1,39 +1,240 @@
+import asyncio
+import threading
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
+from ..instrumentation import span
+from .cache import CachingClient, ResponseCache
+from .coalesce import CoalescingClient, CoalescingConfig
+from .metrics import ClientMetrics, cacheSnapshot
+from .routing import AttemptAbandonedError, AttemptToken, ProviderStats, RoutingClient, RoutingConfig
+from .transport import MockTransport
 
-@dataclass
-class MockProviderClient:
-    name: str
+
+@dataclass(frozen=True)
+class ClientConfig:
+    max_concurrency: int = 8
+    pool_size: int = 10
+    keep_alive: bool = True
+    latency: float = 0.0
+    connect_latency: float = 0.0
+    failure_rate: float = 0.0
+
+
+class ProviderClient:
+    """Long-lived client for one provider.
+
+    Every call goes through the provider's pooled transport and is capped at
+    ``max_concurrency`` in-flight requests. The sync cap is shared by all
+    threads; the async cap is tracked per event loop. Every call is timed
+    into ``metrics``.
+    """
+
+    def __init__(self, name: str, transport: MockTransport, max_concurrency: int = 8) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.name = name
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self.metrics = ClientMetrics(name)
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._slots_lock = threading.Lock()
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._slots_lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = asyncio.Semaphore(self.max_concurrency)
+                self._async_slots[loop] = slots
+            return slots
+
+    def _call(self, operation: str, payload: Any, attempt: Optional[AttemptToken] = None) -> Dict[str, Any]:
+        with span(f"provider.{operation}", provider=self.name):
+            self._sync_slots.acquire()
+            if attempt is None:
+                attempt = AttemptToken()
+            if not attempt.hold(self._sync_slots.release):
+                self._sync_slots.release()
+                raise AttemptAbandonedError(f"{self.name} {operation} abandoned before it started")
+            try:
+                with self.metrics.track():
+                    return self.transport.request(operation, payload)
+            finally:
+                attempt.done()
+
+    async def _acall(self, operation: str, payload: Any) -> Dict[str, Any]:
+        with span(f"provider.{operation}", provider=self.name):
+            async with self._loop_slots():
+                with self.metrics.track():
+                    return await self.transport.arequest(operation, payload)
 
     def generateReport(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        return {
-            "content": f"# {params.get('title', 'Report')}\n\nProvider: {self.name}\n",
-            "provider": self.name,
-            "model": params.get("model"),
-        }
+        return self._call("generateReport", params)
+
+    async def generateReportAsync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._acall("generateReport", params)
+
+    def analyzeDataSync(self, data: Any) -> Dict[str, Any]:
+        return self._call("analyzeData", data)
 
     async def analyzeData(self, data: Any) -> Dict[str, Any]:
-        return {
-            "provider": self.name,
-            "recommendations": [
-                "Use richer prompts for structured recommendations.",
-                "Add provider fallback policies for resilience.",
-            ],
-            "raw": data,
-        }
+        return await self._acall("analyzeData", data)
+
+    def analyzeBatchSync(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Analyze several payloads in one request; results keep the input order."""
+        return self._call("analyzeBatch", items)["results"]
+
+    async def analyzeBatch(self, items: List[Any]) -> List[Dict[str, Any]]:
+        return (await self._acall("analyzeBatch", items))["results"]
+
+    def close(self) -> None:
+        self.transport.close()
 
 
 class APIClientFactory:
     @staticmethod
-    def fromProviders(enabledProviders: List[str]) -> "APIClientFactory":
+    def fromProviders(
+        enabledProviders: List[str],
+        config: Optional[ClientConfig] = None,
+        providerConfigs: Optional[Dict[str, ClientConfig]] = None,
+        cache: Optional[ResponseCache] = None,
+        coalescing: Optional[CoalescingConfig] = None,
+    ) -> "APIClientFactory":
         providers = [p.strip() for p in enabledProviders if p and p.strip()]
         if not providers:
             providers = ["openai"]
-        return APIClientFactory(providers)
+        return APIClientFactory(providers, config, providerConfigs, cache, coalescing)
 
-    def __init__(self, providers: List[str]) -> None:
+    def __init__(
+        self,
+        providers: List[str],
+        config: Optional[ClientConfig] = None,
+        providerConfigs: Optional[Dict[str, ClientConfig]] = None,
+        cache: Optional[ResponseCache] = None,
+        coalescing: Optional[CoalescingConfig] = None,
+    ) -> None:
         self.providers = providers
+        self.config = config or ClientConfig()
+        self.providerConfigs = dict(providerConfigs or {})
+        self.cache = cache
+        self.coalescing = coalescing
+        self._clients: Dict[str, ProviderClient] = {}
+        self._stats: Dict[str, ProviderStats] = {}
+        self._router: Optional[RoutingClient] = None
+        self._coalescers: Dict[str, CoalescingClient] = {}
+        self._lock = threading.Lock()
+
+    def configFor(self, provider: str) -> ClientConfig:
+        return self.providerConfigs.get(provider, self.config)
+
+    def _createClient(self, provider: str) -> ProviderClient:
+        cfg = self.configFor(provider)
+        transport = MockTransport(
+            provider,
+            latency=cfg.latency,
+            connect_latency=cfg.connect_latency,
+            pool_size=cfg.pool_size,
+            keep_alive=cfg.keep_alive,
+            failure_rate=cfg.failure_rate,
+        )
+        return ProviderClient(provider, transport, max_concurrency=cfg.max_concurrency)
+
+    def getClient(self, provider: str) -> ProviderClient:
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None:
+                client = self._createClient(provider)
+                self._clients[provider] = client
+            return client
+
+    def _withCoalescing(self, client: Any, name: str) -> Any:
+        """Wrap ``client`` in the factory's shared ``CoalescingClient`` for ``name``.
+
+        Calls only merge within one wrapper, so it is created once per name
+        and replaced only when the underlying client changes.
+        """
+        if self.coalescing is None:
+            return client
+        with self._lock:
+            coalescer = self._coalescers.get(name)
+            if coalescer is None or coalescer.client is not client:
+                coalescer = CoalescingClient(client, self.coalescing)
+                self._coalescers[name] = coalescer
+            return coalescer
+
+    def _withCache(self, client: Any, name: str) -> Any:
+        if self.cache is None:
+            return client
+        return CachingClient(client, self.cache, name)
+
+    def getPrimaryClient(self) -> Union[ProviderClient, CoalescingClient, CachingClient]:
+        name = self.providers[0]
+        return self._withCache(self._withCoalescing(self.getClient(name), name), name)
+
+    def getAllClients(self) -> List[ProviderClient]:
+        return [self.getClient(p) for p in self.providers]
+
+    def providerStats(self, provider: str) -> ProviderStats:
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None:
+                config = self._router.config if self._router else RoutingConfig()
+                stats = ProviderStats(provider, window=config.window, probe_after=config.probe_after)
+                self._stats[provider] = stats
+            return stats
+
+    def metricsSnapshot(self) -> Dict[str, Any]:
+        """Live per-provider call metrics, routing stats, cache and coalescing counters."""
+        with self._lock:
+            clients = list(self._clients.values())
+            stats = list(self._stats.values())
+            coalescers = dict(self._coalescers)
+        return {
+            "providers": [client.metrics.snapshot() for client in clients],
+            "routing": [s.snapshot() for s in stats],
+            "cache": cacheSnapshot(self.cache),
+            "coalescing": {name: c.snapshot() for name, c in coalescers.items()},
+        }
+
+    def getRoutingClient(
+        self, config: Optional[RoutingConfig] = None
+    ) -> Union[RoutingClient, CoalescingClient, CachingClient]:
+        """Return the factory's routing client, creating it on first use.
+
+        Passing ``config`` replaces the routing policy; collected provider
+        stats are kept.
+        """
+        with self._lock:
+            if self._router is None or (config is not None and config != self._router.config):
+                previous, self._router = self._router, RoutingClient(self, config)
+            else:
+                previous = None
+            router = self._router
+        if previous is not None:
+            previous.close()
+        name = "+".join(self.providers)
+        return self._withCache(self._withCoalescing(router, name), name)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            router, self._router = self._router, None
+            self._coalescers.clear()
+        if router is not None:
+            router.close()
+        for client in clients:
+            client.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self) -> "APIClientFactory":
+        return self
 
-    def getPrimaryClient(self) -> MockProviderClient:
-        return MockProviderClient(self.providers[0])
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import weakref
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..instrumentation import counter, histogram
+
+COALESCED_CALLS = counter("bsm_coalesced_calls_total", "Calls by single-flight role (leader, or follower merged into it)")
+BATCH_SIZE = histogram("bsm_batch_size", "Payloads per micro-batched provider call", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_FILL = histogram("bsm_batch_fill_ratio", "Batch size over max_batch", buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+
+
+@dataclass(frozen=True)
+class CoalescingConfig:
+    single_flight: bool = True
+    # Off by default: a window delays every analyzeData call, even one with nobody to batch with.
+    batch_window: float = 0.0
+    max_batch: int = 16
+    # analyzeData payloads larger than this (as canonical JSON) are sent on their own.
+    max_item_bytes: int = 4096
+
+    @classmethod
+    def fromEnv(cls) -> "CoalescingConfig":
+        """Build a config from ``BSM_SINGLE_FLIGHT`` (0 disables), ``BSM_BATCH_WINDOW_MS``
+        (batching is off unless set, e.g. 5), ``BSM_BATCH_MAX`` and ``BSM_BATCH_ITEM_BYTES``.
+        """
+        defaults = cls()
+        return cls(
+            single_flight=os.getenv("BSM_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no"),
+            batch_window=float(os.getenv("BSM_BATCH_WINDOW_MS", defaults.batch_window * 1000)) / 1000,
+            max_batch=int(os.getenv("BSM_BATCH_MAX", defaults.max_batch)),
+            max_item_bytes=int(os.getenv("BSM_BATCH_ITEM_BYTES", defaults.max_item_bytes)),
+        )
+
+    @property
+    def batching(self) -> bool:
+        return self.batch_window > 0 and self.max_batch > 1
+
+
+class CoalescingStats:
+    def __init__(self, max_batch: int) -> None:
+        self.max_batch = max_batch
+        self.calls = 0
+        self.merged = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.full_flushes = 0
+        self._lock = threading.Lock()
+
+    def recordCall(self, merged: bool, operation: str) -> None:
+        COALESCED_CALLS.add(operation=operation, role="follower" if merged else "leader")
+        with self._lock:
+            self.calls += 1
+            self.merged += merged
+
+    def recordBatch(self, size: int, full: bool) -> None:
+        BATCH_SIZE.observe(size)
+        BATCH_FILL.observe(size / self.max_batch)
+        with self._lock:
+            self.batches += 1
+            self.batched_items += size
+            self.full_flushes += full
+
+    @property
+    def fillRate(self) -> Optional[float]:
+        """Mean batch size as a fraction of ``max_batch``."""
+        with self._lock:
+            return self.batched_items / (self.batches * self.max_batch) if self.batches else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        fill = self.fillRate
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "merged": self.merged,
+                "batches": self.batches,
+                "batched_items": self.batched_items,
+                "avg_batch": self.batched_items / self.batches if self.batches else None,
+                "fill_rate": fill,
+                "full_flushes": self.full_flushes,
+                "max_batch": self.max_batch,
+            }
+
+
+class SingleFlight:
+    """Merges identical concurrent calls: the first caller runs, the rest share its outcome.
+
+    Nothing is kept once the call finishes; sync and async calls are merged
+    separately, async ones per event loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._loop_calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns ``(result, merged)``; errors reach every caller."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._loop_calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+        task = loop.create_task(fn())
+        calls[key] = task
+        task.add_done_callback(lambda _: calls.pop(key, None))
+        # Shielded so a cancelled first caller does not cancel the call its followers wait on.
+        return await asyncio.shield(task), False
+
+
+def _shareable(exc: BaseException) -> BaseException:
+    """The error handed to the other callers of a batch the sender could not finish."""
+    if isinstance(exc, Exception):
+        return exc
+    error = RuntimeError(f"Batched call interrupted by {type(exc).__name__}")
+    error.__cause__ = exc
+    return error
+
+
+class _Batch:
+    __slots__ = ("items", "futures", "full", "timer")
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.futures: List[Any] = []
+        self.full = threading.Event()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Groups payloads submitted within ``window`` seconds into one batched call.
+
+    A batch is sent when it holds ``max_batch`` payloads or when the window
+    since its first payload ends, and each caller gets the result at its own
+    position. ``send``/``asend`` take the list of payloads and return the
+    list of results in the same order.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Any]], List[Any]],
+        asend: Callable[[List[Any]], Awaitable[List[Any]]],
+        window: float,
+        max_batch: int,
+        stats: CoalescingStats,
+    ) -> None:
+        self.send = send
+        self.asend = asend
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self._open: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        self._loop_open: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Optional[_Batch]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._flushing: set = set()
+
+    def _settle(self, batch: _Batch, results: Optional[List[Any]], error: Optional[BaseException]) -> None:
+        if error is None and (not isinstance(results, list) or len(results) != len(batch.items)):
+            error = RuntimeError(f"Batched call returned {len(results or [])} results for {len(batch.items)} payloads")
+        self.stats.recordBatch(len(batch.items), len(batch.items) >= self.max_batch)
+        for index, future in enumerate(batch.futures):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[index])
+
+    def submit(self, item: Any) -> Any:
+        future: Future = Future()
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+        if leader:
+            # The first caller waits out the window (or a full batch) and sends for everyone.
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            try:
+                results, error = self.send(list(batch.items)), None
+            except BaseException as exc:
+                # Followers block on their futures, so settle them even on KeyboardInterrupt/SystemExit.
+                self._settle(batch, None, _shareable(exc))
+                if not isinstance(exc, Exception):
+                    raise
+            else:
+                self._settle(batch, results, error)
+        return future.result()
+
+    async def asubmit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slot = self._loop_open.setdefault(loop, [None])
+        batch = slot[0]
+        if batch is None:
+            batch = slot[0] = _Batch()
+            batch.timer = loop.call_later(self.window, self._aclose, slot, batch)
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch:
+            batch.timer.cancel()
+            self._aclose(slot, batch)
+        return await future
+
+    def _aclose(self, slot: List[Optional[_Batch]], batch: _Batch) -> None:
+        if slot[0] is batch:
+            slot[0] = None
+        task = asyncio.ensure_future(self._aflush(batch))
+        # Keep a reference until it finishes; the loop only holds weak ones.
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _aflush(self, batch: _Batch) -> None:
+        try:
+            results, error = await self.asend(list(batch.items)), None
+        except BaseException as exc:
+            # Includes cancellation at loop shutdown: callers must not wait forever.
+            self._settle(batch, None, _shareable(exc))
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            self._settle(batch, results, error)
+
+
+class CoalescingClient:
+    """Merges identical in-flight calls and micro-batches small ``analyzeData`` payloads.
+
+    Wraps a provider or routing client, below the response cache: concurrent
+    calls with the same operation and payload become one request, and
+    ``analyzeData`` payloads of at most ``max_item_bytes`` arriving within
+    ``batch_window`` go out as one ``analyzeBatch`` call of up to
+    ``max_batch`` payloads. Merged callers share one result object.
+    """
+
+    def __init__(self, client: Any, config: Optional[CoalescingConfig] = None) -> None:
+        self.client = client
+        self.config = config or CoalescingConfig()
+        self.stats = CoalescingStats(max(1, self.config.max_batch))
+        self._flights = SingleFlight()
+        self._batcher: Optional[MicroBatcher] = None
+        if self.config.batching and hasattr(client, "analyzeBatchSync"):
+            self._batcher = MicroBatcher(
+                client.analyzeBatchSync, client.analyzeBatch, self.config.batch_window, self.config.max_batch, self.stats
+            )
+
+    @staticmethod
+    def _key(operation: str, payload: Any) -> Tuple[str, int]:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=repr)
+        return hashlib.sha256(f"{operation}\0{canonical}".encode("utf-8")).hexdigest(), len(canonical)
+
+    def _single(self, operation: str, key: str, call: Callable[[], Any]) -> Any:
+        if not self.config.single_flight:
+            return call()
+        result, merged = self._flights.do(key, call)
+        self.stats.recordCall(merged, operation)
+        return result
+
+    async def _asingle(self, operation: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.config.single_flight:
+            return await call()
+        result, merged = await self._flights.ado(key, call)
+        self.stats.recordCall(merged, operation)
+        return result
+
+    def _batchable(self, size: int) -> bool:
+        return self._batcher is not None and size <= self.config.max_item_bytes
+
+    def generateReport(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key, _ = self._key("generateReport", params)
+        return self._single("generateReport", key, lambda: self.client.generateReport(params))
+
+    async def generateReportAsync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key, _ = self._key("generateReport", params)
+        return await self._asingle("generateReport", key, lambda: self.client.generateReportAsync(params))
+
+    def analyzeDataSync(self, data: Any) -> Dict[str, Any]:
+        key, size = self._key("analyzeData", data)
+        if self._batchable(size):
+            return self._single("analyzeData", key, lambda: self._batcher.submit(data))
+        return self._single("analyzeData", key, lambda: self.client.analyzeDataSync(data))
+
+    async def analyzeData(self, data: Any) -> Dict[str, Any]:
+        key, size = self._key("analyzeData", data)
+        if self._batchable(size):
+            return await self._asingle("analyzeData", key, lambda: self._batcher.asubmit(data))
+        return await self._asingle("analyzeData", key, lambda: self.client.analyzeData(data))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats.snapshot(), "batch_window": self.config.batch_window}
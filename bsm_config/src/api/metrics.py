@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from ..instrumentation import counter, histogram
+from .routing import ProviderStats
+
+PROVIDER_CALLS = counter("bsm_provider_calls_total", "Provider calls by outcome")
+PROVIDER_SECONDS = histogram("bsm_provider_call_seconds", "Provider call latency, excluding slot waits")
+
+
+class ClientMetrics(ProviderStats):
+    """Per-provider call metrics recorded by ``ProviderClient``.
+
+    Adds in-flight tracking and a completion rate over the last
+    ``rate_window`` seconds to the rolling latency and error window of
+    ``ProviderStats``. Latencies exclude time spent waiting for a
+    concurrency slot. Calls cancelled by the caller (a hedge that lost, a
+    ``wait_for`` deadline) are counted as ``cancelled``, not as errors.
+    """
+
+    def __init__(self, name: str, window: int = 1000, rate_window: float = 60.0) -> None:
+        super().__init__(name, window=window)
+        self.rate_window = rate_window
+        self.in_flight = 0
+        self.cancelled = 0
+        self.started_at = time.monotonic()
+        self._completions: Deque[float] = deque()
+        self._flight_lock = threading.Lock()
+
+    def _stamp(self) -> None:
+        now = time.monotonic()
+        with self._flight_lock:
+            self._completions.append(now)
+            cutoff = now - self.rate_window
+            while self._completions and self._completions[0] < cutoff:
+                self._completions.popleft()
+
+    def recordSuccess(self, latency: float) -> None:
+        super().recordSuccess(latency)
+        self._stamp()
+
+    def recordError(self, timeout: bool = False) -> None:
+        super().recordError(timeout)
+        self._stamp()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Time one call and record its outcome."""
+        with self._flight_lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            with self._flight_lock:
+                self.cancelled += 1
+            PROVIDER_CALLS.add(provider=self.name, outcome="cancelled")
+            raise
+        except Exception as exc:
+            timeout = isinstance(exc, TimeoutError)
+            self.recordError(timeout=timeout)
+            PROVIDER_CALLS.add(provider=self.name, outcome="timeout" if timeout else "error")
+            raise
+        else:
+            latency = time.perf_counter() - started
+            self.recordSuccess(latency)
+            PROVIDER_CALLS.add(provider=self.name, outcome="ok")
+            PROVIDER_SECONDS.observe(latency, provider=self.name)
+        finally:
+            with self._flight_lock:
+                self.in_flight -= 1
+
+    def throughput(self) -> float:
+        """Completed calls per second over the last ``rate_window`` seconds."""
+        now = time.monotonic()
+        with self._flight_lock:
+            cutoff = now - self.rate_window
+            while self._completions and self._completions[0] < cutoff:
+                self._completions.popleft()
+            completed = len(self._completions)
+        span = min(self.rate_window, max(now - self.started_at, 1e-9))
+        return completed / span
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap = super().snapshot()
+        snap["in_flight"] = self.in_flight
+        snap["cancelled"] = self.cancelled
+        snap["throughput_rps"] = self.throughput()
+        return snap
+
+
+def cacheSnapshot(cache: Optional[Any]) -> Optional[Dict[str, Any]]:
+    """Hit/miss counters of a ``ResponseCache``, or None when caching is off."""
+    if cache is None:
+        return None
+    stats = cache.stats
+    return {
+        "hits": stats.hits,
+        "misses": stats.misses,
+        "stores": stats.stores,
+        "hit_rate": stats.hitRate,
+    }
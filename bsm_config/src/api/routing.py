@@ -0,0 +1,429 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..instrumentation import propagate, span
+
+if TYPE_CHECKING:
+    from .client_factory import APIClientFactory
+
+
+class AllProvidersFailedError(RuntimeError):
+    def __init__(self, errors: List[Tuple[str, BaseException]]) -> None:
+        self.errors = errors
+        detail = "; ".join(f"{name}: {exc!r}" for name, exc in errors) or "no providers configured"
+        super().__init__(f"All providers failed ({detail})")
+
+
+class ProviderTimeoutError(TimeoutError):
+    pass
+
+
+class AttemptAbandonedError(RuntimeError):
+    pass
+
+
+class AttemptToken:
+    """Lets the router take back a sync attempt's concurrency slot.
+
+    A thread-pool attempt cannot be stopped once the provider call is
+    running. When the router abandons it (hedge lost, timeout), ``abandon``
+    releases the provider slot right away instead of when the orphaned call
+    returns; an attempt abandoned before it got a slot does not start.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._release: Optional[Callable[[], None]] = None
+        self.abandoned = False
+
+    def hold(self, release: Callable[[], None]) -> bool:
+        """Register the slot's release; False if the attempt was already abandoned."""
+        with self._lock:
+            if self.abandoned:
+                return False
+            self._release = release
+            return True
+
+    def done(self) -> None:
+        with self._lock:
+            release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def abandon(self) -> None:
+        with self._lock:
+            self.abandoned = True
+            release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+@dataclass(frozen=True)
+class RoutingConfig:
+    timeout: Optional[float] = None
+    hedge: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_default_delay: float = 1.0
+    window: int = 200
+    # A provider with no successes in its window is tried again after this long.
+    probe_after: float = 30.0
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct * len(ordered)) - 1))]
+
+
+class ProviderStats:
+    """Rolling latency and outcome window for one provider.
+
+    Attempts abandoned after a hedge won elsewhere are kept apart: their
+    elapsed time is only a lower bound on the latency, so it can raise the
+    percentile estimates but is never counted as a completed call.
+
+    A provider that is failing (no latency samples, or most attempts in the
+    window failed) is ranked last until ``probe_after`` seconds have passed
+    since its last attempt; it then scores 0 so the next request probes it
+    (half-open), and successes bring it back into the ranking.
+    """
+
+    def __init__(self, name: str, window: int = 200, probe_after: float = 30.0) -> None:
+        self.name = name
+        self.probe_after = probe_after
+        self.last_attempt: Optional[float] = None
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._censored: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.abandoned = 0
+
+    def recordSuccess(self, latency: float) -> None:
+        with self._lock:
+            self.last_attempt = time.monotonic()
+            self.requests += 1
+            self._latencies.append(latency)
+            self._outcomes.append(True)
+
+    def recordError(self, timeout: bool = False) -> None:
+        with self._lock:
+            self.last_attempt = time.monotonic()
+            self.requests += 1
+            self.errors += 1
+            if timeout:
+                self.timeouts += 1
+            self._outcomes.append(False)
+
+    def recordAbandoned(self, elapsed: float) -> None:
+        with self._lock:
+            self.last_attempt = time.monotonic()
+            self.abandoned += 1
+            self._censored.append(elapsed)
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def latencies(self) -> List[float]:
+        """Completed-call latencies in the window, oldest first."""
+        with self._lock:
+            return list(self._latencies)
+
+    def errorRate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            latencies = list(self._latencies)
+            censored = list(self._censored)
+        estimate = _percentile(latencies, pct)
+        if censored:
+            bound = _percentile(latencies + censored, pct)
+            estimate = bound if estimate is None else max(estimate, bound)
+        return estimate
+
+    def score(self) -> float:
+        """Expected cost of routing a request here; lower is better."""
+        with self._lock:
+            attempts = len(self._outcomes) + len(self._censored)
+        if not attempts:
+            return 0.0
+        median = self.percentile(0.5)
+        errors = self.errorRate()
+        if median is None or errors > 0.5:
+            last = self.last_attempt
+            if last is not None and time.monotonic() - last >= self.probe_after:
+                return 0.0
+        if median is None:
+            return math.inf
+        return median / max(0.01, 1.0 - errors)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "abandoned": self.abandoned,
+            "error_rate": self.errorRate(),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class RoutingClient:
+    """Routes each call across the factory's providers.
+
+    Providers are tried in order of their observed cost. A failed or timed-out
+    attempt falls through to the next provider. In hedged mode a duplicate
+    request goes to the next provider once the current one runs past its
+    ``hedge_percentile`` latency, and the first successful answer wins.
+    """
+
+    def __init__(self, factory: "APIClientFactory", config: Optional[RoutingConfig] = None) -> None:
+        self.factory = factory
+        self.config = config or RoutingConfig()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._queued: Optional[threading.BoundedSemaphore] = None
+
+    def stats(self, provider: str) -> ProviderStats:
+        return self.factory.providerStats(provider)
+
+    def rankedProviders(self) -> List[str]:
+        providers = list(self.factory.providers)
+        return sorted(providers, key=lambda p: (self.stats(p).score(), providers.index(p)))
+
+    def _hedgeDelay(self, provider: str) -> Optional[float]:
+        if not self.config.hedge:
+            return None
+        stats = self.stats(provider)
+        if stats.samples >= self.config.hedge_min_samples:
+            return stats.percentile(self.config.hedge_percentile)
+        return self.config.hedge_default_delay
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                workers = max(4, 2 * len(self.factory.providers))
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bsm-routing")
+                self._queued = threading.BoundedSemaphore(2 * workers)
+            return self._executor
+
+    def _submit(self, pool: ThreadPoolExecutor, provider: str, operation: str, payload: Any, token: AttemptToken) -> Future:
+        # ThreadPoolExecutor's queue is unbounded; orphaned attempts from a slow
+        # provider hold threads, so callers wait here rather than pile up.
+        queued = self._queued
+        queued.acquire()
+        try:
+            future = pool.submit(propagate(self._attempt), provider, operation, payload, token)
+        except BaseException:
+            queued.release()
+            raise
+        future.add_done_callback(lambda _: queued.release())
+        return future
+
+    def _attempt(
+        self, provider: str, operation: str, payload: Any, token: Optional[AttemptToken] = None
+    ) -> Tuple[Dict[str, Any], float]:
+        started = time.perf_counter()
+        result = self.factory.getClient(provider)._call(operation, payload, token)
+        return result, time.perf_counter() - started
+
+    async def _aattempt(self, provider: str, operation: str, payload: Any) -> Tuple[Dict[str, Any], float]:
+        started = time.perf_counter()
+        call = self.factory.getClient(provider)._acall(operation, payload)
+        if self.config.timeout is not None:
+            try:
+                result = await asyncio.wait_for(call, self.config.timeout)
+            except asyncio.TimeoutError as exc:
+                raise ProviderTimeoutError(f"{provider} timed out after {self.config.timeout}s") from exc
+        else:
+            result = await call
+        return result, time.perf_counter() - started
+
+    def _record(self, provider: str, latency: Optional[float], error: Optional[BaseException]) -> None:
+        stats = self.stats(provider)
+        if error is None:
+            stats.recordSuccess(latency or 0.0)
+        else:
+            stats.recordError(timeout=isinstance(error, (ProviderTimeoutError, TimeoutError)))
+
+    def _abandon(self, pending: Dict[Any, Tuple[str, float]], tokens: Optional[Dict[Any, AttemptToken]] = None) -> None:
+        # Hedge losers are still running; their elapsed time is a lower bound
+        # on their latency and keeps the ranking honest.
+        now = time.monotonic()
+        for future, (provider, started) in pending.items():
+            future.cancel()
+            if tokens is not None:
+                tokens.pop(future).abandon()
+            self.stats(provider).recordAbandoned(now - started)
+        pending.clear()
+
+    def _run(self, operation: str, payload: Any) -> Dict[str, Any]:
+        order = self.rankedProviders()
+        errors: List[Tuple[str, BaseException]] = []
+
+        if not self.config.hedge and self.config.timeout is None:
+            for provider in order:
+                try:
+                    result, latency = self._attempt(provider, operation, payload)
+                except Exception as exc:
+                    self._record(provider, None, exc)
+                    errors.append((provider, exc))
+                    continue
+                self._record(provider, latency, None)
+                return result
+            raise AllProvidersFailedError(errors)
+
+        pool = self._pool()
+        remaining = list(order)
+        pending: Dict[Future, Tuple[str, float]] = {}
+        tokens: Dict[Future, AttemptToken] = {}
+        hedged = False
+
+        def launch() -> None:
+            provider = remaining.pop(0)
+            token = AttemptToken()
+            future = self._submit(pool, provider, operation, payload, token)
+            pending[future] = (provider, time.monotonic())
+            tokens[future] = token
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            wake_at = math.inf
+            if self.config.timeout is not None:
+                wake_at = min(started + self.config.timeout for _, started in pending.values())
+            hedge_at = math.inf
+            if not hedged and remaining and len(pending) == 1:
+                provider, started = next(iter(pending.values()))
+                delay = self._hedgeDelay(provider)
+                if delay is not None:
+                    hedge_at = started + delay
+            wake_at = min(wake_at, hedge_at)
+            timeout = None if wake_at == math.inf else max(0.0, wake_at - now)
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider, _ = pending.pop(future)
+                tokens.pop(future)
+                try:
+                    result, latency = future.result()
+                except Exception as exc:
+                    self._record(provider, None, exc)
+                    errors.append((provider, exc))
+                    continue
+                self._record(provider, latency, None)
+                self._abandon(pending, tokens)
+                return result
+
+            now = time.monotonic()
+            if self.config.timeout is not None:
+                for future, (provider, started) in list(pending.items()):
+                    if now - started >= self.config.timeout:
+                        del pending[future]
+                        tokens.pop(future).abandon()
+                        exc = ProviderTimeoutError(f"{provider} timed out after {self.config.timeout}s")
+                        self._record(provider, None, exc)
+                        errors.append((provider, exc))
+            if not done and now >= hedge_at:
+                hedged = True
+                launch()
+            elif not pending and remaining:
+                launch()
+
+        raise AllProvidersFailedError(errors)
+
+    async def _arun(self, operation: str, payload: Any) -> Dict[str, Any]:
+        order = self.rankedProviders()
+        errors: List[Tuple[str, BaseException]] = []
+        remaining = list(order)
+        pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+        hedged = False
+
+        def launch() -> None:
+            provider = remaining.pop(0)
+            task = asyncio.ensure_future(self._aattempt(provider, operation, payload))
+            pending[task] = (provider, time.monotonic())
+
+        launch()
+        try:
+            while pending:
+                hedge_at = math.inf
+                if not hedged and remaining and len(pending) == 1:
+                    provider, started = next(iter(pending.values()))
+                    delay = self._hedgeDelay(provider)
+                    if delay is not None:
+                        hedge_at = started + delay
+                timeout = None if hedge_at == math.inf else max(0.0, hedge_at - time.monotonic())
+
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider, _ = pending.pop(task)
+                    try:
+                        result, latency = task.result()
+                    except Exception as exc:
+                        self._record(provider, None, exc)
+                        errors.append((provider, exc))
+                        continue
+                    self._record(provider, latency, None)
+                    self._abandon(pending)
+                    return result
+
+                if not done and time.monotonic() >= hedge_at:
+                    hedged = True
+                    launch()
+                elif not pending and remaining:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise AllProvidersFailedError(errors)
+
+    def generateReport(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with span("route.generateReport"):
+            return self._run("generateReport", params)
+
+    async def generateReportAsync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with span("route.generateReport"):
+            return await self._arun("generateReport", params)
+
+    def analyzeDataSync(self, data: Any) -> Dict[str, Any]:
+        with span("route.analyzeData"):
+            return self._run("analyzeData", data)
+
+    async def analyzeData(self, data: Any) -> Dict[str, Any]:
+        with span("route.analyzeData"):
+            return await self._arun("analyzeData", data)
+
+    def analyzeBatchSync(self, items: List[Any]) -> List[Dict[str, Any]]:
+        with span("route.analyzeBatch", size=len(items)):
+            return self._run("analyzeBatch", items)["results"]
+
+    async def analyzeBatch(self, items: List[Any]) -> List[Dict[str, Any]]:
+        with span("route.analyzeBatch", size=len(items)):
+            return (await self._arun("analyzeBatch", items))["results"]
+
+    def close(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
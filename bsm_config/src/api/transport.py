@@ -0,0 +1,121 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+class TransportError(RuntimeError):
+    pass
+
+
+@dataclass
+class TransportStats:
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    connections_discarded: int = 0
+
+
+@dataclass
+class MockTransport:
+    """Local stand-in for a provider HTTP session.
+
+    Emulates a keep-alive connection pool so pooling and concurrency
+    behaviour can be exercised offline: opening a connection costs
+    ``connect_latency`` seconds, every request costs ``latency`` seconds,
+    and up to ``pool_size`` idle connections are kept for reuse. A non-zero
+    ``failure_rate`` makes that fraction of requests raise ``TransportError``.
+    """
+
+    name: str
+    latency: float = 0.0
+    connect_latency: float = 0.0
+    pool_size: int = 10
+    keep_alive: bool = True
+    failure_rate: float = 0.0
+    stats: TransportStats = field(default_factory=TransportStats)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: List[int] = []
+        self._next_connection = 0
+        self._closed = False
+
+    def _checkout(self) -> tuple:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Transport for {self.name} is closed")
+            self.stats.requests += 1
+            if self._idle:
+                self.stats.connections_reused += 1
+                return self._idle.pop(), False
+            self._next_connection += 1
+            self.stats.connections_opened += 1
+            return self._next_connection, True
+
+    def _checkin(self, connection: int) -> None:
+        with self._lock:
+            if self.keep_alive and not self._closed and len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+            else:
+                self.stats.connections_discarded += 1
+
+    def request(self, operation: str, payload: Any) -> Dict[str, Any]:
+        connection, is_new = self._checkout()
+        try:
+            if is_new and self.connect_latency:
+                time.sleep(self.connect_latency)
+            if self.latency:
+                time.sleep(self.latency)
+            self._maybe_fail()
+            return self._respond(operation, payload)
+        finally:
+            self._checkin(connection)
+
+    async def arequest(self, operation: str, payload: Any) -> Dict[str, Any]:
+        connection, is_new = self._checkout()
+        try:
+            if is_new and self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self._maybe_fail()
+            return self._respond(operation, payload)
+        finally:
+            self._checkin(connection)
+
+    def idle_connections(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self.stats.connections_discarded += len(self._idle)
+            self._idle.clear()
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransportError(f"{self.name} request failed")
+
+    def _respond(self, operation: str, payload: Any) -> Dict[str, Any]:
+        if operation == "generateReport":
+            return {
+                "content": f"# {payload.get('title', 'Report')}\n\nProvider: {self.name}\n",
+                "provider": self.name,
+                "model": payload.get("model"),
+            }
+        if operation == "analyzeData":
+            return {
+                "provider": self.name,
+                "recommendations": [
+                    "Use richer prompts for structured recommendations.",
+                    "Add provider fallback policies for resilience.",
+                ],
+                "raw": payload,
+            }
+        if operation == "analyzeBatch":
+            return {"provider": self.name, "results": [self._respond("analyzeData", item) for item in payload]}
+        raise ValueError(f"Unsupported operation: {operation}")
@@ -0,0 +1,492 @@
+"""Spans, counters and histograms shared by the Python agent stack.
+
+Recording is off unless ``BSM_TELEMETRY=1`` (or ``BSM_TELEMETRY_OUT``) is set
+or ``configure(enabled=True)`` is called. While it is off, ``span()`` returns
+one shared no-op context manager, ``traced`` functions call straight through
+and ``add``/``observe`` return immediately, so instrumented hot paths pay a
+single attribute check.
+
+Recorded data exports as Prometheus text (``toPrometheus``) for the
+``monitoring/`` Prometheus, or as OTLP/JSON (``otlpMetrics``/``otlpTraces``)
+for an OpenTelemetry collector. ``BSM_TELEMETRY_OUT`` names a file written at
+exit (``.json`` for OTLP, anything else Prometheus text), ``serveMetrics``
+exposes ``/metrics`` for long-running processes and ``pushOtlp`` posts to a
+collector's ``/v1/metrics`` and ``/v1/traces``.
+"""
+
+import atexit
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SPAN_HISTOGRAM = "bsm_span_duration_seconds"
+MAX_SPANS = 2048
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labelKey(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _metricName(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _promLabels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{_metricName(k)}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _promNumber(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _otlpValue(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlpAttributes(items: Iterable[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlpValue(value)} for key, value in items]
+
+
+class Counter:
+    """Monotonic sum per label set."""
+
+    def __init__(self, telemetry: "Telemetry", name: str, description: str = "") -> None:
+        self._telemetry = telemetry
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, value: float = 1, **labels: Any) -> None:
+        if not self._telemetry.enabled:
+            return
+        key = _labelKey(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_labelKey(labels), 0)
+
+    def _items(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Fixed-bucket distribution (count, sum, bucket counts) per label set."""
+
+    def __init__(self, telemetry: "Telemetry", name: str, description: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self._telemetry = telemetry
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[LabelKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not self._telemetry.enabled:
+            return
+        key = _labelKey(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(_labelKey(labels))
+            return entry[2] if entry else 0
+
+    def _items(self) -> List[Tuple[LabelKey, List[int], float, int]]:
+        with self._lock:
+            return [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Span:
+    """One timed operation; spans opened inside it become its children."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "_started", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._started = 0.0
+        self._token: Any = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e9
+
+    def setAttribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def recordError(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+
+class _NoopSpan:
+    """What ``span()`` returns while recording is off."""
+
+    __slots__ = ()
+    trace_id = span_id = parent_id = None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def setAttribute(self, key: str, value: Any) -> None:
+        return None
+
+    def recordError(self, error: BaseException) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("_telemetry", "_span")
+
+    def __init__(self, telemetry: "Telemetry", span: Span) -> None:
+        self._telemetry = telemetry
+        self._span = span
+
+    def __enter__(self) -> Span:
+        span = self._span
+        span._token = self._telemetry._current.set(span)
+        span._started = time.perf_counter()
+        return span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        span = self._span
+        elapsed = time.perf_counter() - span._started
+        span.end_ns = span.start_ns + int(elapsed * 1e9)
+        if exc is not None and span.error is None:
+            span.recordError(exc)
+        self._telemetry._current.reset(span._token)
+        self._telemetry._finish(span, elapsed)
+
+
+class Telemetry:
+    """Registry of instruments and finished spans for one process."""
+
+    def __init__(self, enabled: bool = False, service: str = "bsm-agents", max_spans: int = MAX_SPANS) -> None:
+        self.enabled = enabled
+        self.service = service
+        self.out: Optional[str] = None
+        self.started_ns = time.time_ns()
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("bsm_span", default=None)
+        self._span_seconds = self.histogram(SPAN_HISTOGRAM, "Duration of traced operations")
+
+    @classmethod
+    def fromEnv(cls) -> "Telemetry":
+        out = os.getenv("BSM_TELEMETRY_OUT") or None
+        flag = os.getenv("BSM_TELEMETRY", "").strip().lower()
+        telemetry = cls(enabled=flag in ("1", "true", "yes", "on") or bool(out), service=os.getenv("OTEL_SERVICE_NAME", "bsm-agents"))
+        telemetry.out = out
+        return telemetry
+
+    def configure(self, enabled: Optional[bool] = None, out: Optional[str] = None, service: Optional[str] = None) -> None:
+        """Switch recording on or off; ``out`` also enables it and is written at exit."""
+        if out:
+            self.out = out
+            enabled = True if enabled is None else enabled
+        if enabled is not None:
+            self.enabled = enabled
+        if service:
+            self.service = service
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        with self._lock:
+            instrument = self._counters.get(name)
+            if instrument is None:
+                instrument = self._counters[name] = Counter(self, name, description)
+            return instrument
+
+    def histogram(self, name: str, description: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            instrument = self._histograms.get(name)
+            if instrument is None:
+                instrument = self._histograms[name] = Histogram(self, name, description, buckets)
+            return instrument
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """Context manager timing the block as a span; a no-op while disabled."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return _ActiveSpan(self, Span(name, self._current.get(), attributes))
+
+    def currentSpan(self) -> Optional[Span]:
+        return self._current.get() if self.enabled else None
+
+    def traced(self, name: Optional[str] = None, **attributes: Any) -> Callable[[Callable], Callable]:
+        """Decorator running each call of a function or coroutine function in a span."""
+
+        def decorate(fn: Callable) -> Callable:
+            span_name = name or fn.__qualname__
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def traceAsync(*args: Any, **kwargs: Any) -> Any:
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with self.span(span_name, **attributes):
+                        return await fn(*args, **kwargs)
+
+                return traceAsync
+
+            @functools.wraps(fn)
+            def trace(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(span_name, **attributes):
+                    return fn(*args, **kwargs)
+
+            return trace
+
+        return decorate
+
+    def propagate(self, fn: Callable) -> Callable:
+        """``fn`` bound to the caller's current span, for handing to a thread pool."""
+        if not self.enabled:
+            return fn
+        context = contextvars.copy_context()
+
+        @functools.wraps(fn)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            # Each call gets its own copy: one Context cannot be entered by two threads at once.
+            return context.copy().run(fn, *args, **kwargs)
+
+        return run
+
+    def _finish(self, span: Span, elapsed: float) -> None:
+        self._span_seconds.observe(elapsed, span=span.name, status="error" if span.error else "ok")
+        self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def reset(self) -> None:
+        for instrument in list(self._counters.values()) + list(self._histograms.values()):
+            instrument._reset()
+        self._spans.clear()
+        self.started_ns = time.time_ns()
+
+    def toPrometheus(self) -> str:
+        """Every counter and histogram in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for counter in sorted(self._counters.values(), key=lambda c: c.name):
+            items = counter._items()
+            if not items:
+                continue
+            name = _metricName(counter.name)
+            lines += [f"# HELP {name} {counter.description or counter.name}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_promLabels(key)} {_promNumber(value)}" for key, value in sorted(items)]
+        for histogram in sorted(self._histograms.values(), key=lambda h: h.name):
+            items = histogram._items()
+            if not items:
+                continue
+            name = _metricName(histogram.name)
+            lines += [f"# HELP {name} {histogram.description or histogram.name}", f"# TYPE {name} histogram"]
+            for key, counts, total, count in sorted(items, key=lambda item: item[0]):
+                cumulative = 0
+                for bound, bucket in zip(histogram.buckets + (float("inf"),), counts):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{_promLabels(key, [('le', _promNumber(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_promLabels(key)} {_promNumber(total)}")
+                lines.append(f"{name}_count{_promLabels(key)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _resource(self) -> Dict[str, Any]:
+        return {"attributes": _otlpAttributes([("service.name", self.service)])}
+
+    def otlpMetrics(self) -> Dict[str, Any]:
+        """An OTLP/JSON ``ExportMetricsServiceRequest`` with cumulative sums and histograms."""
+        now, start = str(time.time_ns()), str(self.started_ns)
+        metrics: List[Dict[str, Any]] = []
+        for counter in self._counters.values():
+            points = [
+                {"attributes": _otlpAttributes(key), "startTimeUnixNano": start, "timeUnixNano": now, "asDouble": float(value)}
+                for key, value in counter._items()
+            ]
+            if points:
+                metrics.append(
+                    {
+                        "name": counter.name,
+                        "description": counter.description,
+                        "sum": {"dataPoints": points, "aggregationTemporality": 2, "isMonotonic": True},
+                    }
+                )
+        for histogram in self._histograms.values():
+            points = [
+                {
+                    "attributes": _otlpAttributes(key),
+                    "startTimeUnixNano": start,
+                    "timeUnixNano": now,
+                    "count": str(count),
+                    "sum": total,
+                    "bucketCounts": [str(c) for c in counts],
+                    "explicitBounds": list(histogram.buckets),
+                }
+                for key, counts, total, count in histogram._items()
+            ]
+            if points:
+                metrics.append(
+                    {
+                        "name": histogram.name,
+                        "description": histogram.description,
+                        "unit": "s" if histogram.name.endswith("_seconds") else "",
+                        "histogram": {"dataPoints": points, "aggregationTemporality": 2},
+                    }
+                )
+        return {"resourceMetrics": [{"resource": self._resource(), "scopeMetrics": [{"scope": {"name": "bsm"}, "metrics": metrics}]}]}
+
+    def otlpTraces(self) -> Dict[str, Any]:
+        """An OTLP/JSON ``ExportTraceServiceRequest`` with the retained finished spans."""
+        spans = []
+        for span in self.spans():
+            entry: Dict[str, Any] = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlpAttributes(span.attributes.items()),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                entry["parentSpanId"] = span.parent_id
+            spans.append(entry)
+        return {"resourceSpans": [{"resource": self._resource(), "scopeSpans": [{"scope": {"name": "bsm"}, "spans": spans}]}]}
+
+    def toOtlpJson(self) -> str:
+        return json.dumps({**self.otlpMetrics(), **self.otlpTraces()}, ensure_ascii=False)
+
+    def write(self, path: str) -> Path:
+        """Write OTLP/JSON (``.json``) or Prometheus text (any other suffix) atomically."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        text = self.toOtlpJson() if target.suffix == ".json" else self.toPrometheus()
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(target)
+        return target
+
+    def pushOtlp(self, endpoint: str, timeout: float = 10.0) -> None:
+        """POST metrics and traces to an OTLP/HTTP collector (e.g. ``http://collector:4318``)."""
+        from urllib.request import Request, urlopen
+
+        base = endpoint.rstrip("/")
+        for path, payload in (("/v1/metrics", self.otlpMetrics()), ("/v1/traces", self.otlpTraces())):
+            request = Request(
+                base + path, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+            )
+            with urlopen(request, timeout=timeout):
+                pass
+
+    def serveMetrics(self, port: int = 9464, host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+        """Serve ``/metrics`` from a daemon thread; returns the server so it can be shut down."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.toPrometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="bsm-metrics", daemon=True).start()
+        return server
+
+
+TELEMETRY = Telemetry.fromEnv()
+
+configure = TELEMETRY.configure
+counter = TELEMETRY.counter
+histogram = TELEMETRY.histogram
+span = TELEMETRY.span
+currentSpan = TELEMETRY.currentSpan
+traced = TELEMETRY.traced
+propagate = TELEMETRY.propagate
+toPrometheus = TELEMETRY.toPrometheus
+toOtlpJson = TELEMETRY.toOtlpJson
+serveMetrics = TELEMETRY.serveMetrics
+
+
+@atexit.register
+def _writeAtExit() -> None:
+    if TELEMETRY.out:
+        try:
+            TELEMETRY.write(TELEMETRY.out)
+        except OSError:
+            pass
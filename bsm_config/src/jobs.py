@@ -0,0 +1,594 @@
+"""Durable job queue and worker pool for long-running report generation.
+
+Jobs are rows in a SQLite database (``.cache/jobs.sqlite3``, or
+``BSM_JOB_DB``) in WAL mode, so any process on the host can submit, inspect
+or run them. ``JobQueue.submit`` returns as soon as the row is committed. An
+idempotency key makes resubmitting the same work return the existing job.
+Ready jobs are claimed by lane (``high``, then ``normal``, then ``low``),
+oldest first within a lane.
+
+A claimed job is leased to its worker, which renews the lease while the
+handler runs. When a worker crashes or hangs, the lease runs out and the job
+goes back to the queue for the next claim; failed attempts are retried with
+exponential backoff until ``max_attempts``. ``WorkerPool`` runs the workers
+as separate processes, so throughput grows with workers and cores rather
+than contending for one GIL.
+
+``HANDLERS`` maps a job kind to ``module:function``; workers import the
+handler on first use and call it with the job payload. The handler's return
+value, which must be JSON-serializable, is stored as the job result. After
+each job a worker also stores the call metrics of its report clients in the
+``provider_metrics`` table, which ``JobQueue.providerMetrics`` merges.
+"""
+
+import importlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .instrumentation import counter, histogram, span
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DB = Path(".cache") / "jobs.sqlite3"
+LANES = {"high": 0, "normal": 1, "low": 2}
+FINISHED = ("succeeded", "failed", "cancelled")
+HANDLERS = {
+    "generateReport": "bsm_config.src.jobs:runGenerateReport",
+    # Modules under scripts/ are importable by workers, as they are for the benchmark scripts.
+    "weeklyReport": "generate_report_with_ai:run_job",
+}
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+# Worker restarts back off from RESTART_DELAY; a slot whose worker keeps
+# exiting within HEALTHY_AFTER seconds is given up after MAX_RESTARTS tries.
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 60.0
+MAX_RESTARTS = 5
+HEALTHY_AFTER = 30.0
+
+logger = logging.getLogger(__name__)
+
+JOB_ATTEMPTS = counter("bsm_job_attempts_total", "Job attempts by kind and outcome")
+JOB_SECONDS = histogram("bsm_job_seconds", "Handler run time per job attempt")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    lane INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, lane, created_at);
+CREATE TABLE IF NOT EXISTS provider_metrics (
+    worker TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    timeouts INTEGER NOT NULL,
+    cancelled INTEGER NOT NULL,
+    latencies TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (worker, provider)
+);
+"""
+
+_LANE_NAMES = {number: name for name, number in LANES.items()}
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct * len(ordered)) - 1))]
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    kind: str
+    payload: Any
+    lane: str
+    status: str
+    attempts: int
+    max_attempts: int
+    idempotency_key: Optional[str]
+    result: Any
+    error: Optional[str]
+    worker: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @classmethod
+    def fromRow(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            lane=_LANE_NAMES.get(row["lane"], str(row["lane"])),
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            idempotency_key=row["idempotency_key"],
+            result=None if row["result"] is None else json.loads(row["result"]),
+            error=row["error"],
+            worker=row["worker"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+        )
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from submit to completion, or to now while unfinished."""
+        return (self.finished_at or time.time()) - self.created_at
+
+
+class JobQueue:
+    """The job table; safe to use from any thread or process on the host."""
+
+    def __init__(self, path: Optional[os.PathLike] = None, timeout: float = 30.0) -> None:
+        self.path = Path(path or os.getenv("BSM_JOB_DB") or ROOT / DEFAULT_DB)
+        self.timeout = timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads or forks: one per thread and process.
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _row(self, db: sqlite3.Connection, job_id: str) -> sqlite3.Row:
+        return db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def submit(
+        self,
+        kind: str,
+        payload: Any,
+        lane: str = "normal",
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = 3,
+    ) -> Job:
+        """Queue a job and return it without waiting for it to run.
+
+        When ``idempotency_key`` matches a queued, running or succeeded job,
+        that job is returned instead; a failed or cancelled one is queued again.
+        """
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane} (expected one of {', '.join(LANES)})")
+        encoded = json.dumps(payload, ensure_ascii=False)
+        now = time.time()
+        with self._transaction() as db:
+            if idempotency_key is not None:
+                row = db.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None:
+                    if row["status"] in ("failed", "cancelled"):
+                        db.execute(
+                            """UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, result = NULL,
+                                   error = NULL, worker = NULL, lease_until = NULL, started_at = NULL, finished_at = NULL
+                               WHERE id = ?""",
+                            (now, row["id"]),
+                        )
+                        row = self._row(db, row["id"])
+                    return Job.fromRow(row)
+            job_id = uuid.uuid4().hex
+            db.execute(
+                """INSERT INTO jobs (id, kind, payload, lane, status, idempotency_key, max_attempts, run_after, created_at)
+                   VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)""",
+                (job_id, kind, encoded, LANES[lane], idempotency_key, max(1, max_attempts), now, now),
+            )
+            return Job.fromRow(self._row(db, job_id))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._row(self._db(), job_id)
+        return Job.fromRow(row) if row is not None else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 0.25) -> Job:
+        """Block until the job finishes; raises ``TimeoutError`` after ``timeout`` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job.done:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} still {job.status} after {timeout}s")
+            time.sleep(poll)
+
+    def recent(self, status: Optional[str] = None, limit: int = 20) -> List[Job]:
+        if status is None:
+            rows = self._db().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        else:
+            rows = self._db().execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit))
+        return [Job.fromRow(row) for row in rows.fetchall()]
+
+    def runSeconds(self, kind: str, pct: float = 0.95, limit: int = 50) -> Optional[float]:
+        """``pct`` percentile of start-to-finish time over the last ``limit`` succeeded ``kind`` jobs."""
+        rows = self._db().execute(
+            "SELECT finished_at - started_at AS seconds FROM jobs WHERE kind = ? AND status = 'succeeded'"
+            " AND started_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?",
+            (kind, limit),
+        ).fetchall()
+        return _percentile([row["seconds"] for row in rows], pct)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status, and queued jobs by lane."""
+        statuses: Dict[str, int] = {}
+        lanes = {name: 0 for name in LANES}
+        for row in self._db().execute("SELECT status, lane, COUNT(*) AS n FROM jobs GROUP BY status, lane"):
+            statuses[row["status"]] = statuses.get(row["status"], 0) + row["n"]
+            if row["status"] == "queued":
+                lanes[_LANE_NAMES.get(row["lane"], str(row["lane"]))] = row["n"]
+        return {"statuses": statuses, "queued_by_lane": lanes}
+
+    def recordProviderMetrics(self, worker: str, providers: List[Dict[str, Any]]) -> None:
+        """Store ``worker``'s cumulative provider call metrics, replacing its previous ones."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                """INSERT OR REPLACE INTO provider_metrics
+                   (worker, provider, requests, errors, timeouts, cancelled, latencies, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (worker, p["provider"], p["requests"], p["errors"], p["timeouts"], p["cancelled"],
+                     json.dumps(p["latencies"]), now)
+                    for p in providers
+                ],
+            )
+
+    def providerMetrics(self, since: float = 3600.0) -> List[Dict[str, Any]]:
+        """Provider call metrics merged over workers that reported in the last ``since`` seconds."""
+        merged: Dict[str, Dict[str, Any]] = {}
+        rows = self._db().execute(
+            "SELECT * FROM provider_metrics WHERE updated_at >= ? ORDER BY provider", (time.time() - since,)
+        )
+        for row in rows:
+            entry = merged.setdefault(
+                row["provider"],
+                {"provider": row["provider"], "workers": 0, "requests": 0, "errors": 0, "timeouts": 0,
+                 "cancelled": 0, "latencies": []},
+            )
+            entry["workers"] += 1
+            for field in ("requests", "errors", "timeouts", "cancelled"):
+                entry[field] += row[field]
+            entry["latencies"].extend(json.loads(row["latencies"]))
+        result = []
+        for entry in merged.values():
+            latencies = entry.pop("latencies")
+            entry["error_rate"] = entry["errors"] / entry["requests"] if entry["requests"] else 0.0
+            for name, pct in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                entry[name] = _percentile(latencies, pct)
+            result.append(entry)
+        return result
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started; running jobs are left to finish."""
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'", (time.time(), job_id)
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, worker: str, lease: float = 30.0) -> Optional[Job]:
+        """Lease the next ready job to ``worker`` for ``lease`` seconds.
+
+        Running jobs whose lease has expired are first put back in the queue,
+        or failed once they have used up ``max_attempts``.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                """UPDATE jobs SET
+                       status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                       finished_at = CASE WHEN attempts >= max_attempts THEN ? END,
+                       error = 'lease expired on worker ' || worker,
+                       worker = NULL, lease_until = NULL
+                   WHERE status = 'running' AND lease_until < ?""",
+                (now, now),
+            )
+            rows = db.execute(
+                """UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?,
+                       started_at = COALESCE(started_at, ?)
+                   WHERE id = (
+                       SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY lane, created_at LIMIT 1
+                   )
+                   RETURNING *""",
+                (worker, now + lease, now, now),
+            ).fetchall()
+        return Job.fromRow(rows[0]) if rows else None
+
+    def renew(self, job_id: str, worker: str, lease: float = 30.0) -> bool:
+        """Extend ``worker``'s lease; False once the job is no longer its to run."""
+        cursor = self._db().execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease, job_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str, result: Any) -> bool:
+        """Store the result; False when the lease was lost and the job belongs to another attempt."""
+        cursor = self._db().execute(
+            """UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, finished_at = ?, lease_until = NULL
+               WHERE id = ? AND worker = ? AND status = 'running'""",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker: str, error: str, retry: bool = True) -> str:
+        """Record a failed attempt; returns the new status (``queued`` when it will be retried)."""
+        now = time.time()
+        rows = self._db().execute(
+            """UPDATE jobs SET
+                   status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                   run_after = ? + MIN(?, ? * (1 << (attempts - 1))),
+                   finished_at = CASE WHEN ? AND attempts < max_attempts THEN NULL ELSE ? END,
+                   error = ?, worker = NULL, lease_until = NULL
+               WHERE id = ? AND worker = ? AND status = 'running'
+               RETURNING status""",
+            (retry, now, MAX_RETRY_DELAY, RETRY_DELAY, retry, now, error, job_id, worker),
+        ).fetchall()
+        return rows[0]["status"] if rows else "lost"
+
+
+def resolveHandler(kind: str) -> Callable[[Any], Any]:
+    module_name, _, function = HANDLERS[kind].partition(":")
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    if str(ROOT / "scripts") not in sys.path:
+        sys.path.append(str(ROOT / "scripts"))
+    return getattr(importlib.import_module(module_name), function)
+
+
+def runJob(queue: JobQueue, job: Job, worker: str, lease: float, handlers: Dict[str, Callable[[Any], Any]]) -> str:
+    """Run one claimed job, renewing its lease meanwhile; returns the job's new status."""
+    finished = threading.Event()
+
+    def renew() -> None:
+        while not finished.wait(lease / 3):
+            if not queue.renew(job.id, worker, lease):
+                return
+
+    renewer = threading.Thread(target=renew, name=f"bsm-job-lease-{job.id[:8]}", daemon=True)
+    renewer.start()
+    started = time.perf_counter()
+    try:
+        with span("job.run", kind=job.kind, job=job.id, attempt=job.attempts):
+            handler = handlers.get(job.kind)
+            if handler is None:
+                handler = handlers[job.kind] = resolveHandler(job.kind)
+            result = handler(job.payload)
+        status = "succeeded" if queue.complete(job.id, worker, result) else "lost"
+    except Exception as exc:
+        status = queue.fail(job.id, worker, f"{type(exc).__name__}: {exc}")
+    finally:
+        finished.set()
+        renewer.join()
+    JOB_ATTEMPTS.add(kind=job.kind, status=status)
+    JOB_SECONDS.observe(time.perf_counter() - started, kind=job.kind)
+    metrics = workerProviderMetrics()
+    if metrics:
+        try:
+            queue.recordProviderMetrics(worker, metrics)
+        except sqlite3.Error:
+            logger.warning("Could not record provider metrics for worker %s", worker, exc_info=True)
+    return status
+
+
+def runWorker(
+    path: Optional[str], worker: str, stop: Any, lease: float = 30.0, poll: float = 0.5, max_jobs: Optional[int] = None
+) -> int:
+    """Claim and run jobs until ``stop`` (an ``Event``) is set; returns the number run."""
+    queue = JobQueue(path)
+    handlers: Dict[str, Callable[[Any], Any]] = {}
+    count = 0
+    while not stop.is_set() and (max_jobs is None or count < max_jobs):
+        job = queue.claim(worker, lease)
+        if job is None:
+            stop.wait(poll)
+            continue
+        runJob(queue, job, worker, lease, handlers)
+        count += 1
+    return count
+
+
+class _StopFlag:
+    """Stop signal shared with worker processes.
+
+    ``multiprocessing.Event`` holds a lock while waiting, so a worker killed
+    inside ``wait()`` leaves ``set()`` blocked forever; a lock-free shared
+    byte cannot be wedged that way.
+    """
+
+    def __init__(self, context: Any) -> None:
+        self._flag = context.RawValue("b", 0)
+
+    def set(self) -> None:
+        self._flag.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._flag.value)
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.is_set() and time.monotonic() < deadline:
+            time.sleep(min(0.1, max(0.0, deadline - time.monotonic())))
+        return self.is_set()
+
+
+class WorkerPool:
+    """``workers`` processes running ``runWorker`` against one queue.
+
+    Processes are started with ``spawn``, so a pool can be started from a
+    threaded host such as the Streamlit dashboard. A supervisor thread
+    replaces workers that exit, with backoff; the jobs they held are picked
+    up again once their lease expires. A worker that keeps dying at startup
+    (a broken import, say) is given up after ``MAX_RESTARTS`` tries.
+    """
+
+    def __init__(
+        self, path: Optional[os.PathLike] = None, workers: Optional[int] = None, lease: float = 30.0, poll: float = 0.5
+    ) -> None:
+        # Creating the queue here makes the schema exist before any worker starts.
+        self.path = str(JobQueue(path).path)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.lease = lease
+        self.poll = poll
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = _StopFlag(self._context)
+        self._processes: List[Any] = []
+        self._started: List[float] = []
+        self._failures: List[int] = []
+        self._restart_at: List[Optional[float]] = []
+        self._supervisor: Optional[threading.Thread] = None
+
+    def _spawn(self, index: int) -> Any:
+        name = f"{os.getpid()}-{index}-{uuid.uuid4().hex[:6]}"
+        process = self._context.Process(
+            target=runWorker,
+            args=(self.path, name, self._stop, self.lease, self.poll),
+            name=f"bsm-job-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        while not self._stop.wait(1.0):
+            now = time.monotonic()
+            for index, process in enumerate(self._processes):
+                if process is None or process.is_alive() or self._stop.is_set():
+                    continue
+                if self._restart_at[index] is None:
+                    if now - self._started[index] >= HEALTHY_AFTER:
+                        self._failures[index] = 0
+                    self._failures[index] += 1
+                    if self._failures[index] > MAX_RESTARTS:
+                        logger.error(
+                            "Job worker %d exited with code %s after %d restarts; giving up on it",
+                            index, process.exitcode, MAX_RESTARTS,
+                        )
+                        self._processes[index] = None
+                        continue
+                    delay = min(MAX_RESTART_DELAY, RESTART_DELAY * 2 ** (self._failures[index] - 1))
+                    logger.warning("Job worker %d exited with code %s; restarting in %.0fs", index, process.exitcode, delay)
+                    self._restart_at[index] = now + delay
+                if now >= self._restart_at[index]:
+                    self._restart_at[index] = None
+                    self._started[index] = now
+                    self._processes[index] = self._spawn(index)
+
+    def start(self) -> "WorkerPool":
+        if self._processes:
+            return self
+        self._started = [time.monotonic()] * self.workers
+        self._failures = [0] * self.workers
+        self._restart_at = [None] * self.workers
+        self._processes = [self._spawn(index) for index in range(self.workers)]
+        self._supervisor = threading.Thread(target=self._supervise, name="bsm-job-supervisor", daemon=True)
+        self._supervisor.start()
+        return self
+
+    def alive(self) -> int:
+        return sum(process is not None and process.is_alive() for process in self._processes)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Let running jobs finish (up to ``timeout``), then terminate what is left."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        # The supervisor is done before the process list is read, so it cannot respawn into it.
+        if self._supervisor is not None:
+            self._supervisor.join()
+        processes = [process for process in self._processes if process is not None]
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+_factories: Dict[Tuple[str, ...], Any] = {}
+
+
+def workerProviderMetrics() -> List[Dict[str, Any]]:
+    """Cumulative call metrics of this process's ``generateReport`` clients, one entry per provider."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for factory in list(_factories.values()):
+        for snapshot in factory.metricsSnapshot()["providers"]:
+            name = snapshot["provider"]
+            entry = merged.setdefault(
+                name, {"provider": name, "requests": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "latencies": []}
+            )
+            for field in ("requests", "errors", "timeouts", "cancelled"):
+                entry[field] += snapshot[field]
+            entry["latencies"].extend(factory.getClient(name).metrics.latencies())
+    return list(merged.values())
+
+
+def runGenerateReport(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Handler for ``generateReport`` jobs: ``{"providers": [...], "params": {...}}``.
+
+    Each worker process keeps one client factory per provider set, so pooled
+    connections, routing stats and the response cache carry over between jobs.
+    """
+    from .api.cache import ResponseCache
+    from .api.client_factory import APIClientFactory
+
+    providers = tuple(payload.get("providers") or ())
+    factory = _factories.get(providers)
+    if factory is None:
+        factory = _factories[providers] = APIClientFactory.fromProviders(list(providers), cache=ResponseCache.fromEnv())
+    return factory.getRoutingClient().generateReport(payload["params"])
@@ -0,0 +1,382 @@
+"""Offline passage retrieval over ``data/knowledge``.
+
+Documents listed in ``data/knowledge/index.json`` are split into passages
+(by heading, then by paragraph up to ``max_words``) and indexed two ways:
+
+- an inverted index scored with BM25, persisted as JSON;
+- optionally, dense vectors in a NumPy matrix (``vectors.npz``). The default
+  embedder hashes words and word pairs into a fixed number of dimensions, so it
+  needs no model download; any ``texts -> matrix`` callable can replace it.
+
+``refresh`` re-reads only documents whose mtime/size (then hash) changed and
+re-embeds only passages whose text is new, so keeping the index current is
+cheap. ``search`` returns the top-k passages; ``contextFor`` renders them for a
+prompt's ``{{knowledge}}`` slot instead of whole documents.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_INDEX_DIR = Path(".cache") / "knowledge"
+FORMAT_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+_ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "ة": "ه"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens; Arabic diacritics and letter variants are folded."""
+    text = _ARABIC_DIACRITICS.sub("", text.lower()).translate(_ARABIC_FOLD)
+    return _WORD.findall(text)
+
+
+def chunkDocument(text: str, max_words: int = 120, overlap: int = 20) -> List[Tuple[str, str]]:
+    """``(heading, passage)`` pairs; paragraphs are packed up to ``max_words``.
+
+    A paragraph longer than ``max_words`` is cut into windows that overlap by
+    ``overlap`` words so no sentence is only ever seen half.
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    paragraph: List[str] = []
+
+    def endParagraph() -> None:
+        if paragraph:
+            sections[-1][1].append(" ".join(paragraph))
+            paragraph.clear()
+
+    for line in text.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            endParagraph()
+            sections.append((heading.group(1).strip(), []))
+        elif line.strip():
+            paragraph.append(line.strip())
+        else:
+            endParagraph()
+    endParagraph()
+
+    chunks: List[Tuple[str, str]] = []
+    step = max(1, max_words - overlap)
+    for heading, paragraphs in sections:
+        current: List[str] = []
+        for para in paragraphs:
+            words = para.split()
+            if len(words) > max_words:
+                if current:
+                    chunks.append((heading, " ".join(current)))
+                    current = []
+                for start in range(0, len(words) - overlap, step):
+                    chunks.append((heading, " ".join(words[start : start + max_words])))
+                continue
+            if current and len(current) + len(words) > max_words:
+                chunks.append((heading, " ".join(current)))
+                current = []
+            current.extend(words)
+        if current:
+            chunks.append((heading, " ".join(current)))
+        elif heading and not paragraphs:
+            chunks.append((heading, heading))
+    return chunks
+
+
+class HashingEmbedder:
+    """Dense vectors without a model: hashed word and word-pair counts.
+
+    Captures lexical overlap (including word order via pairs) rather than
+    meaning; swap in a real embedding function for semantic matching.
+    """
+
+    def __init__(self, dims: int = 512) -> None:
+        self.dims = dims
+        self.name = f"hashing-{dims}"
+
+    def __call__(self, texts: List[str]) -> Any:
+        import numpy as np
+
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, digest % self.dims] += 1.0 if digest & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+@dataclass
+class Passage:
+    chunk_id: str
+    document: str
+    heading: str
+    text: str
+    score: float
+
+
+def _hasNumpy() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class KnowledgeIndex:
+    """BM25 (and optional dense) index over the knowledge documents."""
+
+    def __init__(
+        self,
+        root: Optional[os.PathLike] = None,
+        index_dir: Optional[os.PathLike] = None,
+        max_words: int = 120,
+        overlap: int = 20,
+        dense: Optional[bool] = None,
+        embedder: Optional[Callable[[List[str]], Any]] = None,
+    ) -> None:
+        self.root = Path(root) if root else ROOT
+        self.index_dir = Path(index_dir) if index_dir else self.root / DEFAULT_INDEX_DIR
+        self.max_words = max_words
+        self.overlap = overlap
+        self.dense = _hasNumpy() if dense is None else dense
+        self.embedder = embedder or (HashingEmbedder() if self.dense else None)
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.chunks: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._vectors: Dict[str, Any] = {}
+        self._vectors_dirty = False
+        self._matrix: Any = None
+        self._matrix_ids: List[str] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {
+            "format": FORMAT_VERSION,
+            "max_words": self.max_words,
+            "overlap": self.overlap,
+            "embedder": getattr(self.embedder, "name", None) if self.dense else None,
+        }
+
+    # -- persistence -----------------------------------------------------
+
+    def _load(self) -> None:
+        path = self.index_dir / "index.json"
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("params") != self.params:
+            return
+        self.documents = data["documents"]
+        self.chunks = data["chunks"]
+        self.postings = data["postings"]
+        self._total_length = sum(chunk["length"] for chunk in self.chunks.values())
+        if self.dense:
+            try:
+                import numpy as np
+
+                with np.load(self.index_dir / "vectors.npz") as saved:
+                    self._vectors = dict(zip(saved["keys"].tolist(), saved["matrix"]))
+            except (OSError, ValueError, KeyError):
+                self._vectors = {}
+
+    def save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        payload = {"params": self.params, "documents": self.documents, "chunks": self.chunks, "postings": self.postings}
+        tmp = self.index_dir / f"index.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.index_dir / "index.json")
+        if self.dense and self._vectors and self._vectors_dirty:
+            import numpy as np
+
+            live = {chunk["sha"] for chunk in self.chunks.values()}
+            keys = sorted(k for k in self._vectors if k in live)
+            tmp = self.index_dir / f"vectors.{os.getpid()}.tmp.npz"
+            np.savez(tmp, keys=np.array(keys), matrix=np.stack([self._vectors[k] for k in keys]))
+            tmp.replace(self.index_dir / "vectors.npz")
+            self._vectors_dirty = False
+
+    # -- incremental updates ----------------------------------------------
+
+    def sourcePaths(self) -> List[Path]:
+        base = self.root / "data" / "knowledge"
+        try:
+            listed = json.loads((base / "index.json").read_text(encoding="utf-8")).get("documents", [])
+        except (OSError, ValueError):
+            listed = sorted(p.name for p in base.glob("*.md"))
+        return [base / name for name in listed if (base / name).is_file()]
+
+    def _removeDocument(self, name: str) -> None:
+        for chunk_id in self.documents.pop(name, {}).get("chunks", []):
+            chunk = self.chunks.pop(chunk_id)
+            self._total_length -= chunk["length"]
+            for term in set(tokenize(f"{chunk['heading']} {chunk['text']}")):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def _addDocument(self, name: str, text: str, stat: List[Any]) -> None:
+        chunk_ids = []
+        for n, (heading, passage) in enumerate(chunkDocument(text, self.max_words, self.overlap)):
+            chunk_id = f"{name}#{n}"
+            counts: Dict[str, int] = {}
+            for term in tokenize(f"{heading} {passage}"):
+                counts[term] = counts.get(term, 0) + 1
+            length = sum(counts.values())
+            self.chunks[chunk_id] = {
+                "document": name,
+                "heading": heading,
+                "text": passage,
+                "length": length,
+                "sha": hashlib.sha1(f"{heading}\n{passage}".encode("utf-8")).hexdigest(),
+            }
+            self._total_length += length
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[chunk_id] = tf
+            chunk_ids.append(chunk_id)
+        self.documents[name] = {"stat": stat, "chunks": chunk_ids}
+
+    def refresh(self, save: bool = True) -> Dict[str, List[str]]:
+        """Bring the index in line with the documents on disk.
+
+        Returns the document names that were ``added``, ``updated`` and
+        ``removed``; unchanged documents are not re-read.
+        """
+        changes: Dict[str, List[str]] = {"added": [], "updated": [], "removed": []}
+        touched = False
+        with self._lock:
+            seen = set()
+            for path in self.sourcePaths():
+                name = path.relative_to(self.root / "data" / "knowledge").as_posix()
+                seen.add(name)
+                st = path.stat()
+                known = self.documents.get(name)
+                if known and known["stat"][:2] == [st.st_mtime_ns, st.st_size]:
+                    continue
+                raw = path.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                stat = [st.st_mtime_ns, st.st_size, digest]
+                if known and known["stat"][2] == digest:
+                    known["stat"] = stat
+                    touched = True
+                    continue
+                self._removeDocument(name)
+                self._addDocument(name, raw.decode("utf-8"), stat)
+                changes["updated" if known else "added"].append(name)
+            for name in [n for n in self.documents if n not in seen]:
+                self._removeDocument(name)
+                changes["removed"].append(name)
+            if self.dense:
+                self._embedMissing()
+            self._matrix = None
+        if save and (touched or any(changes.values()) or not (self.index_dir / "index.json").exists()):
+            self.save()
+        return changes
+
+    def _embedMissing(self) -> None:
+        missing = {chunk["sha"]: f"{chunk['heading']}\n{chunk['text']}" for chunk in self.chunks.values()}
+        missing = {sha: text for sha, text in missing.items() if sha not in self._vectors}
+        if missing:
+            shas = list(missing)
+            for sha, vector in zip(shas, self.embedder([missing[s] for s in shas])):
+                self._vectors[sha] = vector
+            self._vectors_dirty = True
+
+    # -- retrieval ---------------------------------------------------------
+
+    def _bm25(self, terms: List[str]) -> Dict[str, float]:
+        count = len(self.chunks)
+        if not count:
+            return {}
+        avg_length = self._total_length / count
+        scores: Dict[str, float] = {}
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.chunks[chunk_id]["length"] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    def _denseScores(self, query: str, limit: int) -> Dict[str, float]:
+        import numpy as np
+
+        if self._matrix is None:
+            self._embedMissing()
+            self._matrix_ids = list(self.chunks)
+            if not self._matrix_ids:
+                return {}
+            self._matrix = np.stack([self._vectors[self.chunks[c]["sha"]] for c in self._matrix_ids])
+        if not self._matrix_ids:
+            return {}
+        similarity = self._matrix @ self.embedder([query])[0]
+        top = np.argpartition(-similarity, min(limit, len(similarity) - 1))[:limit]
+        return {self._matrix_ids[i]: float(similarity[i]) for i in top if similarity[i] > 0}
+
+    def search(self, query: str, k: int = 5, dense_weight: float = 0.3) -> List[Passage]:
+        """Top ``k`` passages for ``query``.
+
+        Scores are BM25 normalised to the best hit; with dense vectors the
+        cosine similarity is blended in with ``dense_weight``.
+        """
+        scores = self._bm25(tokenize(query))
+        if self.dense and dense_weight > 0 and self.chunks:
+            best = max(scores.values(), default=0.0) or 1.0
+            blended = {c: (1 - dense_weight) * s / best for c, s in scores.items()}
+            for chunk_id, similarity in self._denseScores(query, max(k * 4, 20)).items():
+                blended[chunk_id] = blended.get(chunk_id, 0.0) + dense_weight * similarity
+            scores = blended
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        return [
+            Passage(chunk_id, self.chunks[chunk_id]["document"], self.chunks[chunk_id]["heading"], self.chunks[chunk_id]["text"], score)
+            for chunk_id, score in top
+            if score > 0
+        ]
+
+    def contextFor(self, query: str, k: int = 5, max_chars: int = 4000) -> str:
+        """The best passages for ``query`` as prompt-ready text, within ``max_chars``."""
+        parts: List[str] = []
+        used = 0
+        for passage in self.search(query, k):
+            source = f"{passage.document} › {passage.heading}" if passage.heading else passage.document
+            block = f"[{source}]\n{passage.text}"
+            if used + len(block) > max_chars:
+                break
+            parts.append(block)
+            used += len(block) + 2
+        return "\n\n".join(parts)
+
+
+_shared: Dict[Tuple[str, str], KnowledgeIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def loadKnowledgeIndex(root: Optional[os.PathLike] = None, index_dir: Optional[os.PathLike] = None) -> KnowledgeIndex:
+    """The process-wide index for ``root``, refreshed against the documents on disk."""
+    key = (str(Path(root) if root else ROOT), str(index_dir or ""))
+    with _shared_lock:
+        index = _shared.get(key)
+        if index is None:
+            index = _shared[key] = KnowledgeIndex(root, index_dir)
+    index.refresh()
+    return index
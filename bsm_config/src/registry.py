@@ -0,0 +1,364 @@
+"""Compiled, indexed view of every agent definition in the repository.
+
+Agent definitions live in ``data/agents/*.yaml`` (listed in
+``data/agents/index.json``), ``agents/registry.yaml`` and
+``agents/*.agent.md``. ``loadRegistry`` merges them by agent id into a
+snapshot file with lookup indexes and reuses that snapshot until a source
+changes, so consumers pay for a few ``stat`` calls instead of YAML parsing.
+
+Snapshot layout: an 8-byte magic, the length of a JSON header (sources,
+indexes, per-agent summaries and record offsets), the header, then each full
+agent record as JSON. The file is memory-mapped and records are decoded on
+first access.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_SNAPSHOT = Path(".cache") / "agent-registry.snapshot"
+MAGIC = b"BSMREG1\n"
+HEADER = struct.Struct("<Q")
+FORMAT_VERSION = 1
+INDEXED_FIELDS = ("category", "context", "provider", "risk", "selectable", "status", "source")
+SUMMARY_FIELDS = ("name", "category", "modelProvider", "status")
+
+
+def sourcePaths(root: Path) -> List[Path]:
+    """Every file the registry is built from, in merge order."""
+    data = root / "data" / "agents"
+    paths: List[Path] = []
+    index = data / "index.json"
+    if index.exists():
+        paths.append(index)
+        listed = json.loads(index.read_text(encoding="utf-8")).get("agents", [])
+        paths.extend(data / name for name in listed if (data / name).is_file())
+    if (root / "agents" / "registry.yaml").is_file():
+        paths.append(root / "agents" / "registry.yaml")
+    paths.extend(sorted((root / "agents").glob("*.agent.md")))
+    return paths
+
+
+def _fileHash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _stat(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _mergeInto(target: Dict[str, Any], overlay: Dict[str, Any]) -> None:
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _mergeInto(target[key], value)
+        else:
+            target[key] = value
+
+
+def _frontMatter(text: str) -> Dict[str, Any]:
+    import yaml
+
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+    loaded = yaml.load(text[3:end], Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    return loaded if isinstance(loaded, dict) else {}
+
+
+def compileAgents(root: Path, paths: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
+    """Merge every source into one record per agent id.
+
+    ``registry.yaml`` entries overlay the per-agent YAML files field by field;
+    ``*.agent.md`` workflows are keyed by their file name. Each record lists
+    the files it came from under ``sources``.
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    agents: Dict[str, Dict[str, Any]] = {}
+
+    def add(agent_id: str, fields: Dict[str, Any], path: Path) -> None:
+        record = agents.setdefault(agent_id, {"id": agent_id, "sources": []})
+        _mergeInto(record, {k: v for k, v in fields.items() if k != "sources"})
+        record["sources"].append(path.relative_to(root).as_posix())
+
+    for path in paths:
+        if path.name == "index.json":
+            continue
+        text = path.read_text(encoding="utf-8")
+        if path.name.endswith(".agent.md"):
+            add(path.name[: -len(".agent.md")], {"kind": "workflow", **_frontMatter(text)}, path)
+        elif path.name == "registry.yaml":
+            for entry in (yaml.load(text, Loader=loader) or {}).get("agents") or []:
+                if isinstance(entry, dict) and entry.get("id"):
+                    add(str(entry["id"]), entry, path)
+        else:
+            entry = yaml.load(text, Loader=loader) or {}
+            if isinstance(entry, dict):
+                add(str(entry.get("id") or path.stem), entry, path)
+    return agents
+
+
+def _sourceKind(source: str) -> str:
+    if source.endswith(".agent.md"):
+        return "workflow"
+    return "registry" if source.endswith("registry.yaml") else "data"
+
+
+def _facets(record: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Index keys of one agent, per indexed field."""
+    expose = record.get("expose") or {}
+    selectable = bool(expose.get("selectable")) and not expose.get("internal_only")
+    return {
+        "category": [str(record["category"])] if record.get("category") else [],
+        "context": [str(c) for c in ((record.get("contexts") or {}).get("allowed") or [])],
+        "provider": [str(record["modelProvider"])] if record.get("modelProvider") else [],
+        "risk": [str((record.get("risk") or {}).get("level"))] if (record.get("risk") or {}).get("level") else [],
+        "selectable": ["true" if selectable else "false"],
+        "status": [str(record.get("status", "active"))],
+        "source": sorted({_sourceKind(s) for s in record["sources"]}),
+    }
+
+
+def buildSnapshot(root: Path, path: Path) -> None:
+    """Compile the sources under ``root`` into the snapshot file at ``path``."""
+    paths = sourcePaths(root)
+    agents = compileAgents(root, paths)
+    indexes: Dict[str, Dict[str, List[str]]] = {name: {} for name in INDEXED_FIELDS}
+    summaries: Dict[str, Dict[str, Any]] = {}
+    offsets: Dict[str, Tuple[int, int]] = {}
+    blob = bytearray()
+    for agent_id in sorted(agents):
+        record = agents[agent_id]
+        facets = _facets(record)
+        for name, keys in facets.items():
+            for key in keys:
+                indexes[name].setdefault(key, []).append(agent_id)
+        summaries[agent_id] = {field: record.get(field) for field in SUMMARY_FIELDS}
+        summaries[agent_id].update(contexts=facets["context"], risk=(facets["risk"] or [None])[0])
+        summaries[agent_id]["selectable"] = facets["selectable"] == ["true"]
+        encoded = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        offsets[agent_id] = (len(blob), len(encoded))
+        blob += encoded
+    header = {
+        "format": FORMAT_VERSION,
+        "builder": _builderHash(),
+        "sources": {p.relative_to(root).as_posix(): [*_stat(p), _fileHash(p)] for p in paths},
+        "indexes": indexes,
+        "summaries": summaries,
+        "records": offsets,
+    }
+    _writeSnapshot(path, header, blob)
+
+
+def _writeSnapshot(path: Path, header: Dict[str, Any], blob: bytes) -> int:
+    """Atomically write a snapshot; returns the offset where records start."""
+    encoded_header = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(HEADER.pack(len(encoded_header)))
+        handle.write(encoded_header)
+        handle.write(blob)
+    tmp.replace(path)
+    return len(MAGIC) + HEADER.size + len(encoded_header)
+
+
+def _builderHash() -> str:
+    # Snapshots built by a different version of this module are rebuilt.
+    return _fileHash(Path(__file__))[:16]
+
+
+def _readHeader(path: Path) -> Optional[Tuple[Dict[str, Any], int]]:
+    """The snapshot header and the offset where records start."""
+    try:
+        with path.open("rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = HEADER.unpack(handle.read(HEADER.size))
+            header = json.loads(handle.read(length))
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get("format") != FORMAT_VERSION or header.get("builder") != _builderHash():
+        return None
+    return header, len(MAGIC) + HEADER.size + length
+
+
+def _isFresh(root: Path, header: Dict[str, Any]) -> Optional[Dict[str, List[Any]]]:
+    """None when the snapshot is stale; otherwise the sources to re-stat.
+
+    Files are compared by mtime and size first; only a file whose stat changed
+    is hashed, so touching a file does not force a rebuild. Touched files
+    whose hash still matches are returned with their new stat, for the
+    caller to record so they are not hashed again on every load.
+    """
+    try:
+        current = sourcePaths(root)
+    except (OSError, ValueError):
+        return None
+    recorded = header["sources"]
+    if sorted(p.relative_to(root).as_posix() for p in current) != sorted(recorded):
+        return None
+    touched: Dict[str, List[Any]] = {}
+    for path in current:
+        name = path.relative_to(root).as_posix()
+        mtime, size, digest = recorded[name]
+        try:
+            stat = list(_stat(path))
+            if stat != [mtime, size]:
+                if _fileHash(path) != digest:
+                    return None
+                touched[name] = [*stat, digest]
+        except OSError:
+            return None
+    return touched
+
+
+def _restat(
+    path: Path, header: Dict[str, Any], data_offset: int, touched: Dict[str, List[Any]]
+) -> Tuple[Dict[str, Any], int]:
+    """Rewrite the snapshot with updated source stats; records are copied unchanged."""
+    header = {**header, "sources": {**header["sources"], **touched}}
+    with path.open("rb") as handle:
+        handle.seek(data_offset)
+        blob = handle.read()
+    return header, _writeSnapshot(path, header, blob)
+
+
+class AgentRegistry:
+    """Read-only agent lookups backed by a memory-mapped snapshot.
+
+    Index lookups return ids straight from the header; ``find`` intersects
+    the posting lists of its filters and memoizes the answer, so repeated
+    queries such as ``find(context="chat", provider="openai",
+    selectable=True)`` are dictionary hits. Full records are decoded from the
+    mapping on first ``get``.
+    """
+
+    def __init__(self, path: Path, header: Dict[str, Any], data_offset: int) -> None:
+        self.path = path
+        self.indexes: Dict[str, Dict[str, List[str]]] = header["indexes"]
+        self.summaries: Dict[str, Dict[str, Any]] = header["summaries"]
+        self._offsets: Dict[str, List[int]] = header["records"]
+        self._data_offset = data_offset
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._queries: Dict[Tuple[Tuple[str, str], ...], List[str]] = {}
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def open(cls, path: Path) -> "AgentRegistry":
+        loaded = _readHeader(path)
+        if loaded is None:
+            raise ValueError(f"Not an agent registry snapshot: {path}")
+        return cls(path, *loaded)
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self.summaries
+
+    def ids(self) -> List[str]:
+        return list(self.summaries)
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """The full merged record of one agent, or None."""
+        record = self._records.get(agent_id)
+        if record is not None or agent_id not in self._offsets:
+            return record
+        offset, length = self._offsets[agent_id]
+        with self._lock:
+            if self._map is None:
+                with self.path.open("rb") as handle:
+                    self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            start = self._data_offset + offset
+            raw = self._map[start : start + length]
+        record = json.loads(raw)
+        self._records[agent_id] = record
+        return record
+
+    def lookup(self, field: str, value: Any) -> List[str]:
+        """Ids indexed under one field value (``field`` is one of INDEXED_FIELDS)."""
+        if field not in self.indexes:
+            raise KeyError(f"Unknown index {field!r}; available: {', '.join(INDEXED_FIELDS)}")
+        key = ("true" if value else "false") if isinstance(value, bool) else str(value)
+        return list(self.indexes[field].get(key, []))
+
+    def find(
+        self,
+        category: Optional[str] = None,
+        context: Optional[str] = None,
+        provider: Optional[str] = None,
+        risk: Optional[str] = None,
+        selectable: Optional[bool] = None,
+        status: Optional[str] = None,
+    ) -> List[str]:
+        """Ids matching every given filter, in id order."""
+        filters = tuple(
+            (name, ("true" if value else "false") if isinstance(value, bool) else str(value))
+            for name, value in (
+                ("category", category),
+                ("context", context),
+                ("provider", provider),
+                ("risk", risk),
+                ("selectable", selectable),
+                ("status", status),
+            )
+            if value is not None
+        )
+        cached = self._queries.get(filters)
+        if cached is not None:
+            return list(cached)
+        if not filters:
+            result = sorted(self.summaries)
+        else:
+            postings = sorted((self.indexes[name].get(key, []) for name, key in filters), key=len)
+            matches: FrozenSet[str] = frozenset(postings[0]).intersection(*postings[1:])
+            result = sorted(matches)
+        self._queries[filters] = result
+        return list(result)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+def loadRegistry(root: Optional[os.PathLike] = None, snapshot: Optional[os.PathLike] = None) -> AgentRegistry:
+    """Open the registry snapshot, rebuilding it first if any source changed.
+
+    ``snapshot`` defaults to ``.cache/agent-registry.snapshot`` under ``root``.
+    When that location is not writable the snapshot is built in a temporary
+    directory instead.
+    """
+    root = Path(root) if root else ROOT
+    path = Path(snapshot) if snapshot else root / DEFAULT_SNAPSHOT
+    loaded = _readHeader(path)
+    touched = _isFresh(root, loaded[0]) if loaded is not None else None
+    if loaded is not None and touched is not None:
+        if touched:
+            try:
+                loaded = _restat(path, *loaded, touched)
+            except OSError:
+                pass  # Still fresh; the next load hashes the touched files again.
+        return AgentRegistry(path, *loaded)
+    try:
+        buildSnapshot(root, path)
+    except PermissionError:
+        import tempfile
+
+        path = Path(tempfile.gettempdir()) / f"agent-registry-{hashlib.sha1(str(root).encode()).hexdigest()[:12]}.snapshot"
+        buildSnapshot(root, path)
+    return AgentRegistry.open(path)
@@ -1,21 +1,51 @@
+import asyncio
 import os
-from typing import Dict, Any
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from .engine import BSM_AgentEngine
 from bsm_config.src.api.client_factory import APIClientFactory
+from bsm_config.src.api.coalesce import CoalescingConfig
+from bsm_config.src.knowledge import KnowledgeIndex, loadKnowledgeIndex
+
+QUERY_KEYS = ("query", "input", "message")
 
 
 class BSM_AI_Engine(BSM_AgentEngine):
-    def __init__(self, config_path: str = "bsm-config/.env"):
+    def __init__(self, config_path: str = "bsm-config/.env", knowledge_top_k: Optional[int] = None):
         super().__init__(config_path)
         self.ai_client = self._init_ai_client()
+        self.knowledge_top_k = int(os.environ.get("KNOWLEDGE_TOP_K", "5")) if knowledge_top_k is None else knowledge_top_k
+        self._knowledge: Optional[KnowledgeIndex] = None
+        self._knowledge_lock = threading.Lock()
 
     def _init_ai_client(self):
         enabled_providers = [p.strip() for p in os.environ.get("ENABLED_PROVIDERS", "").split(",") if p.strip()]
-        factory = APIClientFactory.fromProviders(enabled_providers)
-        return factory.getPrimaryClient()
+        factory = APIClientFactory.fromProviders(enabled_providers, coalescing=CoalescingConfig.fromEnv())
+        return factory.getRoutingClient()
+
+    def knowledge_context(self, query: str, k: Optional[int] = None) -> str:
+        """The knowledge passages most relevant to ``query``, ready for a prompt."""
+        k = self.knowledge_top_k if k is None else k
+        if k <= 0 or not query.strip():
+            return ""
+        with self._knowledge_lock:
+            if self._knowledge is None:
+                self._knowledge = loadKnowledgeIndex()
+        return self._knowledge.contextFor(query, k)
+
+    def _with_knowledge(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Fill the agent prompts' {{knowledge}} slot with retrieved passages, not whole documents.
+        if "knowledge" in context:
+            return context
+        query = next((str(context[key]) for key in QUERY_KEYS if context.get(key)), "")
+        passages = self.knowledge_context(query)
+        return {**context, "knowledge": passages} if passages else context
 
     async def execute_agent_with_ai_insight(self, name: str, context: Dict[str, Any]):
+        if "knowledge" not in context:
+            # Index load and BM25 scoring are blocking; keep them off the event loop.
+            context = await asyncio.to_thread(self._with_knowledge, context)
         result = await self.execute_agent(name, context)
         ai_analysis = await self.ai_client.analyzeData(result)
 
@@ -24,3 +54,64 @@ class BSM_AI_Engine(BSM_AgentEngine):
             "ai_insights": ai_analysis,
             "recommendations": ai_analysis.get("recommendations", []),
         }
+
+    async def stream_agents_with_ai_insight(
+        self,
+        names: Iterable[str],
+        context: Dict[str, Any],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run many agents concurrently and yield each insight as it completes.
+
+        At most ``max_concurrency`` agents run at once. Each agent's result is
+        handed to AI analysis as soon as it is ready, bounded by its entry in
+        ``timeouts`` (or ``timeout``). Closing the iterator early cancels every
+        agent that has not finished yet.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+
+        names = list(names)
+        timeouts = timeouts or {}
+        # Retrieve once for every agent rather than once per agent.
+        context = await asyncio.to_thread(self._with_knowledge, context)
+        slots = asyncio.Semaphore(max_concurrency)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def run_one(name: str) -> None:
+            async with slots:
+                try:
+                    insight = await asyncio.wait_for(
+                        self.execute_agent_with_ai_insight(name, context),
+                        timeouts.get(name, timeout),
+                    )
+                    outcome = {"agent": name, "status": "ok", **insight}
+                except asyncio.TimeoutError:
+                    outcome = {"agent": name, "status": "timeout", "error": f"timed out after {timeouts.get(name, timeout)}s"}
+                except Exception as exc:
+                    outcome = {"agent": name, "status": "error", "error": str(exc)}
+            await finished.put(outcome)
+
+        tasks = [asyncio.create_task(run_one(name), name=f"agent:{name}") for name in names]
+        try:
+            for _ in tasks:
+                yield await finished.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def execute_agents_with_ai_insight(
+        self,
+        names: Iterable[str],
+        context: Dict[str, Any],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        async for outcome in self.stream_agents_with_ai_insight(names, context, max_concurrency, timeout, timeouts):
+            results[outcome["agent"]] = outcome
+        return results
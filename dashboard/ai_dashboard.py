@@ -1,39 +1,144 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Optional, Tuple
+
 import streamlit as st
 
-from bsm_config.src.api.client_factory import APIClientFactory
+from bsm_config.src.jobs import JobQueue, WorkerPool
+
+PROVIDER_KEYS = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "gemini": "GOOGLE_API_KEY",
+    "azure": "AZURE_OPENAI_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "cohere": "COHERE_API_KEY",
+    "mistral": "MISTRAL_API_KEY",
+    "perplexity": "PERPLEXITY_API_KEY",
+}
+REFRESH_SECONDS = float(os.getenv("BSM_DASHBOARD_REFRESH", "2"))
 
 
 def getEnabledProviders():
-    import os
-    return [
-        name for name, key in {
-            "openai": os.getenv("OPENAI_API_KEY"),
-            "anthropic": os.getenv("ANTHROPIC_API_KEY"),
-            "gemini": os.getenv("GOOGLE_API_KEY"),
-            "azure": os.getenv("AZURE_OPENAI_API_KEY"),
-            "groq": os.getenv("GROQ_API_KEY"),
-            "cohere": os.getenv("COHERE_API_KEY"),
-            "mistral": os.getenv("MISTRAL_API_KEY"),
-            "perplexity": os.getenv("PERPLEXITY_API_KEY"),
-        }.items() if key
-    ]
+    return [name for name, env in PROVIDER_KEYS.items() if os.getenv(env)]
+
+
+@st.cache_data(ttl=60)
+def cachedProviders() -> Tuple[str, ...]:
+    return tuple(getEnabledProviders())
+
+
+@st.cache_resource
+def getJobQueue() -> JobQueue:
+    return JobQueue()
+
+
+@st.cache_resource
+def getWorkerPool() -> Optional[WorkerPool]:
+    """Report jobs run in worker processes; BSM_JOB_WORKERS=0 leaves them to ``report_jobs.py worker``."""
+    workers = int(os.getenv("BSM_JOB_WORKERS", "2"))
+    if workers <= 0:
+        return None
+    pool = WorkerPool(getJobQueue().path, workers)
+    pool.start()
+    return pool
+
+
+def jobKey(kind: str, providers: Tuple[str, ...], params: Any) -> str:
+    payload = json.dumps([kind, providers, params], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def live(run_every: float) -> Callable:
+    """Re-render a panel on a timer where Streamlit supports fragments."""
+    fragment = getattr(st, "fragment", None)
+    if fragment is None:
+        return lambda fn: fn
+    return fragment(run_every=run_every)
 
 
 st.title("🧠 BSM-AgentOS — AI-Powered Agent Dashboard")
 
-enabled = getEnabledProviders()
+enabled = cachedProviders()
+queue = getJobQueue()
+getWorkerPool()
+
 st.subheader("📡 Active AI Providers:")
 st.write(", ".join(enabled) if enabled else "No providers configured")
 
+REPORT_PARAMS = {"title": "Test Report", "data": {"sample": "data"}, "format": "markdown"}
+# Clicks within this window share one report job; a later click tests the providers again.
+REPORT_DEDUPE_SECONDS = 60
+
 if st.button("🧪 Test AI Report Generation"):
-    factory = APIClientFactory.fromProviders(enabled)
-    client = factory.getPrimaryClient()
+    # Durable and keyed by input and time window: a double click, rerun or
+    # second session within the window picks up the same job.
+    window = int(time.time() // REPORT_DEDUPE_SECONDS)
+    job = queue.submit(
+        "generateReport",
+        {"providers": list(enabled), "params": REPORT_PARAMS},
+        lane="high",
+        idempotency_key=jobKey("report", enabled, [REPORT_PARAMS, window]),
+    )
+    st.session_state["report_job"] = job.id
+
+
+@live(1.0)
+def reportPanel() -> None:
+    jobId = st.session_state.get("report_job")
+    job = queue.get(jobId) if jobId else None
+    if job is None:
+        return
+    if job.status == "queued":
+        st.progress(0.0, text=f"Waiting for a worker… {job.elapsed:.1f}s")
+        return
+    if not job.done:
+        # Reports run in worker processes, so pace by past report jobs, not this process's calls.
+        expected = queue.runSeconds("generateReport") or 5.0
+        running = time.time() - (job.started_at or job.created_at)
+        st.progress(min(running / max(expected, 0.1), 0.95), text=f"Generating report… {job.elapsed:.1f}s")
+        return
+    if job.status != "succeeded":
+        st.error(f"❌ Generating report {job.status} after {job.elapsed:.1f}s: {job.error or ''}")
+        return
+    st.success(f"✅ Report Generated! ({job.elapsed:.2f}s)")
+    st.markdown(job.result["content"])
+
+
+reportPanel()
+
+
+@live(REFRESH_SECONDS)
+def metricsPanel() -> None:
+    st.subheader("📈 Provider performance")
+    ms = lambda value: None if value is None else round(value * 1000, 1)  # noqa: E731
+    # Provider calls are made by the job workers, which report them to the queue after each job.
+    rows = [
+        {
+            "provider": p["provider"],
+            "requests": p["requests"],
+            "error rate": f"{p['error_rate']:.1%}",
+            "cancelled": p["cancelled"],
+            "p50 ms": ms(p["p50"]),
+            "p95 ms": ms(p["p95"]),
+            "p99 ms": ms(p["p99"]),
+            "workers": p["workers"],
+        }
+        for p in queue.providerMetrics()
+    ]
+    if rows:
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.caption("No provider calls yet.")
+    jobStats = queue.stats()
+    reportP95 = queue.runSeconds("generateReport")
+    cols = st.columns(4)
+    cols[0].metric("Jobs queued", jobStats["statuses"].get("queued", 0))
+    cols[1].metric("Jobs running", jobStats["statuses"].get("running", 0))
+    cols[2].metric("Jobs failed", jobStats["statuses"].get("failed", 0))
+    cols[3].metric("Report job p95", "–" if reportP95 is None else f"{reportP95:.1f}s")
 
-    result = client.generateReport({
-        "title": "Test Report",
-        "data": {"sample": "data"},
-        "format": "markdown"
-    })
 
-    st.success("✅ Report Generated!")
-    st.markdown(result["content"])
+metricsPanel()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark pooled provider clients against the local stand-in transport."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bsm_config.src.api.client_factory import APIClientFactory, ClientConfig
+
+
+def run_sync(config: ClientConfig, requests: int, workers: int) -> dict:
+    with APIClientFactory.fromProviders(["openai"], config) as factory:
+        client = factory.getPrimaryClient()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda i: client.generateReport({"title": f"r{i}"}), range(requests)))
+        elapsed = time.perf_counter() - started
+        stats = client.transport.stats
+    return {"mode": "sync", "elapsed_s": round(elapsed, 4), "rps": round(requests / elapsed, 1), **stats.__dict__}
+
+
+def run_async(config: ClientConfig, requests: int) -> dict:
+    async def _run() -> float:
+        client = factory.getPrimaryClient()
+        started = time.perf_counter()
+        await asyncio.gather(*(client.analyzeData({"i": i}) for i in range(requests)))
+        return time.perf_counter() - started
+
+    with APIClientFactory.fromProviders(["openai"], config) as factory:
+        elapsed = asyncio.run(_run())
+        stats = factory.getPrimaryClient().transport.stats
+    return {"mode": "async", "elapsed_s": round(elapsed, 4), "rps": round(requests / elapsed, 1), **stats.__dict__}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--connect-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    results = []
+    for keep_alive in (False, True):
+        config = ClientConfig(
+            max_concurrency=args.max_concurrency,
+            pool_size=args.max_concurrency,
+            keep_alive=keep_alive,
+            latency=args.latency,
+            connect_latency=args.connect_latency,
+        )
+        for row in (run_sync(config, args.requests, args.workers), run_async(config, args.requests)):
+            row["keep_alive"] = keep_alive
+            results.append(row)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
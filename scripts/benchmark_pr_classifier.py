@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Micro-benchmark the compiled PR keyword matcher against per-tier scans.
+
+Runs once per ``--keywords`` size: the built-in tiers plus that many extra
+(non-matching) P1 keywords, as a large org-wide keyword file would add.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import random
+import string
+import time
+from typing import Any, Callable
+
+from fake_github import synthetic_pulls
+from pr_triage_weekly import (
+    CLOSE_REASON_KEYWORDS,
+    P0_KEYWORDS,
+    P1_KEYWORDS,
+    TriageRules,
+    classify,
+    decision,
+    prepare,
+)
+
+FILLER = "refactor update improve cleanup agent registry chat webhook dashboard render pipeline".split()
+
+
+def legacy_triage(pr: dict[str, Any], now: dt.datetime, p1_keywords: set[str]) -> tuple[str, str]:
+    """The original classify()+decision() logic, kept as the baseline."""
+    title = (pr.get("title") or "").lower()
+    labels = {lbl["name"].lower() for lbl in pr.get("labels", [])}
+    if any(k in title for k in P0_KEYWORDS) or {"security", "sev0", "blocker"} & labels:
+        priority = "P0"
+    elif any(k in title for k in p1_keywords) or {"release", "feature", "p1"} & labels:
+        priority = "P1"
+    else:
+        priority = "P2"
+    age_days = (now - dt.datetime.fromisoformat(pr["created_at"].replace("Z", "+00:00"))).days
+    if pr.get("draft"):
+        action = "request changes"
+    elif priority in ("P0", "P1"):
+        action = "request changes" if priority == "P1" and age_days > 30 else "merge"
+    elif any(k in title for k in CLOSE_REASON_KEYWORDS) or age_days > 60:
+        action = "close"
+    else:
+        action = "request changes"
+    return priority, action
+
+
+def compiled_triage(pr: dict[str, Any], now: dt.datetime, rules: TriageRules) -> tuple[str, str]:
+    facts = prepare(pr, rules)
+    priority = classify(facts, rules)
+    return priority, decision(facts, priority, now, rules)[0]
+
+
+def extra_keywords(count: int, seed: int) -> set[str]:
+    rng = random.Random(seed)
+    words: set[str] = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 12))))
+    return words
+
+
+def best_time(run: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def make_pulls(count: int, seed: int) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    pulls = synthetic_pulls(count, seed=seed)
+    for pr in pulls:
+        # Longer, mostly keyword-free titles are the realistic worst case.
+        pr["title"] = " ".join(rng.choices(FILLER, k=rng.randint(4, 12)) + [pr["title"]])
+    return pulls
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prs", type=int, default=20000)
+    parser.add_argument("--keywords", type=int, action="append", default=[], help="Extra keywords (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    now = dt.datetime.now(dt.timezone.utc)
+    pulls = make_pulls(args.prs, args.seed)
+    results: list[dict[str, Any]] = []
+    failed = False
+
+    for extra in args.keywords or [0, 200, 1000]:
+        p1_keywords = set(P1_KEYWORDS) | extra_keywords(extra, args.seed)
+        rules = TriageRules.build(p1=p1_keywords)
+        mismatches = sum(
+            1 for pr in pulls if legacy_triage(pr, now, p1_keywords) != compiled_triage(pr, now, rules)
+        )
+        failed = failed or bool(mismatches)
+        legacy_s = best_time(lambda: [legacy_triage(pr, now, p1_keywords) for pr in pulls], args.repeat)
+        compiled_s = best_time(lambda: [compiled_triage(pr, now, rules) for pr in pulls], args.repeat)
+        results.append(
+            {
+                "prs": args.prs,
+                "keywords": len(P0_KEYWORDS) + len(p1_keywords) + len(CLOSE_REASON_KEYWORDS),
+                "mismatches": mismatches,
+                "legacy_s": round(legacy_s, 4),
+                "compiled_s": round(compiled_s, 4),
+                "speedup": round(legacy_s / compiled_s, 2),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the Python entry points, using ``-X importtime``.
+
+Each entry point runs in a fresh interpreter under ``python -X importtime``:
+the CLI scripts with ``--help`` or a no-op invocation (what CI runs most), and
+``Lexbank/app.py`` as a plain import. Per entry point the run records the
+wall time of the whole process and the time spent importing (the sum of the
+top-level ``importtime`` entries), plus the heaviest top-level imports of the
+last round, which is usually where a regression comes from.
+
+Bytecode is cached in a private ``PYTHONPYCACHEPREFIX`` and written by one
+warm-up run, as it would be on a CI runner after the first call;
+``--no-bytecode`` leaves ``PYTHONDONTWRITEBYTECODE`` alone so every run
+recompiles the repository's modules.
+
+    python scripts/benchmark_startup.py                # compare with the baseline
+    python scripts/benchmark_startup.py --save         # record a new baseline
+    python scripts/benchmark_startup.py -k validate --rounds 20
+
+An entry point fails the run when its median import time is more than
+``--threshold`` (25% by default) and ``--min-delta`` seconds above the
+baseline median; the absolute floor keeps jitter on the few-millisecond
+entries from failing CI. Baselines depend on the machine, as for
+benchmark_suite.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import importlib.util
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmark_suite import machine
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_BASELINE = ROOT / "reports" / "python-startup-baseline.json"
+FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.005
+# "import time:      self |  cumulative | <indent>name"; top-level imports have no indent.
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)\s*$")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    name: str
+    argv: tuple[str, ...]
+    cwd: str = "."
+    requires: tuple[str, ...] = ()
+
+
+ENTRY_POINTS = {
+    entry.name: entry
+    for entry in (
+        # The interpreter alone (site, encodings): the floor under every other entry.
+        EntryPoint("python", ("-c", "pass")),
+        EntryPoint("validate_agent.help", ("scripts/validate_agent.py", "--help")),
+        EntryPoint(
+            "validate_agent.no_files",
+            ("scripts/validate_agent.py", "--no-cache", "--glob", ".cache/benchmark-startup/none/*.agent.md"),
+        ),
+        EntryPoint("optimize_agent.help", ("scripts/optimize_agent.py", "--help")),
+        EntryPoint("pr_triage_weekly.help", ("scripts/pr_triage_weekly.py", "--help")),
+        EntryPoint(
+            "generate_report.no_data",
+            ("scripts/generate_report_with_ai.py", "--provider", "openai", "--model", "none", "--data", ".cache/benchmark-startup/none.csv"),
+        ),
+        EntryPoint("report_analytics.help", ("scripts/report_analytics.py", "--help"), requires=("numpy",)),
+        EntryPoint("sync_agent.help", ("agents/autonomous_sync_agent.py", "--help")),
+        EntryPoint("lexbank.import", ("-c", "import app"), cwd="Lexbank", requires=("requests", "httpx")),
+    )
+}
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """Total seconds spent in imports, and the top-level imports by cumulative time."""
+    top: list[tuple[str, float]] = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and not match.group(3):
+            top.append((match.group(4), int(match.group(2)) / 1e6))
+    top.sort(key=lambda item: item[1], reverse=True)
+    return sum(seconds for _, seconds in top), top
+
+
+def run_once(entry: EntryPoint, env: dict[str, str]) -> tuple[float, float, list[tuple[str, float]]]:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *entry.argv],
+        cwd=ROOT / entry.cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    imports, top = parse_importtime(proc.stderr)
+    if not top:
+        raise RuntimeError(f"{entry.name}: no importtime output (exit {proc.returncode})\n{proc.stderr[-2000:]}")
+    return wall, imports, top
+
+
+def measure(entry: EntryPoint, rounds: int, env: dict[str, str], top_n: int) -> dict[str, Any]:
+    run_once(entry, env)  # warm-up: writes bytecode, fills the page cache
+    walls: list[float] = []
+    imports: list[float] = []
+    top: list[tuple[str, float]] = []
+    for _ in range(rounds):
+        wall, imported, top = run_once(entry, env)
+        walls.append(wall)
+        imports.append(imported)
+    return {
+        "rounds": rounds,
+        "median_s": round(statistics.median(walls), 6),
+        "min_s": round(min(walls), 6),
+        "import_median_s": round(statistics.median(imports), 6),
+        "import_min_s": round(min(imports), 6),
+        "top_imports": [{"module": name, "cumulative_s": round(seconds, 6)} for name, seconds in top[:top_n]],
+    }
+
+
+def compare(
+    results: dict[str, dict[str, Any]], baseline: dict[str, Any], threshold: float, min_delta: float
+) -> list[dict[str, Any]]:
+    """One row per entry point; ``regressed`` when the median import time grew past both limits."""
+    rows = []
+    for name, current in results.items():
+        before = baseline.get("entry_points", {}).get(name)
+        if before is None:
+            rows.append({"name": name, "baseline_s": None, "current_s": current["import_median_s"], "ratio": None, "regressed": False})
+            continue
+        ratio = current["import_median_s"] / before["import_median_s"] if before["import_median_s"] else 1.0
+        delta = current["import_median_s"] - before["import_median_s"]
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": before["import_median_s"],
+                "current_s": current["import_median_s"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold and delta > min_delta,
+            }
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the Python entry points.")
+    parser.add_argument("-k", dest="patterns", action="append", default=[], help="Only entry points whose name contains this (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List entry points and exit")
+    parser.add_argument("--rounds", type=int, default=10, help="Timed runs per entry point (after one warm-up run)")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest top-level imports to report per entry point")
+    parser.add_argument("--no-bytecode", action="store_true", help="Keep the environment's bytecode setting instead of caching .pyc files")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write the results into the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed median import slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="Ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--output", default="", help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    selected = [e for e in ENTRY_POINTS.values() if not args.patterns or any(p in e.name for p in args.patterns)]
+    if args.list:
+        for entry in selected:
+            print(f"{entry.name:<28} python {' '.join(entry.argv)}")
+        return 0
+
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="bsm-startup-") as pycache:
+        env = dict(os.environ)
+        if not args.no_bytecode:
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            env["PYTHONPYCACHEPREFIX"] = pycache
+        for entry in selected:
+            missing = [m for m in entry.requires if importlib.util.find_spec(m) is None]
+            if missing:
+                print(f"- {entry.name}: skipped (missing {', '.join(missing)})", file=sys.stderr)
+                continue
+            row = results[entry.name] = measure(entry, max(1, args.rounds), env, args.top)
+            heaviest = ", ".join(f"{t['module']} {t['cumulative_s'] * 1000:.1f}" for t in row["top_imports"][:3])
+            print(
+                f"- {entry.name}: {row['median_s'] * 1000:.1f} ms wall, {row['import_median_s'] * 1000:.1f} ms importing "
+                f"({heaviest})",
+                file=sys.stderr,
+            )
+
+    report = {"format": FORMAT_VERSION, "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+              "machine": machine(), "bytecode_cache": not args.no_bytecode, "entry_points": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save:
+        previous = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        # Entry points left out by -k keep their recorded baseline.
+        report["entry_points"] = {**previous.get("entry_points", {}), **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline for {len(results)} entry point(s) to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(json.dumps(report, indent=2))
+        print(f"No baseline at {baseline_path}; run with --save to record one.", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("machine") != report["machine"]:
+        print(f"Note: baseline was recorded on {baseline.get('machine')}", file=sys.stderr)
+    if baseline.get("bytecode_cache") != report["bytecode_cache"]:
+        print("Note: baseline was recorded with a different bytecode setting", file=sys.stderr)
+    rows = compare(results, baseline, args.threshold, args.min_delta)
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"{row['name']:<28} {row['current_s'] * 1000:>8.1f} ms importing   (no baseline)")
+        else:
+            verdict = "REGRESSED" if row["regressed"] else "ok"
+            print(
+                f"{row['name']:<28} {row['current_s'] * 1000:>8.1f} ms importing  vs {row['baseline_s'] * 1000:>8.1f} ms  "
+                f"x{row['ratio']:.2f}  {verdict}"
+            )
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"Regressed: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the Python tooling, with JSON baselines.
+
+Every benchmark runs against local fixtures only: a synthetic agent catalog
+(validate_agent.py, optimize_agent.py), the fake GitHub server
+(pr_triage_weekly.py), the fake Lexbank backend (Lexbank/app.py ``chat()``)
+and a generated CSV (generate_report_with_ai.py). Fixtures are built once,
+outside the timings; each benchmark then runs one warm-up call and
+``--rounds`` timed rounds. Fast benchmarks repeat within a round until it
+lasts ``--min-time`` seconds and report the time per call.
+
+    python scripts/benchmark_suite.py                  # compare with the baseline
+    python scripts/benchmark_suite.py --save           # record a new baseline
+    python scripts/benchmark_suite.py -k triage -k report --rounds 3
+
+A benchmark whose median is more than its threshold (``--threshold``, 25% by
+default) slower than the baseline median fails the run. Baselines depend on
+the machine: record them on the machine, or CI runner class, that compares
+against them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import datetime as dt
+import gc
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+DEFAULT_BASELINE = ROOT / "reports" / "python-benchmark-baseline.json"
+FORMAT_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[contextlib.ExitStack, float], Any]
+    run: Callable[[Any], Any]
+    unit: str
+    items: Callable[[Any], int]
+    threshold: float | None = None
+    requires: tuple[str, ...] = ()
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    setup: Callable[[contextlib.ExitStack, float], Any],
+    unit: str,
+    items: Callable[[Any], int],
+    threshold: float | None = None,
+    requires: tuple[str, ...] = (),
+) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+    """Register ``run(state)``; ``setup(stack, scale)`` builds ``state`` once, outside the timings."""
+
+    def register(run: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        BENCHMARKS[name] = Benchmark(name, setup, run, unit, items, threshold, requires)
+        return run
+
+    return register
+
+
+def scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def _tempdir(stack: contextlib.ExitStack) -> Path:
+    return Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="bsm-bench-")))
+
+
+# Agent catalog: validate_agent.py and optimize_agent.py ---------------------
+
+
+def catalog_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from benchmark_validate_agent import write_catalog
+
+    tmp = _tempdir(stack)
+    return {"tmp": tmp, "paths": write_catalog(tmp, scaled(400, scale), body_kb=8, seed=5)}
+
+
+def warm_cache_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from validate_agent import ValidationCache, schema_hash, validate_targets
+
+    state = catalog_setup(stack, scale)
+    state["cache"] = ValidationCache(state["tmp"] / "cache.json", schema_hash())
+    validate_targets(state["paths"], state["cache"])
+    return state
+
+
+@benchmark("validate_agent.cold", catalog_setup, "files", lambda s: len(s["paths"]))
+def validate_cold(state: dict[str, Any]) -> int:
+    from validate_agent import validate_targets
+
+    return sum(not r.ok for r in validate_targets(state["paths"]))
+
+
+@benchmark("validate_agent.warm_cache", warm_cache_setup, "files", lambda s: len(s["paths"]))
+def validate_warm(state: dict[str, Any]) -> int:
+    from validate_agent import validate_targets
+
+    return sum(not r.ok for r in validate_targets(state["paths"], state["cache"]))
+
+
+@benchmark("optimize_agent.scan", catalog_setup, "files", lambda s: len(s["paths"]))
+def optimize_scan(state: dict[str, Any]) -> int:
+    from optimize_agent import load_rules, scan_file
+
+    rules = load_rules()
+    return sum(len(scan_file(path, rules)) for path in state["paths"])
+
+
+# PR triage: pr_triage_weekly.py against the fake GitHub server --------------
+
+
+NOW = dt.datetime(2026, 1, 15, tzinfo=dt.timezone.utc)
+
+
+def pulls_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from fake_github import synthetic_pulls
+
+    return {"pulls": synthetic_pulls(scaled(20000, scale), NOW)}
+
+
+@benchmark("pr_triage.classify", pulls_setup, "PRs", lambda s: len(s["pulls"]))
+def triage_classify(state: dict[str, Any]) -> int:
+    from pr_triage_weekly import classify, decision, prepare
+
+    closes = 0
+    for pr in state["pulls"]:
+        facts = prepare(pr)
+        closes += decision(facts, classify(facts), NOW)[0] == "close"
+    return closes
+
+
+def github_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from fake_github import FakeGitHub, synthetic_pulls
+
+    pulls = synthetic_pulls(scaled(3000, scale), NOW)
+    server = stack.enter_context(FakeGitHub({"LexBANK/bench": pulls}))
+    return {"server": server, "pulls": pulls}
+
+
+@benchmark("pr_triage.fetch_and_triage", github_setup, "PRs", lambda s: len(s["pulls"]))
+def triage_fetch(state: dict[str, Any]) -> int:
+    from pr_triage_weekly import GitHubClient, triage_repo
+
+    client = GitHubClient(api_url=state["server"].url, workers=4)
+    result = triage_repo("LexBANK/bench", NOW, client)
+    result.rows.close()
+    return result.open_count
+
+
+# Lexbank chat(): Lexbank/app.py against the fake backend --------------------
+
+
+def lexbank_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from lexbank_load_test import FakeBackend
+
+    backend = stack.enter_context(FakeBackend())
+    # app.py reads its configuration at import time.
+    os.environ.update({"API_BASE": backend.url, "API_STREAM": "false", "API_POOL_SIZE": "16"})
+    sys.path.insert(0, str(ROOT / "Lexbank"))
+    import app
+
+    return {"app": app, "requests": scaled(400, scale)}
+
+
+@benchmark("lexbank.chat", lexbank_setup, "requests", lambda s: s["requests"], threshold=0.5, requires=("gradio", "httpx", "requests"))
+def lexbank_chat(state: dict[str, Any]) -> int:
+    app = state["app"]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        replies = list(pool.map(lambda i: app.chat(f"q{i}", [], "agent-auto")[0][-1][1], range(state["requests"])))
+    return sum(not reply.startswith("echo:") for reply in replies)
+
+
+# Weekly report: generate_report_with_ai.py on a generated CSV ---------------
+
+
+def csv_setup(stack: contextlib.ExitStack, scale: float) -> dict[str, Any]:
+    from bsm_config.src.api.client_factory import APIClientFactory
+
+    rows = scaled(100000, scale)
+    path = _tempdir(stack) / "latest.csv"
+    rng = random.Random(11)
+    start = dt.date(2025, 1, 1)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["date", "region", "product", "amount", "quantity", "note"])
+        for i in range(rows):
+            writer.writerow(
+                [
+                    (start + dt.timedelta(days=i % 365)).isoformat(),
+                    rng.choice(["riyadh", "jeddah", "dammam", "london", "dubai"]),
+                    f"product-{rng.randint(1, 200)}",
+                    round(rng.lognormvariate(4, 1), 2),
+                    rng.randint(1, 50),
+                    rng.choice(["", "priority", "refund", "bulk order"]),
+                ]
+            )
+    factory = stack.enter_context(APIClientFactory.fromProviders(["openai"]))
+    return {"path": path, "rows": rows, "client": factory.getPrimaryClient()}
+
+
+@benchmark("report.batches", csv_setup, "rows", lambda s: s["rows"])
+def report_batches(state: dict[str, Any]) -> int:
+    from generate_report_with_ai import build_report
+
+    summary = asyncio.run(build_report(state["client"], state["path"], io.StringIO(), "bench", batch_rows=5000, engine="csv"))
+    return summary["rows"]
+
+
+@benchmark("report.analytics", csv_setup, "rows", lambda s: s["rows"], requires=("numpy",))
+def report_analytics(state: dict[str, Any]) -> int:
+    import report_analytics
+
+    table = report_analytics.load_csv(state["path"])
+    return report_analytics.analyze(table, ["region"], "date", 10)["rows"]
+
+
+# Runner ---------------------------------------------------------------------
+
+
+@dataclass
+class Measurement:
+    name: str
+    unit: str
+    items: int
+    number: int = 1
+    timings: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        median = statistics.median(self.timings)
+        return {
+            "unit": self.unit,
+            "items": self.items,
+            "rounds": len(self.timings),
+            "calls_per_round": self.number,
+            "min_s": round(min(self.timings), 6),
+            "median_s": round(median, 6),
+            "mean_s": round(statistics.fmean(self.timings), 6),
+            "stddev_s": round(statistics.stdev(self.timings), 6) if len(self.timings) > 1 else 0.0,
+            "per_s": round(self.items / median, 1) if median else None,
+        }
+
+
+def _available(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def run_benchmark(bench: Benchmark, rounds: int, scale: float, min_time: float = 0.1) -> Measurement:
+    with contextlib.ExitStack() as stack:
+        state = bench.setup(stack, scale)
+        started = time.perf_counter()
+        bench.run(state)
+        warmup = time.perf_counter() - started
+        number = max(1, math.ceil(min_time / warmup)) if warmup > 0 else 1
+        measurement = Measurement(bench.name, bench.unit, bench.items(state), number)
+        for _ in range(rounds):
+            # As timeit does: collect first, and keep the collector out of the timed calls.
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                for _ in range(number):
+                    bench.run(state)
+                measurement.timings.append((time.perf_counter() - started) / number)
+            finally:
+                gc.enable()
+    return measurement
+
+
+def machine() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(terse=True),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """One row per benchmark present in both; ``regressed`` when the median slowed past its threshold."""
+    rows = []
+    for name, current in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if before is None or before.get("scale") != current["scale"]:
+            rows.append({"name": name, "baseline_s": None, "current_s": current["median_s"], "ratio": None, "regressed": False})
+            continue
+        limit = BENCHMARKS[name].threshold if BENCHMARKS[name].threshold is not None else threshold
+        ratio = current["median_s"] / before["median_s"] if before["median_s"] else 1.0
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": before["median_s"],
+                "current_s": current["median_s"],
+                "ratio": round(ratio, 3),
+                "threshold": limit,
+                "regressed": ratio > 1 + limit,
+            }
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Python tooling.")
+    parser.add_argument("-k", dest="patterns", action="append", default=[], help="Only benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark (after one warm-up round)")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per round; fast benchmarks repeat")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every fixture size by this")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write the results into the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--output", default="", help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    selected = [b for b in BENCHMARKS.values() if not args.patterns or any(p in b.name for p in args.patterns)]
+    if args.list:
+        for bench in selected:
+            print(bench.name)
+        return 0
+
+    results: dict[str, dict[str, Any]] = {}
+    for bench in selected:
+        missing = [m for m in bench.requires if not _available(m)]
+        if missing:
+            print(f"- {bench.name}: skipped (missing {', '.join(missing)})", file=sys.stderr)
+            continue
+        measurement = run_benchmark(bench, max(1, args.rounds), args.scale, args.min_time)
+        results[bench.name] = {**measurement.as_dict(), "scale": args.scale}
+        row = results[bench.name]
+        print(
+            f"- {bench.name}: median {row['median_s'] * 1000:.1f} ms (min {row['min_s'] * 1000:.1f}, "
+            f"±{row['stddev_s'] * 1000:.1f}), {row['per_s']} {bench.unit}/s",
+            file=sys.stderr,
+        )
+
+    report = {"format": FORMAT_VERSION, "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+              "machine": machine(), "benchmarks": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save:
+        previous = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        # Benchmarks left out by -k keep their recorded baseline.
+        report["benchmarks"] = {**previous.get("benchmarks", {}), **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline for {len(results)} benchmark(s) to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(json.dumps(report, indent=2))
+        print(f"No baseline at {baseline_path}; run with --save to record one.", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("machine") != report["machine"]:
+        print(f"Note: baseline was recorded on {baseline.get('machine')}", file=sys.stderr)
+    rows = compare(results, baseline, args.threshold)
+    for row in rows:
+        if row["ratio"] is None:
+            print(f"{row['name']:<30} {row['current_s'] * 1000:>10.1f} ms   (no baseline)")
+        else:
+            verdict = "REGRESSED" if row["regressed"] else "ok"
+            print(
+                f"{row['name']:<30} {row['current_s'] * 1000:>10.1f} ms  vs {row['baseline_s'] * 1000:>10.1f} ms  "
+                f"x{row['ratio']:.2f} (limit x{1 + row['threshold']:.2f})  {verdict}"
+            )
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"Regressed: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
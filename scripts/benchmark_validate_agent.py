@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark validate_agent.py on a synthetic catalog of agent files.
+
+Compares the original loop (whole-file read, pure-Python ``yaml.safe_load``)
+with the front-matter reader at several ``--jobs`` settings, cold and with a
+warm validation cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from validate_agent import (  # noqa: E402
+    DynamicModelFactory,
+    ValidationCache,
+    load_schema,
+    schema_hash,
+    validate_targets,
+)
+
+BODY = "## Notes\n\n" + "This agent reviews pull requests and reports findings. " * 40 + "\n"
+
+
+def write_catalog(directory: Path, count: int, body_kb: int, seed: int) -> list[Path]:
+    rng = random.Random(seed)
+    body = BODY * max(1, body_kb * 1024 // len(BODY))
+    paths = []
+    for i in range(count):
+        front = {
+            "name": f"agent-{i}",
+            "description": f"Synthetic agent {i} for validation benchmarks",
+            "version": f"1.{i % 10}.{rng.randint(0, 9)}",
+            "author": "BSM",
+            "license": rng.choice(["MIT", "Apache-2.0", "GPL-3.0"]),
+            "triggers": [
+                {"event": rng.choice(["pull_request", "push"]), "conditions": [{"files_changed": ["src/**", "docs/*.md"]}]}
+            ],
+            "actions": [{"name": f"Step {n}", "run": f"python scripts/step_{n}.py --flag {n}"} for n in range(rng.randint(2, 6))],
+            "permissions": {"contents": "read", "pull-requests": "write"},
+        }
+        path = directory / f"agent-{i:05d}.agent.md"
+        path.write_text(f"---\n{yaml.safe_dump(front, sort_keys=False)}---\n{body}", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def legacy_validate(paths: list[Path]) -> int:
+    """The original main() loop: read every file whole, pure-Python loader."""
+    model = DynamicModelFactory.build_root_model(load_schema())
+    failures = 0
+    for path in paths:
+        content = path.read_text(encoding="utf-8")
+        payload = yaml.safe_load(content.split("---\n", 2)[1])
+        try:
+            model.model_validate(payload)
+        except ValueError:
+            failures += 1
+    return failures
+
+
+def timed(name: str, run: Any) -> dict[str, Any]:
+    started = time.perf_counter()
+    failures = run()
+    return {"scenario": name, "elapsed_s": round(time.perf_counter() - started, 3), "failures": failures}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--body-kb", type=int, default=8, help="Markdown body size per file")
+    parser.add_argument("--jobs", type=int, action="append", default=[], help="Pool sizes to try (repeatable)")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    jobs = args.jobs or sorted({1, os.cpu_count() or 1})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_catalog(Path(tmp), args.files, args.body_kb, args.seed)
+        results = [timed("before: whole file + yaml.safe_load", lambda: legacy_validate(paths))]
+        for n in jobs:
+            results.append(
+                timed(f"after: front matter, jobs={n}", lambda n=n: sum(not r.ok for r in validate_targets(paths, jobs=n)))
+            )
+        cache = ValidationCache(Path(tmp) / "cache.json", schema_hash())
+        validate_targets(paths, cache, jobs=jobs[-1])
+        results.append(timed("after: warm cache", lambda: sum(not r.ok for r in validate_targets(paths, cache))))
+
+    for result in results:
+        result["files"] = args.files
+        result["files_per_s"] = round(args.files / result["elapsed_s"], 1) if result["elapsed_s"] else None
+    print(json.dumps(results, indent=2))
+    return 1 if any(r["failures"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Cloudflare DNS records API, for offline sync runs.
+
+Serves ``/zones/{id}`` and ``/zones/{id}/dns_records`` (list with
+``page``/``per_page`` and ``result_info``, create, patch, delete) in the
+Cloudflare response envelope, with per-page ETags, ``If-None-Match`` and a
+sliding-window rate limit that answers 429 with ``Retry-After``.
+
+    python scripts/fake_cloudflare.py --zone lexdo.uk --records 5000 --port 8788
+    CLOUDFLARE_TOKEN=x python agents/autonomous_sync_agent.py --api-url http://127.0.0.1:8788/client/v4 \\
+        --zone-id <printed id> --once --apply
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/client/v4"
+
+
+def zone_id_for(name: str) -> str:
+    return hashlib.md5(name.encode("utf-8")).hexdigest()
+
+
+def synthetic_records(zone: str, count: int, seed: int = 7) -> list[dict[str, Any]]:
+    """Deterministic A/CNAME/TXT records under ``zone``."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        kind = rng.choice(["A", "A", "CNAME", "TXT"])
+        name = f"host{i}.{zone}"
+        if kind == "A":
+            content = f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        elif kind == "CNAME":
+            content = f"target{rng.randint(0, 99)}.example.net"
+        else:
+            content = f"v=spf1 include:_spf{i}.example.net ~all"
+        records.append({"type": kind, "name": name, "content": content, "ttl": rng.choice([1, 300, 3600])})
+    return records
+
+
+class FakeCloudflareHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeCloudflare"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def _send(self, status: int, payload: Any, headers: dict[str, str] | None = None) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        self._send(status, {"success": False, "errors": [{"code": status, "message": message}], "result": None}, headers)
+
+    def _route(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path[len(API_PREFIX) :] if parsed.path.startswith(API_PREFIX) else parsed.path
+        parts = path.strip("/").split("/")
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.headers.get("Authorization") != f"Bearer {self.server.token}":
+            self._error(403, "Authentication error")
+            return
+        retry_after = self.server.admit(method)
+        if retry_after is not None:
+            self._error(429, "Rate limited", {"Retry-After": str(max(1, round(retry_after)))})
+            return
+        if len(parts) < 2 or parts[0] != "zones" or parts[1] not in self.server.zones:
+            self._error(404, "Zone not found")
+            return
+        zone = self.server.zones[parts[1]]
+
+        if len(parts) == 2 and method == "GET":
+            self._send(200, {"success": True, "errors": [], "result": {"id": parts[1], "name": zone["name"]}})
+        elif len(parts) == 3 and parts[2] == "dns_records" and method == "GET":
+            self._list(parts[1], query)
+        elif len(parts) == 3 and parts[2] == "dns_records" and method == "POST":
+            record = self.server.create(parts[1], body)
+            self._send(200, {"success": True, "errors": [], "result": record})
+        elif len(parts) == 4 and parts[2] == "dns_records" and method in ("PATCH", "PUT", "DELETE"):
+            record = self.server.modify(parts[1], parts[3], method, body)
+            if record is None:
+                self._error(404, "Record not found")
+            else:
+                self._send(200, {"success": True, "errors": [], "result": record})
+        else:
+            self._error(404, "Not found")
+
+    def _list(self, zone_id: str, query: dict[str, str]) -> None:
+        per_page = min(int(query.get("per_page", 100)), 5000)
+        page = int(query.get("page", 1))
+        with self.server.lock:
+            items = sorted(self.server.zones[zone_id]["records"].values(), key=lambda r: (r["type"], r["name"], r["id"]))
+        total_pages = max(1, -(-len(items) // per_page))
+        chunk = items[(page - 1) * per_page : page * per_page]
+        payload = {
+            "success": True,
+            "errors": [],
+            "messages": [],
+            "result": chunk,
+            "result_info": {
+                "page": page,
+                "per_page": per_page,
+                "count": len(chunk),
+                "total_count": len(items),
+                "total_pages": total_pages,
+            },
+        }
+        etag = f'"{hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self._send(304, None, {"ETag": etag})
+            return
+        self._send(200, payload, {"ETag": etag})
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_POST(self) -> None:
+        self._route("POST")
+
+    def do_PATCH(self) -> None:
+        self._route("PATCH")
+
+    def do_PUT(self) -> None:
+        self._route("PUT")
+
+    def do_DELETE(self) -> None:
+        self._route("DELETE")
+
+
+class FakeCloudflare(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        zones: dict[str, list[dict[str, Any]]],
+        token: str = "test-token",
+        latency: float = 0.0,
+        rate_limit: int = 1200,
+        rate_window: float = 300.0,
+        port: int = 0,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), FakeCloudflareHandler)
+        self.token = token
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.lock = threading.Lock()
+        self.zones: dict[str, dict[str, Any]] = {}
+        for name, records in zones.items():
+            zone_id = zone_id_for(name)
+            self.zones[zone_id] = {"name": name, "records": {}}
+            for record in records:
+                self.create(zone_id, record)
+        self.requests: dict[str, int] = {}
+        self.not_modified = 0
+        self.throttled = 0
+        self._admitted: deque[float] = deque()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}{API_PREFIX}"
+
+    def admit(self, method: str) -> float | None:
+        """Count a request; returns seconds to wait when over the rate limit."""
+        now = time.monotonic()
+        with self.lock:
+            while self._admitted and self._admitted[0] <= now - self.rate_window:
+                self._admitted.popleft()
+            if len(self._admitted) >= self.rate_limit:
+                self.throttled += 1
+                return self._admitted[0] + self.rate_window - now
+            self._admitted.append(now)
+            self.requests[method] = self.requests.get(method, 0) + 1
+        return None
+
+    def records(self, zone: str) -> list[dict[str, Any]]:
+        with self.lock:
+            return list(self.zones[zone_id_for(zone)]["records"].values())
+
+    def create(self, zone_id: str, fields: dict[str, Any]) -> dict[str, Any]:
+        record = {
+            "id": uuid.uuid4().hex,
+            "type": fields["type"],
+            "name": fields["name"],
+            "content": fields["content"],
+            "ttl": fields.get("ttl", 1),
+            "proxied": fields.get("proxied", False),
+            "zone_id": zone_id,
+        }
+        if "priority" in fields:
+            record["priority"] = fields["priority"]
+        with self.lock:
+            self.zones[zone_id]["records"][record["id"]] = record
+        return record
+
+    def modify(self, zone_id: str, record_id: str, method: str, fields: dict[str, Any]) -> dict[str, Any] | None:
+        with self.lock:
+            records = self.zones[zone_id]["records"]
+            if record_id not in records:
+                return None
+            if method == "DELETE":
+                records.pop(record_id)
+                return {"id": record_id}
+            records[record_id].update({k: v for k, v in fields.items() if k != "id"})
+            return dict(records[record_id])
+
+    def __enter__(self) -> "FakeCloudflare":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zone", action="append", default=[], help="Zone name (repeatable)")
+    parser.add_argument("--records", type=int, default=1000, help="Synthetic records per zone")
+    parser.add_argument("--token", default="test-token")
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--latency", type=float, default=0.05, help="Per-request latency (s)")
+    parser.add_argument("--rate-limit", type=int, default=1200, help="Requests per --rate-window")
+    parser.add_argument("--rate-window", type=float, default=300.0)
+    args = parser.parse_args()
+
+    zones = {name: synthetic_records(name, args.records, seed=i) for i, name in enumerate(args.zone or ["lexdo.uk"])}
+    server = FakeCloudflare(
+        zones, token=args.token, latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window, port=args.port
+    )
+    print(f"Fake Cloudflare API on {server.url} (token {args.token})")
+    for zone_id, zone in server.zones.items():
+        print(f"  {zone['name']}: {zone_id}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Local stand-in for the GitHub pulls API, for offline triage runs.
+
+Serves ``/repos/{owner}/{repo}/pulls`` and ``/orgs/{org}/repos`` with
+pagination ``Link`` headers, ETag / ``If-None-Match`` handling,
+``sort``/``direction`` ordering and rate-limit headers.
+
+    python scripts/fake_github.py --prs 5000 --port 8787
+    python scripts/pr_triage_weekly.py --api-url http://127.0.0.1:8787
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+TITLES = [
+    "Fix security issue in auth flow",
+    "Add release notes for beta launch",
+    "Update docs for workflow",
+    "WIP: experiment with caching",
+    "Refactor agent registry loader",
+    "Hotfix production outage in webhook",
+    "Improve chat UI spacing",
+    "Duplicate of earlier PR",
+]
+LABELS = ["security", "release", "feature", "p1", "docs", "blocker", "chore"]
+
+
+def synthetic_pulls(count: int, now: dt.datetime | None = None, seed: int = 7) -> list[dict[str, Any]]:
+    """Deterministic PR payloads shaped like the GitHub REST API."""
+    rng = random.Random(seed)
+    now = now or dt.datetime.now(dt.timezone.utc)
+    pulls = []
+    for number in range(1, count + 1):
+        created = now - dt.timedelta(days=rng.uniform(0, 120))
+        updated = min(now, created + dt.timedelta(days=rng.uniform(0, 30)))
+        state = "open" if rng.random() < 0.3 else "closed"
+        closed_at = merged_at = None
+        if state == "closed":
+            closed_at = updated
+            if rng.random() < 0.6:
+                merged_at = closed_at
+        pulls.append(
+            {
+                "number": number,
+                "title": f"{rng.choice(TITLES)} #{number}",
+                "state": state,
+                "draft": rng.random() < 0.1,
+                "labels": [{"name": name} for name in rng.sample(LABELS, rng.randint(0, 2))],
+                "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "updated_at": updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "closed_at": closed_at.strftime("%Y-%m-%dT%H:%M:%SZ") if closed_at else None,
+                "merged_at": merged_at.strftime("%Y-%m-%dT%H:%M:%SZ") if merged_at else None,
+            }
+        )
+    return pulls
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeGitHub"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        parts = parsed.path.strip("/").split("/")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        with self.server.lock:
+            self.server.requests += 1
+            remaining = self.server.rate_limit - self.server.requests
+        rate_headers = {
+            "X-RateLimit-Limit": str(self.server.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+        if remaining < 0:
+            self._send(403, b'{"message": "API rate limit exceeded"}', {**rate_headers, "Retry-After": "1"})
+            return
+
+        if len(parts) == 4 and parts[0] == "repos" and parts[3] == "pulls":
+            items = self.server.pulls_for(f"{parts[1]}/{parts[2]}", query)
+        elif len(parts) == 3 and parts[0] == "orgs" and parts[2] == "repos":
+            items = self.server.repos_for(parts[1])
+        else:
+            self._send(404, b'{"message": "Not Found"}', rate_headers)
+            return
+
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        chunk = items[(page - 1) * per_page : page * per_page]
+        body = json.dumps(chunk).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        headers = {"Content-Type": "application/json", "ETag": etag, **rate_headers}
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        if page < last:
+            links.append(f'<{self._page_url(parsed, query, page + 1)}>; rel="next"')
+            links.append(f'<{self._page_url(parsed, query, last)}>; rel="last"')
+        if links:
+            headers["Link"] = ", ".join(links)
+
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+                # Conditional hits do not count against GitHub's rate limit.
+                self.server.requests -= 1
+            self._send(304, b"", {k: v for k, v in headers.items() if k != "Content-Type"})
+            return
+        self._send(200, body, headers)
+
+    def _page_url(self, parsed: Any, query: dict[str, str], page: int) -> str:
+        params = "&".join(f"{k}={v}" for k, v in {**query, "page": str(page)}.items())
+        return f"http://{self.headers.get('Host')}{parsed.path}?{params}"
+
+
+class FakeGitHub(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        repos: dict[str, list[dict[str, Any]]],
+        latency: float = 0.0,
+        rate_limit: int = 5000,
+        port: int = 0,
+        archived: set[str] | None = None,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), FakeGitHubHandler)
+        self.repos = repos
+        self.archived = archived or set()
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def pulls_for(self, repo: str, query: dict[str, str]) -> list[dict[str, Any]]:
+        pulls = self.repos.get(repo, [])
+        state = query.get("state", "open")
+        if state != "all":
+            pulls = [pr for pr in pulls if pr["state"] == state]
+        sort_key = "updated_at" if query.get("sort") == "updated" else "created_at"
+        descending = query.get("direction", "desc") == "desc"
+        return sorted(pulls, key=lambda pr: (pr[sort_key], pr["number"]), reverse=descending)
+
+    def repos_for(self, org: str) -> list[dict[str, Any]]:
+        names = sorted(name for name in self.repos if name.split("/")[0].lower() == org.lower())
+        return [
+            {"full_name": name, "name": name.split("/")[1], "archived": name in self.archived, "owner": {"login": org}}
+            for name in names
+        ]
+
+    def __enter__(self) -> "FakeGitHub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", action="append", default=[], help="owner/name (repeatable)")
+    parser.add_argument("--prs", type=int, default=2000, help="Synthetic PRs per repo")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.05, help="Per-request latency (s)")
+    args = parser.parse_args()
+
+    repos = {name: synthetic_pulls(args.prs, seed=i) for i, name in enumerate(args.repo or ["LexBANK/BSM"])}
+    server = FakeGitHub(repos, latency=args.latency, port=args.port)
+    print(f"Fake GitHub API on {server.url} serving {', '.join(repos)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,46 +1,484 @@
 #!/usr/bin/env python3
+"""Generate the weekly insights report from ./data/latest.csv.
+
+Two pipelines:
+
+- ``batches`` (default): the CSV is read in row batches (map), each batch is
+  reduced to per-column aggregates and sent to the provider on its own, a
+  few batches in flight at a time, and the batch aggregates are merged into
+  one dataset summary for a final provider call (reduce). Memory and request
+  size depend on the batch size, not on the file size; the report is
+  written as batches complete.
+- ``analytics``: report_analytics.py loads the CSV into cached NumPy columns
+  and computes group-bys, week-over-week deltas, top-N and anomaly tables
+  locally; only those tables go to the provider, in one call. The whole
+  file is held in memory, so it is opt-in (``--mode analytics``, or
+  ``--mode auto`` to use it whenever NumPy is installed).
+
+With ``--knowledge-k N`` the N knowledge-base passages (bsm_config/src/knowledge.py)
+most relevant to ``--knowledge-query`` are attached to the summary call as
+``knowledge``, instead of whole documents.
+
+With ``--enqueue`` the report is queued as a ``weeklyReport`` job in the
+durable job queue (bsm_config/src/jobs.py) and the script returns at once;
+``scripts/report_jobs.py worker`` runs it, with retries and resume.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import importlib.util
+import json
+import math
+import re
 import sys
+from collections import Counter
 from pathlib import Path
+from typing import Any, Iterator, TextIO
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from bsm_config.src.api.client_factory import APIClientFactory
+TITLE = "BSM Weekly Insights Report"
+TOP_VALUES = 10
+# Distinct text values tracked per column across batches. Past this the
+# counters are pruned Misra-Gries style; each count is then a lower bound,
+# short of the true count by at most the column's ``top_undercount``.
+MAX_TRACKED_VALUES = 2000
 
 
-def main():
-    if len(sys.argv) < 5:
-        print("Usage: python generate_report_with_ai.py --provider <provider> --model <model_name>")
-        sys.exit(1)
+def _to_float(value: str) -> float | None:
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
 
-    provider = sys.argv[2]
-    model = sys.argv[4]
 
-    data_path = Path("./data/latest.csv")
-    if not data_path.exists():
-        print("❌ No data file found at ./data/latest.csv")
-        sys.exit(1)
+def infer_kinds(header: list[str], rows: list[list[str]]) -> dict[str, str]:
+    """Column kinds from the first batch: numeric if every filled cell parses."""
+    kinds = {}
+    for index, name in enumerate(header):
+        values = [row[index].strip() for row in rows if index < len(row) and row[index].strip()]
+        numeric = bool(values) and all(_to_float(v) is not None for v in values)
+        kinds[name] = "numeric" if numeric else "text"
+    return kinds
+
+
+def _numeric_stats(values: list[str]) -> dict[str, Any]:
+    stats: dict[str, Any] = {"kind": "numeric", "count": 0, "missing": 0, "invalid": 0, "sum": 0.0, "sumsq": 0.0, "min": None, "max": None}
+    for raw in values:
+        value = raw.strip()
+        if not value:
+            stats["missing"] += 1
+            continue
+        number = _to_float(value)
+        if number is None:
+            stats["invalid"] += 1
+            continue
+        stats["count"] += 1
+        stats["sum"] += number
+        stats["sumsq"] += number * number
+        stats["min"] = number if stats["min"] is None else min(stats["min"], number)
+        stats["max"] = number if stats["max"] is None else max(stats["max"], number)
+    return stats
+
+
+def _text_stats(values: list[str]) -> dict[str, Any]:
+    filled = [v.strip() for v in values if v.strip()]
+    counts = Counter(filled)
+    return {
+        "kind": "text",
+        "count": len(filled),
+        "missing": len(values) - len(filled),
+        "distinct": len(counts),
+        "top": counts.most_common(TOP_VALUES),
+        "counts": counts,
+    }
+
+
+def summarize_batch(header: list[str], rows: list[list[str]], kinds: dict[str, str]) -> dict[str, Any]:
+    columns = {}
+    for index, name in enumerate(header):
+        values = [row[index] if index < len(row) else "" for row in rows]
+        columns[name] = _numeric_stats(values) if kinds[name] == "numeric" else _text_stats(values)
+    return {"rows": len(rows), "columns": columns}
+
+
+def _summarize_frame(frame: Any, kinds: dict[str, str]) -> dict[str, Any]:
+    """pandas/NumPy version of summarize_batch for one DataFrame batch."""
+    import pandas as pd
+
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].fillna("").astype(str).str.strip()
+        filled = values[values != ""]
+        if kinds[name] == "numeric":
+            numbers = pd.to_numeric(filled, errors="coerce")
+            numbers = numbers[numbers.abs() != float("inf")]
+            valid = numbers.dropna()
+            columns[name] = {
+                "kind": "numeric",
+                "count": int(valid.size),
+                "missing": int(len(values) - len(filled)),
+                "invalid": int(len(filled) - valid.size),
+                "sum": float(valid.sum()),
+                "sumsq": float((valid * valid).sum()),
+                "min": float(valid.min()) if valid.size else None,
+                "max": float(valid.max()) if valid.size else None,
+            }
+        else:
+            counts = filled.value_counts(sort=False)
+            top = Counter(dict(zip(counts.index, counts.tolist()))).most_common(TOP_VALUES)
+            columns[name] = {
+                "kind": "text",
+                "count": int(len(filled)),
+                "missing": int(len(values) - len(filled)),
+                "distinct": int(counts.size),
+                "top": [(str(value), int(count)) for value, count in top],
+                "counts": Counter({str(value): int(count) for value, count in counts.items()}),
+            }
+    return {"rows": int(len(frame)), "columns": columns}
+
+
+def iter_batches(path: Path, batch_rows: int, engine: str = "csv") -> Iterator[dict[str, Any]]:
+    """Yield one aggregate summary per ``batch_rows`` rows of ``path``."""
+    start = 1
+    if engine == "pandas":
+        import pandas as pd
+
+        kinds = None
+        reader = pd.read_csv(path, chunksize=batch_rows, dtype=str, keep_default_na=False, skipinitialspace=False)
+        for frame in reader:
+            if kinds is None:
+                sample = [[str(v) for v in row] for row in frame.itertuples(index=False)]
+                kinds = infer_kinds([str(c) for c in frame.columns], sample)
+            summary = _summarize_frame(frame, kinds)
+            summary["first_row"], start = start, start + summary["rows"]
+            yield summary
+        return
+
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if not header:
+            return
+        kinds = None
+        batch: list[list[str]] = []
+        for row in reader:
+            if not row:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                kinds = kinds or infer_kinds(header, batch)
+                summary = summarize_batch(header, batch, kinds)
+                summary["first_row"], start = start, start + summary["rows"]
+                yield summary
+                batch = []
+        if batch:
+            kinds = kinds or infer_kinds(header, batch)
+            summary = summarize_batch(header, batch, kinds)
+            summary["first_row"] = start
+            yield summary
+
+
+class DatasetSummary:
+    """Running merge of batch summaries; size is bounded by the column count."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.batches = 0
+        self.columns: dict[str, dict[str, Any]] = {}
+        self._values: dict[str, Counter[str]] = {}
+        self._undercount: dict[str, int] = {}
+
+    def add(self, batch: dict[str, Any]) -> None:
+        self.rows += batch["rows"]
+        self.batches += 1
+        for name, stats in batch["columns"].items():
+            merged = self.columns.get(name)
+            if merged is None:
+                merged = self.columns[name] = {k: v for k, v in stats.items() if k not in ("top", "distinct")}
+                if stats["kind"] == "text":
+                    self._values[name] = Counter()
+                    self._undercount[name] = 0
+            else:
+                for key in ("count", "missing", "invalid", "sum", "sumsq"):
+                    if key in stats:
+                        merged[key] += stats[key]
+                for key, pick in (("min", min), ("max", max)):
+                    if stats.get(key) is not None:
+                        merged[key] = stats[key] if merged[key] is None else pick(merged[key], stats[key])
+            if stats["kind"] == "text":
+                # The full batch counter is only needed here; drop it so it is
+                # not held with the in-flight batch or sent to the provider.
+                values = self._values[name]
+                values.update(stats.pop("counts"))
+                if len(values) > MAX_TRACKED_VALUES:
+                    cut = heapq.nlargest(MAX_TRACKED_VALUES + 1, values.values())[-1]
+                    self._values[name] = Counter({v: c - cut for v, c in values.items() if c > cut})
+                    self._undercount[name] += cut
+
+    def as_dict(self) -> dict[str, Any]:
+        columns = {}
+        for name, stats in self.columns.items():
+            if stats["kind"] == "numeric":
+                count = stats["count"]
+                mean = stats["sum"] / count if count else None
+                variance = max(stats["sumsq"] / count - mean * mean, 0.0) if count else None
+                columns[name] = {
+                    "kind": "numeric",
+                    "count": count,
+                    "missing": stats["missing"],
+                    "invalid": stats["invalid"],
+                    "mean": mean,
+                    "std": math.sqrt(variance) if variance is not None else None,
+                    "min": stats["min"],
+                    "max": stats["max"],
+                }
+            else:
+                columns[name] = {
+                    "kind": "text",
+                    "count": stats["count"],
+                    "missing": stats["missing"],
+                    "top": self._values[name].most_common(TOP_VALUES),
+                    "top_undercount": self._undercount[name],
+                }
+        return {"rows": self.rows, "batches": self.batches, "columns": columns}
+
+
+def _demote(markdown: str, levels: int = 2) -> str:
+    """Nest provider headings under the report's own section headings."""
+    return re.sub(r"^(#{1,4}) ", lambda m: "#" * min(6, len(m.group(1)) + levels) + " ", markdown, flags=re.M)
+
+
+def _fmt(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.4g}"
+    return str(value)
+
 
-    raw_data = data_path.read_text(encoding="utf-8")
+def _aggregate_table(summary: dict[str, Any]) -> list[str]:
+    lines = ["| Column | Kind | Filled | Missing | Mean | Std | Min | Max | Top values |", "|---|---|---|---|---|---|---|---|---|"]
+    for name, stats in summary["columns"].items():
+        bound = "≥" if stats.get("top_undercount") else ""
+        top = ", ".join(f"{value} ({bound}{count})" for value, count in stats.get("top", [])[:3])
+        lines.append(
+            f"| {name} | {stats['kind']} | {stats['count']} | {stats['missing']} | {_fmt(stats.get('mean'))} | "
+            f"{_fmt(stats.get('std'))} | {_fmt(stats.get('min'))} | {_fmt(stats.get('max'))} | {top or '-'} |"
+        )
+    if any(stats.get("top_undercount") for stats in summary["columns"].values()):
+        lines += ["", "≥: too many distinct values to count exactly; the count is a lower bound."]
+    return lines
 
-    factory = APIClientFactory.fromProviders([provider])
-    client = factory.getPrimaryClient()
 
-    report = client.generateReport(
-        {
-            "title": "BSM Weekly Insights Report",
-            "data": raw_data,
-            "format": "markdown",
-            "model": model,
-        }
+async def build_report(
+    client: Any,
+    data_path: Path,
+    out: TextIO,
+    model: str,
+    batch_rows: int = 5000,
+    concurrency: int = 4,
+    engine: str = "csv",
+    knowledge: str = "",
+) -> dict[str, Any]:
+    """Map batches to provider calls (``concurrency`` in flight) and reduce.
+
+    Batch sections are written to ``out`` in file order as soon as every
+    earlier batch has been written. A new batch is read only while fewer
+    than ``concurrency`` batches are in flight or held back behind a slow
+    earlier one, so memory does not grow with the file.
+    """
+    import asyncio
+
+    dataset = DatasetSummary()
+    in_flight: dict[asyncio.Task[Any], dict[str, Any]] = {}
+    finished: dict[int, tuple[dict[str, Any], dict[str, Any]]] = {}
+    next_to_write = 0
+
+    out.write(f"# {TITLE}\n\n- Source: `{data_path}`\n- Model: `{model}`\n\n## Insights by batch\n")
+
+    def flush() -> None:
+        nonlocal next_to_write
+        while next_to_write in finished:
+            batch, report = finished.pop(next_to_write)
+            last_row = batch["first_row"] + batch["rows"] - 1
+            out.write(f"\n### Rows {batch['first_row']}–{last_row}\n\n{_demote(report['content']).strip()}\n")
+            out.flush()
+            next_to_write += 1
+
+    async def drain(return_when: str) -> None:
+        done, _ = await asyncio.wait(in_flight, return_when=return_when)
+        for task in done:
+            batch = in_flight.pop(task)
+            finished[batch["index"]] = (batch, task.result())
+        flush()
+
+    try:
+        for index, batch in enumerate(iter_batches(data_path, batch_rows, engine)):
+            batch["index"] = index
+            dataset.add(batch)
+            params = {
+                "title": f"{TITLE} — rows {batch['first_row']}-{batch['first_row'] + batch['rows'] - 1}",
+                "data": json.dumps({k: v for k, v in batch.items() if k != "index"}, ensure_ascii=False),
+                "format": "markdown",
+                "model": model,
+            }
+            in_flight[asyncio.create_task(client.generateReportAsync(params))] = batch
+            # Finished sections wait for an earlier batch, which is still in flight.
+            while len(in_flight) + len(finished) >= concurrency:
+                await drain(asyncio.FIRST_COMPLETED)
+        if in_flight:
+            await drain(asyncio.ALL_COMPLETED)
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    summary = dataset.as_dict()
+    params = {"title": TITLE, "data": json.dumps(summary, ensure_ascii=False), "format": "markdown", "model": model}
+    if knowledge:
+        params["knowledge"] = knowledge
+    final = await client.generateReportAsync(params)
+    out.write(f"\n## Overall summary\n\n{_demote(final['content'], 1).strip()}\n\n")
+    out.write(f"## Aggregates ({summary['rows']} rows, {summary['batches']} batches)\n\n")
+    out.write("\n".join(_aggregate_table(summary)) + "\n")
+    return summary
+
+
+def build_analytics_report(
+    client: Any,
+    data_path: Path,
+    out: TextIO,
+    model: str,
+    group_by: list[str] | None = None,
+    date_column: str | None = None,
+    top_n: int = 10,
+    use_cache: bool = True,
+    knowledge: str = "",
+) -> dict[str, Any]:
+    """Send only locally computed result tables to the provider."""
+    import report_analytics
+
+    table = report_analytics.ColumnarCache().load(data_path) if use_cache else report_analytics.load_csv(data_path)
+    result = report_analytics.analyze(table, group_by, date_column, top_n)
+    payload = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    params = {"title": TITLE, "data": payload, "format": "markdown", "model": model}
+    if knowledge:
+        params["knowledge"] = knowledge
+    report = client.generateReport(params)
+
+    out.write(f"# {TITLE}\n\n- Source: `{data_path}`\n- Model: `{model}`\n\n")
+    out.write(f"## Overall summary\n\n{_demote(report['content'], 1).strip()}\n\n## Local analytics\n\n")
+    out.write("\n".join(report_analytics.to_markdown(result)) + "\n")
+    result["payload_chars"] = len(payload)
+    return result
+
+
+def _has_module(name: str) -> bool:
+    # find_spec locates the package without importing it (NumPy/pandas take a while to load).
+    return importlib.util.find_spec(name) is not None
+
+
+def _default_engine() -> str:
+    return "pandas" if _has_module("pandas") else "csv"
+
+
+def knowledge_context(query: str, k: int) -> str:
+    if k <= 0:
+        return ""
+    from bsm_config.src.knowledge import loadKnowledgeIndex
+
+    return loadKnowledgeIndex().contextFor(query, k)
+
+
+def generate(options: argparse.Namespace) -> str:
+    """Write the report described by parsed ``options``; returns a one-line summary."""
+    import asyncio
+
+    from bsm_config.src.api.cache import ResponseCache
+    from bsm_config.src.api.client_factory import APIClientFactory
+
+    data_path = Path(options.data)
+    factory = APIClientFactory.fromProviders([options.provider], cache=ResponseCache.fromEnv())
+    try:
+        client = factory.getPrimaryClient()
+        mode = options.mode
+        if mode == "auto":
+            mode = "analytics" if _has_module("numpy") else "batches"
+
+        knowledge = knowledge_context(options.knowledge_query, options.knowledge_k)
+
+        output_path = Path(options.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as out:
+            if mode == "analytics":
+                result = build_analytics_report(
+                    client, data_path, out, options.model, options.group_by or None, options.date_column, options.top,
+                    not options.no_cache, knowledge,
+                )
+                return f"{result['rows']} rows, {result['payload_chars']} chars sent vs {data_path.stat().st_size} bytes of CSV"
+            engine = _default_engine() if options.engine == "auto" else options.engine
+            summary = asyncio.run(
+                build_report(client, data_path, out, options.model, max(1, options.batch_rows), max(1, options.concurrency), engine, knowledge)
+            )
+            return f"{summary['rows']} rows, {summary['batches']} batches"
+    finally:
+        factory.close()
+
+
+def run_job(payload: dict[str, Any]) -> dict[str, Any]:
+    """Job handler for ``weeklyReport`` jobs queued with ``--enqueue``."""
+    options = argparse.Namespace(**payload)
+    if not Path(options.data).exists():
+        raise FileNotFoundError(f"No data file found at {options.data}")
+    return {"output": options.output, "detail": generate(options)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--provider", required=True)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--data", default="./data/latest.csv")
+    parser.add_argument("--output", default="./reports/weekly-insights.md")
+    parser.add_argument(
+        "--mode", choices=["auto", "analytics", "batches"], default="batches",
+        help="batches: constant memory; analytics: whole file in NumPy columns; auto: analytics when NumPy is installed",
     )
+    parser.add_argument("--group-by", action="append", default=[], help="analytics: text column to group by (repeatable)")
+    parser.add_argument("--date-column", default=None, help="analytics: column for week-over-week and anomalies")
+    parser.add_argument("--top", type=int, default=10, help="analytics: rows per top-N table")
+    parser.add_argument("--no-cache", action="store_true", help="analytics: do not reuse or store the columnar snapshot")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="CSV rows per map batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch requests in flight")
+    parser.add_argument("--engine", choices=["auto", "csv", "pandas"], default="auto", help="Batch aggregation engine")
+    parser.add_argument("--knowledge-k", type=int, default=0, help="Knowledge passages to attach (0: none)")
+    parser.add_argument("--knowledge-query", default=TITLE, help="Query used to retrieve knowledge passages")
+    parser.add_argument("--enqueue", action="store_true", help="Queue the report for the job workers (report_jobs.py worker) and exit")
+    parser.add_argument("--lane", choices=["high", "normal", "low"], default="normal", help="With --enqueue: queue priority lane")
+    parser.add_argument("--idempotency-key", default="", help="With --enqueue: reuse the job already queued under this key")
+    args = parser.parse_args()
+
+    data_path = Path(args.data)
+    if not data_path.exists():
+        print(f"❌ No data file found at {data_path}")
+        sys.exit(1)
+
+    if args.enqueue:
+        from bsm_config.src.jobs import JobQueue
 
-    output_path = Path("./reports/weekly-insights.md")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(report["content"], encoding="utf-8")
+        options = {k: v for k, v in vars(args).items() if k not in ("enqueue", "lane", "idempotency_key")}
+        # Workers may run from another directory.
+        options.update(data=str(data_path.resolve()), output=str(Path(args.output).resolve()))
+        job = JobQueue().submit("weeklyReport", options, lane=args.lane, idempotency_key=args.idempotency_key or None)
+        print(f"📥 Report job {job.id} is {job.status}; follow it with: python scripts/report_jobs.py result {job.id} --wait 600")
+        return
 
-    print(f"✅ Report generated successfully at {output_path}")
+    print(f"✅ Report generated successfully at {args.output} ({generate(args)})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Load-test Lexbank/app.py request paths against a local stand-in backend."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeBackend"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def setup(self) -> None:
+        super().setup()
+        # Stand-in for the TCP+TLS handshake paid by every new connection.
+        self.server.connections += 1
+        if self.server.connect_delay:
+            time.sleep(self.server.connect_delay)
+
+    def _send_json(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self._send_json(200, {"result": f"echo: {request.get('query', '')}"})
+
+
+class FakeBackend(ThreadingHTTPServer):
+    """Threaded HTTP server that answers /health and /api/control/run."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency: float = 0.0, connect_delay: float = 0.0, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), FakeBackendHandler)
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def __enter__(self) -> "FakeBackend":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def _summarize(name: str, latencies: list[float], elapsed: float, connections: int) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2),
+        "connections": connections,
+    }
+
+
+def run_threaded(name: str, call: Callable[[int], Any], backend: FakeBackend, requests: int, concurrency: int) -> dict[str, Any]:
+    def timed(i: int) -> float:
+        started = time.perf_counter()
+        call(i)
+        return time.perf_counter() - started
+
+    opened = backend.connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(requests)))
+    return _summarize(name, latencies, time.perf_counter() - started, backend.connections - opened)
+
+
+def run_async(name: str, call: Callable[[int], Any], backend: FakeBackend, requests: int, concurrency: int) -> dict[str, Any]:
+    async def main() -> list[float]:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def timed(i: int) -> float:
+            async with slots:
+                started = time.perf_counter()
+                await call(i)
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(timed(i) for i in range(requests)))
+
+    opened = backend.connections
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return _summarize(name, latencies, time.perf_counter() - started, backend.connections - opened)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02, help="Backend processing time per request (s)")
+    parser.add_argument("--connect-delay", type=float, default=0.03, help="Emulated handshake cost per connection (s)")
+    parser.add_argument("--output", default="", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    with FakeBackend(args.latency, args.connect_delay) as backend:
+        os.environ["API_BASE"] = backend.url
+        os.environ["API_STREAM"] = "false"
+        os.environ.setdefault("API_POOL_SIZE", str(args.concurrency))
+        sys.path.insert(0, str(ROOT / "Lexbank"))
+        import requests
+
+        import app
+
+        def bare_post(i: int) -> None:
+            requests.post(
+                f"{backend.url}/api/control/run",
+                json={"agents": ["agent-auto"], "query": f"q{i}"},
+                headers={"Connection": "close"},
+                timeout=app.TIMEOUT_SECONDS,
+            ).json()
+
+        async def async_chat(i: int) -> None:
+            await app.chat_async(f"q{i}", [], "agent-auto")
+
+        results = [
+            run_threaded("before: bare requests.post", bare_post, backend, args.requests, args.concurrency),
+            run_threaded("after: pooled session chat()", lambda i: app.chat(f"q{i}", [], "agent-auto"), backend, args.requests, args.concurrency),
+            run_async("after: async chat_async()", async_chat, backend, args.requests, args.concurrency),
+        ]
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,318 @@
 #!/usr/bin/env python3
-"""Suggest lightweight optimizations for *.agent.md files."""
+"""Suggest lightweight optimizations for *.agent.md files.
+
+Each file is streamed once in chunks and every enabled rule sees each line in
+that same pass. Rules register themselves in ``RULES``; their options can be
+overridden with ``--config rules.json`` (``{"size": {"max_chars": 8000},
+"banned_phrases": false}``). Findings are cached in
+``.cache/optimize-agent.json`` by content hash.
+"""
 
 from __future__ import annotations
 
 import argparse
 import glob
+import hashlib
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, ClassVar, TypeVar
 
 ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = ROOT / ".cache" / "optimize-agent.json"
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FileStats:
+    chars: int = 0
+    lines: int = 0
+
+
+class Rule:
+    """A check fed every line of one file, in order, during a single pass.
+
+    A fresh instance is created per file, so subclasses may keep state in
+    ``__init__``; ``finish`` returns the suggestions for that file.
+    """
+
+    name: ClassVar[str] = ""
+
+    def feed(self, line: str, lineno: int) -> None:
+        pass
+
+    def finish(self, stats: FileStats) -> list[str]:
+        return []
+
+
+RULES: dict[str, type[Rule]] = {}
+R = TypeVar("R", bound=type[Rule])
+
+
+def register(cls: R) -> R:
+    RULES[cls.name] = cls
+    return cls
+
+
+@register
+class SizeRule(Rule):
+    name = "size"
+
+    def __init__(self, max_chars: int = 6000) -> None:
+        self.max_chars = max_chars
+
+    def finish(self, stats: FileStats) -> list[str]:
+        if stats.chars > self.max_chars:
+            return [f"is large (>{self.max_chars // 1000}KB): consider trimming prompt scope."]
+        return []
+
+
+@register
+class TodoRule(Rule):
+    name = "todo"
+
+    def __init__(self, marker: str = "TODO") -> None:
+        self.marker = marker
+        self.found = False
+
+    def feed(self, line: str, lineno: int) -> None:
+        if not self.found and self.marker in line:
+            self.found = True
+
+    def finish(self, stats: FileStats) -> list[str]:
+        return [f"contains {self.marker} markers."] if self.found else []
+
+
+@register
+class TokenEstimateRule(Rule):
+    """Rough prompt cost: about four characters per token for mixed text."""
+
+    name = "token_estimate"
+
+    def __init__(self, max_tokens: int = 2000, chars_per_token: float = 4.0) -> None:
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+
+    def finish(self, stats: FileStats) -> list[str]:
+        tokens = int(stats.chars / self.chars_per_token)
+        if tokens > self.max_tokens:
+            return [f"is ~{tokens} tokens (budget {self.max_tokens}): move reference material out of the prompt."]
+        return []
+
+
+@register
+class DuplicateBlockRule(Rule):
+    """Paragraphs (blank-line separated) that repeat, ignoring case and spacing."""
+
+    name = "duplicate_blocks"
+
+    def __init__(self, min_chars: int = 80) -> None:
+        self.min_chars = min_chars
+        self.block: list[str] = []
+        self.block_start = 0
+        self.seen: dict[str, int] = {}
+        self.repeats: list[tuple[int, int]] = []
+
+    def _flush(self) -> None:
+        if self.block:
+            text = " ".join(" ".join(self.block).split()).lower()
+            if len(text) >= self.min_chars:
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                first = self.seen.setdefault(digest, self.block_start)
+                if first != self.block_start:
+                    self.repeats.append((self.block_start, first))
+        self.block = []
+
+    def feed(self, line: str, lineno: int) -> None:
+        if line.strip():
+            if not self.block:
+                self.block_start = lineno
+            self.block.append(line)
+        else:
+            self._flush()
+
+    def finish(self, stats: FileStats) -> list[str]:
+        self._flush()
+        return [f"repeats the prompt block from line {first} at line {line}." for line, first in self.repeats]
+
+
+@register
+class OversizedSectionRule(Rule):
+    """Markdown sections (by heading, outside code fences) above a size budget."""
+
+    name = "oversized_sections"
+    HEADING = re.compile(r"^#{1,6}\s+\S")
+
+    def __init__(self, max_chars: int = 2500) -> None:
+        self.max_chars = max_chars
+        self.in_fence = False
+        self.heading = "(preamble)"
+        self.size = 0
+        self.oversized: list[tuple[str, int]] = []
+
+    def _close(self) -> None:
+        if self.size > self.max_chars:
+            self.oversized.append((self.heading, self.size))
+
+    def feed(self, line: str, lineno: int) -> None:
+        if line.lstrip().startswith(("```", "~~~")):
+            self.in_fence = not self.in_fence
+        elif not self.in_fence and self.HEADING.match(line):
+            self._close()
+            self.heading, self.size = line.strip(), 0
+        self.size += len(line) + 1
+
+    def finish(self, stats: FileStats) -> list[str]:
+        self._close()
+        return [
+            f"section '{heading}' is {size} chars (>{self.max_chars}): split or summarize it."
+            for heading, size in self.oversized
+        ]
+
+
+@register
+class BannedPhraseRule(Rule):
+    name = "banned_phrases"
+    DEFAULT_PHRASES = (
+        "ignore previous instructions",
+        "ignore all previous instructions",
+        "as an ai language model",
+        "do anything now",
+        "lorem ipsum",
+    )
+
+    def __init__(self, phrases: list[str] | tuple[str, ...] = DEFAULT_PHRASES) -> None:
+        self.pattern = _phrase_pattern(tuple(phrases))
+        self.hits: dict[str, int] = {}
+
+    def feed(self, line: str, lineno: int) -> None:
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(line):
+            self.hits.setdefault(match.group(0).lower(), lineno)
+
+    def finish(self, stats: FileStats) -> list[str]:
+        return [f"contains banned phrase '{phrase}' (line {lineno})." for phrase, lineno in self.hits.items()]
+
+
+_phrase_patterns: dict[tuple[str, ...], re.Pattern[str] | None] = {}
+
+
+def _phrase_pattern(phrases: tuple[str, ...]) -> re.Pattern[str] | None:
+    # Compiled once per phrase list rather than once per file.
+    if phrases not in _phrase_patterns:
+        alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True) if p)
+        _phrase_patterns[phrases] = re.compile(alternation, re.IGNORECASE) if alternation else None
+    return _phrase_patterns[phrases]
+
+
+RuleSpec = list[tuple[type[Rule], dict[str, Any]]]
+
+
+def load_rules(config: dict[str, Any] | None = None, disabled: list[str] | None = None) -> RuleSpec:
+    """Resolve enabled rules and their options from a config mapping."""
+    config = config or {}
+    unknown = (set(config) | set(disabled or [])) - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown rule(s): {', '.join(sorted(unknown))}; available: {', '.join(RULES)}")
+    spec: RuleSpec = []
+    for name, cls in RULES.items():
+        options = config.get(name, {})
+        if options is False or name in (disabled or []):
+            continue
+        spec.append((cls, options if isinstance(options, dict) else {}))
+    return spec
+
+
+def scan_file(path: Path, rules: RuleSpec) -> list[str]:
+    """Stream ``path`` once in chunks, feeding every line to every rule."""
+    active = [cls(**options) for cls, options in rules]
+    feeders: list[Callable[[str, int], None]] = [r.feed for r in active if type(r).feed is not Rule.feed]
+    stats = FileStats()
+    pending = ""
+    with path.open("r", encoding="utf-8") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            stats.chars += len(chunk)
+            lines = (pending + chunk).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                stats.lines += 1
+                for feed in feeders:
+                    feed(line, stats.lines)
+    if pending:
+        stats.lines += 1
+        for feed in feeders:
+            feed(pending, stats.lines)
+    return [message for rule in active for message in rule.finish(stats)]
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rules_fingerprint(rules: RuleSpec) -> str:
+    """Identifies the rule set and this engine; cached findings are only reused for a match."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(json.dumps([(cls.name, options) for cls, options in rules], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FindingsCache:
+    """Findings per file content hash, valid for one rules fingerprint."""
+
+    def __init__(self, path: Path | None, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries: dict[str, list[str]] = {}
+        self.dirty = False
+        if path and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("rules") == fingerprint:
+                self.entries = data.get("files", {})
+        self._used: set[str] = set()
+
+    def get(self, digest: str) -> list[str] | None:
+        found = self.entries.get(digest)
+        if found is not None:
+            self._used.add(digest)
+        return found
+
+    def put(self, digest: str, findings: list[str]) -> None:
+        self.entries[digest] = findings
+        self._used.add(digest)
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        # Only content seen in this run is kept, so the file does not grow forever.
+        entries = {k: v for k, v in self.entries.items() if k in self._used}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"rules": self.fingerprint, "files": entries}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def analyze(path: Path, rules: RuleSpec, cache: FindingsCache | None) -> list[str]:
+    digest = file_digest(path) if cache else ""
+    if cache:
+        cached = cache.get(digest)
+        if cached is not None:
+            return cached
+    findings = scan_file(path, rules)
+    if cache:
+        cache.put(digest, findings)
+    return findings
 
 
 def find_targets() -> list[Path]:
@@ -20,19 +324,26 @@ def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--pr-number", default="")
+    parser.add_argument("--config", default="", help="JSON file with per-rule options (false disables a rule)")
+    parser.add_argument("--disable", action="append", default=[], help=f"Rule to skip (repeatable): {', '.join(RULES)}")
+    parser.add_argument("--jobs", type=int, default=8, help="Files scanned concurrently")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH), help="Findings cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the cache")
     args = parser.parse_args()
 
-    optimize_needed = False
-    suggestions: list[str] = []
-
-    for path in find_targets():
-        text = path.read_text(encoding="utf-8")
-        if len(text) > 6000:
-            optimize_needed = True
-            suggestions.append(f"{path.relative_to(ROOT)} is large (>6KB): consider trimming prompt scope.")
-        if "TODO" in text:
-            optimize_needed = True
-            suggestions.append(f"{path.relative_to(ROOT)} contains TODO markers.")
+    config = json.loads(Path(args.config).read_text(encoding="utf-8")) if args.config else {}
+    rules = load_rules(config, args.disable)
+    cache = None if args.no_cache else FindingsCache(Path(args.cache), rules_fingerprint(rules))
+
+    targets = find_targets()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        # map() keeps target order, so the report is stable across runs.
+        findings = list(pool.map(lambda path: analyze(path, rules, cache), targets))
+    if cache:
+        cache.save()
+
+    suggestions = [f"{path.relative_to(ROOT)} {message}" for path, messages in zip(targets, findings) for message in messages]
+    optimize_needed = bool(suggestions)
 
     if suggestions:
         print("Optimization suggestions:")
@@ -4,10 +4,31 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import hashlib
+import heapq
 import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
-from urllib.request import Request, urlopen
+from typing import Any, Callable, Iterable, Iterator, TextIO
+from urllib.error import HTTPError, URLError
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bsm_config.src.instrumentation import TELEMETRY, counter, histogram, propagate, span, traced
+
+DEFAULT_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_REQUESTS = counter("bsm_github_requests_total", "GitHub API responses by result")
+GITHUB_SECONDS = histogram("bsm_github_request_seconds", "GitHub API request latency")
 
 
 P0_KEYWORDS = {
@@ -19,46 +40,411 @@ P1_KEYWORDS = {
     "roadmap", "docs", "documentation", "ci", "workflow",
 }
 CLOSE_REASON_KEYWORDS = {"wip", "draft", "experiment", "spike", "duplicate"}
+P0_LABELS = {"security", "sev0", "blocker"}
+P1_LABELS = {"release", "feature", "p1"}
 
 
-def gh_get(url: str) -> Any:
-    req = Request(url, headers={"Accept": "application/vnd.github+json", "User-Agent": "wejdan-agent"})
-    with urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+class GitHubClient:
+    """Small GitHub REST client with an ETag page cache and rate-limit pacing.
 
+    Every GET is sent with ``If-None-Match`` when a cached copy exists; a 304
+    answer is served from ``cache_dir`` and does not count against the rate
+    limit. When the remaining budget runs out, or GitHub answers 403/429 with
+    rate-limit headers, callers sleep until the advertised reset.
+    """
 
-def fetch_pulls(repo: str, state: str, per_page: int = 100, limit: int | None = None) -> list[dict[str, Any]]:
-    pulls: list[dict[str, Any]] = []
-    page = 1
-    while True:
-        data = gh_get(f"https://api.github.com/repos/{repo}/pulls?state={state}&per_page={per_page}&page={page}")
-        if not data:
-            break
-        pulls.extend(data)
-        if limit and len(pulls) >= limit:
-            return pulls[:limit]
-        if len(data) < per_page:
-            break
-        page += 1
-    return pulls
+    def __init__(
+        self,
+        api_url: str = DEFAULT_API_URL,
+        token: str | None = None,
+        cache_dir: str | os.PathLike[str] | None = None,
+        workers: int = 4,
+        max_retries: int = 3,
+        max_wait: float = 300.0,
+    ) -> None:
+        self.api_url = api_url.rstrip("/")
+        self.token = token
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "not_modified": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self._remaining: int | None = None
+        self._reset_at: float | None = None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+    def _cache_path(self, url: str) -> Path | None:
+        if not self.cache_dir:
+            return None
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
 
-def classify(pr: dict[str, Any]) -> str:
-    title = (pr.get("title") or "").lower()
-    if any(k in title for k in P0_KEYWORDS):
-        return "P0"
-    labels = {lbl["name"].lower() for lbl in pr.get("labels", [])}
-    if {"security", "sev0", "blocker"} & labels:
+    def _load_cached(self, url: str) -> dict[str, Any] | None:
+        path = self._cache_path(url)
+        if not path or not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, url: str, etag: str, link: str, body: Any) -> None:
+        path = self._cache_path(url)
+        if not path:
+            return
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"etag": etag, "link": link, "body": body}), encoding="utf-8")
+        tmp.replace(path)
+
+    def _update_rate_limit(self, headers: Any) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        with self._lock:
+            if remaining is not None:
+                self._remaining = int(remaining)
+            if reset is not None:
+                self._reset_at = float(reset)
+
+    def _pace(self) -> None:
+        with self._lock:
+            exhausted = self._remaining is not None and self._remaining <= 0
+            reset_at = self._reset_at
+        if exhausted and reset_at:
+            delay = reset_at - time.time()
+            if delay > 0:
+                time.sleep(min(delay, self.max_wait))
+            with self._lock:
+                self._remaining = None
+
+    def get(self, url: str) -> tuple[Any, str]:
+        """Return ``(json_body, link_header)`` for ``url``."""
+        from urllib.request import Request, urlopen
+
+        if url.startswith("/"):
+            url = f"{self.api_url}{url}"
+        headers = {"Accept": "application/vnd.github+json", "User-Agent": "wejdan-agent"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        cached = self._load_cached(url)
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        for attempt in range(self.max_retries + 1):
+            self._pace()
+            with self._lock:
+                self.stats["requests"] += 1
+            started = time.perf_counter()
+            with span("github.get", url=url, attempt=attempt) as current:
+                try:
+                    with urlopen(Request(url, headers=headers), timeout=30) as resp:
+                        self._update_rate_limit(resp.headers)
+                        body = json.loads(resp.read().decode("utf-8"))
+                        link = resp.headers.get("Link", "")
+                        etag = resp.headers.get("ETag")
+                        if etag:
+                            self._store_cached(url, etag, link, body)
+                        self._observe(started, "ok", current)
+                        return body, link
+                except HTTPError as exc:
+                    self._update_rate_limit(exc.headers)
+                    if exc.code == 304 and cached:
+                        with self._lock:
+                            self.stats["not_modified"] += 1
+                        self._observe(started, "not_modified", current)
+                        return cached["body"], cached.get("link", "")
+                    if exc.code in (403, 429) and attempt < self.max_retries and self._is_rate_limited(exc.headers):
+                        with self._lock:
+                            self.stats["rate_limited"] += 1
+                        self._observe(started, "rate_limited", current)
+                        time.sleep(self._retry_delay(exc.headers))
+                        continue
+                    self._observe(started, "error", current)
+                    raise
+        raise RuntimeError(f"GitHub request kept failing: {url}")
+
+    @staticmethod
+    def _observe(started: float, result: str, current: Any) -> None:
+        GITHUB_REQUESTS.add(result=result)
+        GITHUB_SECONDS.observe(time.perf_counter() - started)
+        current.setAttribute("result", result)
+
+    @staticmethod
+    def _is_rate_limited(headers: Any) -> bool:
+        return headers.get("Retry-After") is not None or headers.get("X-RateLimit-Remaining") == "0"
+
+    def _retry_delay(self, headers: Any) -> float:
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            return min(float(retry_after), self.max_wait)
+        reset = headers.get("X-RateLimit-Reset")
+        if reset is not None:
+            return min(max(float(reset) - time.time(), 1.0), self.max_wait)
+        return 1.0
+
+
+def gh_get(url: str, client: GitHubClient | None = None) -> Any:
+    return (client or GitHubClient()).get(url)[0]
+
+
+def _last_page(link: str) -> int | None:
+    match = re.search(r'[?&]page=(\d+)[^>]*>;\s*rel="last"', link)
+    return int(match.group(1)) if match else None
+
+
+def _parse_ts(value: str) -> dt.datetime:
+    return dt.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _iter_pages(
+    url: str,
+    per_page: int,
+    client: GitHubClient,
+    limit: int | None = None,
+    stop: Callable[[list[dict[str, Any]]], bool] | None = None,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield list pages in order, fetching up to ``client.workers`` at once.
+
+    Paging ends on a short page, once ``limit`` items were seen, or when
+    ``stop(page)`` is true. At most one batch of pages is held in memory.
+    """
+    first, link = client.get(f"{url}&page=1")
+    last_page = _last_page(link)
+    if limit:
+        needed = -(-limit // per_page)
+        last_page = min(last_page, needed) if last_page else needed
+    seen = 0
+
+    def page_done(data: list[dict[str, Any]]) -> bool:
+        if not data or len(data) < per_page:
+            return True
+        if stop is not None and stop(data):
+            return True
+        return limit is not None and seen >= limit
+
+    seen += len(first)
+    yield first
+    if page_done(first):
+        return
+
+    next_page = 2
+    with ThreadPoolExecutor(max_workers=client.workers) as pool:
+        while last_page is None or next_page <= last_page:
+            end = next_page + client.workers if last_page is None else min(next_page + client.workers, last_page + 1)
+            batch = list(pool.map(propagate(lambda n: client.get(f"{url}&page={n}")[0]), range(next_page, end)))
+            next_page = end
+            for data in batch:
+                seen += len(data)
+                yield data
+                if page_done(data):
+                    return
+
+
+def iter_pulls(
+    repo: str,
+    state: str,
+    per_page: int = 100,
+    limit: int | None = None,
+    since: dt.datetime | None = None,
+    client: GitHubClient | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Stream PRs page by page; see :func:`fetch_pulls` for the arguments."""
+    client = client or GitHubClient()
+    url = f"/repos/{repo}/pulls?state={state}&per_page={per_page}"
+    stop = None
+    if since is not None:
+        url += "&sort=updated&direction=desc"
+        stop = lambda data: _parse_ts(data[-1]["updated_at"]) < since  # noqa: E731
+
+    count = 0
+    for page in _iter_pages(url, per_page, client, limit=limit, stop=stop):
+        for pr in page:
+            if since is not None and _parse_ts(pr["updated_at"]) < since:
+                continue
+            yield pr
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+@traced("github.fetch_pulls")
+def fetch_pulls(
+    repo: str,
+    state: str,
+    per_page: int = 100,
+    limit: int | None = None,
+    since: dt.datetime | None = None,
+    client: GitHubClient | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch PRs page by page, fetching up to ``client.workers`` pages at once.
+
+    With ``since`` the list is requested newest-updated first and paging stops
+    at the first page that reaches past ``since``; PRs updated before it are
+    dropped.
+    """
+    return list(iter_pulls(repo, state, per_page=per_page, limit=limit, since=since, client=client))
+
+
+def list_org_repos(org: str, client: GitHubClient | None = None, include_archived: bool = False) -> list[str]:
+    """Return ``owner/name`` for every repository in ``org``, sorted by name."""
+    client = client or GitHubClient()
+    repos = []
+    for page in _iter_pages(f"/orgs/{org}/repos?type=all&per_page=100", 100, client):
+        repos.extend(r["full_name"] for r in page if include_archived or not r.get("archived"))
+    return sorted(repos, key=str.lower)
+
+
+def _boundary_at(text: str, index: int) -> bool:
+    return (text[index - 1].isalnum() or text[index - 1] == "_") != (text[index].isalnum() or text[index] == "_")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return f"(?:{'|'.join(branches)})?"
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Every keyword tier compiled into one regex and matched in one pass.
+
+    Keywords are folded into a trie-shaped pattern, so the regex engine
+    checks one branch per character instead of every keyword. The pattern
+    sits inside a lookahead to report the longest keyword at every position.
+    A hit on a keyword also counts for every shorter keyword that is a prefix
+    of it, which keeps the result identical to running ``k in text`` for each
+    keyword separately. With ``word_boundary`` keywords only match as whole
+    words.
+    """
+
+    def __init__(self, tiers: dict[str, Iterable[str]], word_boundary: bool = False) -> None:
+        keyword_tiers: dict[str, set[str]] = {}
+        for tier, words in tiers.items():
+            for word in words:
+                if word:
+                    keyword_tiers.setdefault(word.lower(), set()).add(tier)
+
+        self.word_boundary = word_boundary
+        self._closure: dict[str, frozenset[str]] = {}
+        for keyword in keyword_tiers:
+            implied: set[str] = set()
+            for other, other_tiers in keyword_tiers.items():
+                if keyword.startswith(other) and (
+                    not word_boundary or other == keyword or _boundary_at(keyword, len(other))
+                ):
+                    implied |= other_tiers
+            self._closure[keyword] = frozenset(implied)
+
+        edge = r"\b" if word_boundary else ""
+        trie = _trie_pattern(keyword_tiers)
+        self._probe = re.compile(f"{edge}(?:{trie}){edge}" if edge else trie) if keyword_tiers else None
+        self._scan = re.compile(f"(?=({edge}(?:{trie}){edge}))") if keyword_tiers else None
+
+    def tiers(self, text: str) -> frozenset[str]:
+        """Return every tier with at least one keyword in ``text``."""
+        if self._probe is None or not text:
+            return frozenset()
+        text = text.lower()
+        first = self._probe.search(text)
+        if first is None:
+            return frozenset()
+        hits = set(self._scan.findall(text, first.start()))
+        if len(hits) == 1:
+            return self._closure[hits.pop()]
+        return frozenset().union(*(self._closure[hit] for hit in hits))
+
+
+@dataclass(frozen=True)
+class TriageRules:
+    matcher: KeywordMatcher
+    p0_labels: frozenset[str]
+    p1_labels: frozenset[str]
+
+    @classmethod
+    def build(
+        cls,
+        p0: Iterable[str] = P0_KEYWORDS,
+        p1: Iterable[str] = P1_KEYWORDS,
+        close: Iterable[str] = CLOSE_REASON_KEYWORDS,
+        p0_labels: Iterable[str] = P0_LABELS,
+        p1_labels: Iterable[str] = P1_LABELS,
+        word_boundary: bool = False,
+    ) -> "TriageRules":
+        matcher = KeywordMatcher({"P0": p0, "P1": p1, "close": close}, word_boundary=word_boundary)
+        return cls(matcher, frozenset(x.lower() for x in p0_labels), frozenset(x.lower() for x in p1_labels))
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike[str], word_boundary: bool | None = None) -> "TriageRules":
+        """Load keyword tiers from JSON.
+
+        Expected keys: ``P0``, ``P1``, ``close`` (keyword lists), optional
+        ``labels`` ({"P0": [...], "P1": [...]}) and ``word_boundary``. Missing
+        tiers fall back to the built-in defaults.
+        """
+        config = json.loads(Path(path).read_text(encoding="utf-8"))
+        labels = config.get("labels", {})
+        return cls.build(
+            p0=config.get("P0", P0_KEYWORDS),
+            p1=config.get("P1", P1_KEYWORDS),
+            close=config.get("close", CLOSE_REASON_KEYWORDS),
+            p0_labels=labels.get("P0", P0_LABELS),
+            p1_labels=labels.get("P1", P1_LABELS),
+            word_boundary=config.get("word_boundary", False) if word_boundary is None else word_boundary,
+        )
+
+
+DEFAULT_RULES = TriageRules.build()
+
+
+@dataclass(slots=True)
+class PullFacts:
+    """Per-PR values derived once and shared by classify/decision/summary."""
+
+    pr: dict[str, Any]
+    tiers: frozenset[str]
+    labels: frozenset[str]
+    created_at: dt.datetime
+    closed_at: dt.datetime | None
+
+
+def prepare(pr: dict[str, Any], rules: TriageRules = DEFAULT_RULES) -> PullFacts:
+    closed_at = pr.get("closed_at")
+    return PullFacts(
+        pr=pr,
+        tiers=rules.matcher.tiers(pr.get("title") or ""),
+        labels=frozenset(lbl["name"].lower() for lbl in pr.get("labels", [])),
+        created_at=_parse_ts(pr["created_at"]),
+        closed_at=_parse_ts(closed_at) if closed_at else None,
+    )
+
+
+def classify(pr: dict[str, Any] | PullFacts, rules: TriageRules = DEFAULT_RULES) -> str:
+    facts = pr if isinstance(pr, PullFacts) else prepare(pr, rules)
+    if "P0" in facts.tiers or rules.p0_labels & facts.labels:
         return "P0"
-    if any(k in title for k in P1_KEYWORDS) or {"release", "feature", "p1"} & labels:
+    if "P1" in facts.tiers or rules.p1_labels & facts.labels:
         return "P1"
     return "P2"
 
 
-def decision(pr: dict[str, Any], priority: str, now: dt.datetime) -> tuple[str, str]:
-    title = (pr.get("title") or "").lower()
-    age_days = (now - dt.datetime.fromisoformat(pr["created_at"].replace("Z", "+00:00"))).days
-    if pr.get("draft"):
+def decision(
+    pr: dict[str, Any] | PullFacts, priority: str, now: dt.datetime, rules: TriageRules = DEFAULT_RULES
+) -> tuple[str, str]:
+    facts = pr if isinstance(pr, PullFacts) else prepare(pr, rules)
+    age_days = (now - facts.created_at).days
+    if facts.pr.get("draft"):
         return "request changes", "PR مسودة (Draft) ويحتاج استكمال قبل الدمج"
     if priority == "P0":
         return "merge", "تصنيف P0 ولا تظهر مؤشرات تمنع الدمج السريع"
@@ -66,83 +452,332 @@ def decision(pr: dict[str, Any], priority: str, now: dt.datetime) -> tuple[str,
         if age_days > 30:
             return "request changes", "مرتبط بإطلاق لكن عمره مرتفع ويحتاج تحديث قبل الدمج"
         return "merge", "ميزة مرتبطة بالإطلاق وقابلة للدمج بعد مراجعة سريعة"
-    if any(k in title for k in CLOSE_REASON_KEYWORDS) or age_days > 60:
+    if "close" in facts.tiers or age_days > 60:
         return "close", "PR غير حرج/قديم أو تجريبي؛ الإغلاق أفضل لتقليل الضوضاء"
     return "request changes", "تحسين غير حرج ويحتاج تنقيح قبل القرار النهائي"
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--repo", default="LexBANK/BSM")
-    parser.add_argument("--open-limit", type=int, default=9)
-    parser.add_argument("--output", default="reports/WEEKLY-PR-TRIAGE.md")
-    args = parser.parse_args()
+PRIORITIES = ("P0", "P1", "P2")
 
-    now = dt.datetime.now(dt.timezone.utc)
-    open_prs = fetch_pulls(args.repo, "open", limit=args.open_limit)
-    open_prs.sort(key=lambda p: p["created_at"])
 
-    triage_rows = []
-    for pr in open_prs:
-        prio = classify(pr)
-        action, reason = decision(pr, prio, now)
-        triage_rows.append({"number": pr["number"], "title": pr["title"], "priority": prio, "decision": action, "reason": reason})
+def _row_key(row: dict[str, Any]) -> tuple[str, int]:
+    return row["priority"], row["number"]
+
 
-    triage_rows.sort(key=lambda r: (r["priority"], r["number"]))
+class SortedSpool:
+    """Collect rows in ``_row_key`` order without holding them all in memory.
+
+    Rows are buffered ``run_size`` at a time; each full buffer is sorted and
+    spilled to a temporary JSONL file, and iteration merges the runs.
+    """
+
+    def __init__(self, run_size: int = 1000) -> None:
+        self.run_size = run_size
+        self._buffer: list[dict[str, Any]] = []
+        self._runs: list[TextIO] = []
+
+    def add(self, row: dict[str, Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.run_size:
+            self.spill()
+
+    def spill(self) -> None:
+        """Move buffered rows to a sorted run on disk."""
+        if not self._buffer:
+            return
+        run = tempfile.TemporaryFile("w+", encoding="utf-8")
+        for row in sorted(self._buffer, key=_row_key):
+            run.write(json.dumps(row, ensure_ascii=False) + "\n")
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        runs = [(json.loads(line) for line in run) for run in self._runs]
+        return heapq.merge(*runs, sorted(self._buffer, key=_row_key), key=_row_key)
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+
+@dataclass
+class RepoTriage:
+    """Counters and spooled triage rows for one repository."""
+
+    repo: str
+    rows: SortedSpool = field(default_factory=SortedSpool)
+    open_count: int = 0
+    closed_count: int = 0
+    merged_count: int = 0
+    age_days_total: int = 0
+    priorities: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PRIORITIES, 0))
+    error: str | None = None
+
+    @property
+    def avg_age(self) -> float:
+        return self.age_days_total / self.open_count if self.open_count else 0.0
+
+
+def triage_repo(
+    repo: str,
+    now: dt.datetime,
+    client: GitHubClient,
+    rules: TriageRules = DEFAULT_RULES,
+    open_limit: int | None = None,
+) -> RepoTriage:
+    """Classify open PRs and count last week's closed/merged PRs as they stream in."""
+    result = RepoTriage(repo)
+    with span("triage.open", repo=repo):
+        for pr in iter_pulls(repo, "open", limit=open_limit, client=client):
+            facts = prepare(pr, rules)
+            prio = classify(facts, rules)
+            action, reason = decision(facts, prio, now, rules)
+            result.rows.add(
+                {"repo": repo, "number": pr["number"], "title": pr["title"], "priority": prio, "decision": action, "reason": reason}
+            )
+            result.open_count += 1
+            result.priorities[prio] += 1
+            result.age_days_total += (now - facts.created_at).days
 
-    closed_week = fetch_pulls(args.repo, "closed")
     week_ago = now - dt.timedelta(days=7)
-    closed_count = 0
-    merged_count = 0
-    for pr in closed_week:
-        closed_at = dt.datetime.fromisoformat(pr["closed_at"].replace("Z", "+00:00"))
-        if closed_at >= week_ago:
-            if pr.get("merged_at"):
-                merged_count += 1
-            else:
-                closed_count += 1
-
-    ages = []
-    for pr in open_prs:
-        created = dt.datetime.fromisoformat(pr["created_at"].replace("Z", "+00:00"))
-        ages.append((now - created).days)
-    avg_age = (sum(ages) / len(ages)) if ages else 0.0
-
-    lines = [
-        "# تقرير الفرز الأسبوعي للـ PRs",
-        "",
-        f"- المستودع: `{args.repo}`",
-        f"- وقت التوليد (UTC): {now.isoformat()}",
-        f"- عدد PRs المفتوحة (ضمن نطاق العمل): {len(open_prs)}",
-        "",
-        "## ترتيب التنفيذ (P0 ثم P1 ثم P2)",
-        "",
-        "| PR | الأولوية | قرار خلال 72 ساعة | السبب |",
-        "|---|---|---|---|",
-    ]
-
-    for row in triage_rows:
-        lines.append(
-            f"| #{row['number']} - {row['title']} | {row['priority']} | **{row['decision']}** | {row['reason']} |"
-        )
+    with span("triage.closed", repo=repo):
+        for pr in iter_pulls(repo, "closed", since=week_ago, client=client):
+            if _parse_ts(pr["closed_at"]) >= week_ago:
+                if pr.get("merged_at"):
+                    result.merged_count += 1
+                else:
+                    result.closed_count += 1
+    # Finished repositories may wait for earlier ones to be written; keep
+    # their rows on disk meanwhile.
+    result.rows.spill()
+    return result
 
-    lines.extend(
-        [
-            "",
-            "## ملخص أسبوعي",
-            "",
-            f"- المفتوحة: **{len(open_prs)}**",
-            f"- المغلقة (بدون دمج) خلال آخر 7 أيام: **{closed_count}**",
-            f"- المدمجة خلال آخر 7 أيام: **{merged_count}**",
-            f"- متوسط عمر PR المفتوح: **{avg_age:.1f} يوم**",
+
+def map_window(pool: ThreadPoolExecutor, fn: Callable[[Any], Any], items: Iterable[Any], window: int) -> Iterator[Any]:
+    """``pool.map`` with at most ``window`` items submitted but not yet consumed.
+
+    Results still come back in input order, but a finished repository's
+    spooled rows (an open temporary file each) wait for at most ``window``
+    earlier ones instead of the whole organization.
+    """
+    pending: deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class TriageReportWriter:
+    """Write the Markdown report (and optional JSONL) one repository at a time.
+
+    With a single repository the layout matches the original weekly report;
+    with several, each gets its own section followed by an aggregate summary.
+    """
+
+    TABLE_HEADER = ["| PR | الأولوية | قرار خلال 72 ساعة | السبب |", "|---|---|---|---|"]
+
+    def __init__(
+        self,
+        output: str | os.PathLike[str],
+        now: dt.datetime,
+        repos: list[str],
+        jsonl: str | os.PathLike[str] | None = None,
+        org: str | None = None,
+    ) -> None:
+        self.path = Path(output)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.now = now
+        self.single = len(repos) == 1 and not org
+        self._out = self.path.open("w", encoding="utf-8")
+        self._jsonl: TextIO | None = None
+        if jsonl:
+            Path(jsonl).parent.mkdir(parents=True, exist_ok=True)
+            self._jsonl = Path(jsonl).open("w", encoding="utf-8")
+        self.totals = RepoTriage(org or "all")
+        self.repo_count = 0
+        self.failed: list[str] = []
+        if not self.single:
+            scope = f"`{org}` ({len(repos)} مستودع)" if org else ", ".join(f"`{r}`" for r in repos)
+            self._write(["# تقرير الفرز الأسبوعي للـ PRs", "", f"- النطاق: {scope}", f"- وقت التوليد (UTC): {now.isoformat()}"])
+
+    def _write(self, lines: list[str]) -> None:
+        self._out.write("\n".join(lines) + "\n")
+
+    def _summary_lines(self, result: RepoTriage) -> list[str]:
+        return [
+            f"- المفتوحة: **{result.open_count}**",
+            f"- المغلقة (بدون دمج) خلال آخر 7 أيام: **{result.closed_count}**",
+            f"- المدمجة خلال آخر 7 أيام: **{result.merged_count}**",
+            f"- متوسط عمر PR المفتوح: **{result.avg_age:.1f} يوم**",
         ]
+
+    def write_repo(self, result: RepoTriage) -> None:
+        if self.single:
+            self._write(
+                [
+                    "# تقرير الفرز الأسبوعي للـ PRs",
+                    "",
+                    f"- المستودع: `{result.repo}`",
+                    f"- وقت التوليد (UTC): {self.now.isoformat()}",
+                    f"- عدد PRs المفتوحة (ضمن نطاق العمل): {result.open_count}",
+                    "",
+                    "## ترتيب التنفيذ (P0 ثم P1 ثم P2)",
+                    "",
+                    *self.TABLE_HEADER,
+                ]
+            )
+        else:
+            self._write(["", f"## `{result.repo}`", ""])
+            if result.error:
+                self.failed.append(result.repo)
+                self._write([f"- تعذّر جلب البيانات: `{result.error}`"])
+                self._out.flush()
+                return
+            self._write(
+                [f"- عدد PRs المفتوحة (ضمن نطاق العمل): {result.open_count}", "", "### ترتيب التنفيذ (P0 ثم P1 ثم P2)", "", *self.TABLE_HEADER]
+            )
+
+        for row in result.rows:
+            self._out.write(
+                f"| #{row['number']} - {row['title']} | {row['priority']} | **{row['decision']}** | {row['reason']} |\n"
+            )
+            if self._jsonl:
+                self._jsonl.write(json.dumps({"type": "pr", **row}, ensure_ascii=False) + "\n")
+        result.rows.close()
+
+        heading = "## ملخص أسبوعي" if self.single else "### ملخص أسبوعي"
+        self._write(["", heading, "", *self._summary_lines(result)])
+        if self._jsonl:
+            summary = {
+                "type": "repo",
+                "repo": result.repo,
+                "open": result.open_count,
+                "closed": result.closed_count,
+                "merged": result.merged_count,
+                "avg_age_days": round(result.avg_age, 1),
+                "priorities": result.priorities,
+            }
+            self._jsonl.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        self._out.flush()
+
+        self.repo_count += 1
+        totals = self.totals
+        totals.open_count += result.open_count
+        totals.closed_count += result.closed_count
+        totals.merged_count += result.merged_count
+        totals.age_days_total += result.age_days_total
+        for prio, count in result.priorities.items():
+            totals.priorities[prio] += count
+
+    def close(self) -> None:
+        if not self.single:
+            totals = self.totals
+            self._write(
+                [
+                    "",
+                    "## الملخص الإجمالي",
+                    "",
+                    f"- المستودعات: **{self.repo_count}**" + (f" (تعذّر جلب {len(self.failed)})" if self.failed else ""),
+                    *self._summary_lines(totals),
+                    "- التوزيع حسب الأولوية: " + " / ".join(f"{p}: **{totals.priorities[p]}**" for p in PRIORITIES),
+                ]
+            )
+            if self._jsonl:
+                summary = {
+                    "type": "summary",
+                    "repos": self.repo_count,
+                    "failed": self.failed,
+                    "open": totals.open_count,
+                    "closed": totals.closed_count,
+                    "merged": totals.merged_count,
+                    "avg_age_days": round(totals.avg_age, 1),
+                    "priorities": totals.priorities,
+                }
+                self._jsonl.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        self._out.close()
+        if self._jsonl:
+            self._jsonl.close()
+
+    def __enter__(self) -> "TriageReportWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", action="append", default=[], help="owner/name (repeatable; default LexBANK/BSM)")
+    parser.add_argument("--org", default="", help="Triage every non-archived repository in this organization")
+    parser.add_argument("--open-limit", type=int, default=9, help="Open PRs per repository; 0 means all")
+    parser.add_argument("--output", default="reports/WEEKLY-PR-TRIAGE.md")
+    parser.add_argument("--jsonl", default="", help="Also write one JSON object per PR/repository to this file")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL)
+    parser.add_argument("--cache-dir", default=".cache/pr-triage", help="ETag page cache; empty string disables it")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent page fetches per repository")
+    parser.add_argument("--repo-workers", type=int, default=4, help="Repositories triaged concurrently")
+    parser.add_argument("--keywords", default="", help="JSON file with P0/P1/close keyword tiers")
+    parser.add_argument("--word-boundary", action="store_true", help="Match keywords as whole words only")
+    parser.add_argument("--metrics-out", default="", help="Write timings here at exit (.json: OTLP, else Prometheus text)")
+    args = parser.parse_args()
+    if args.metrics_out:
+        TELEMETRY.configure(out=args.metrics_out)
+
+    if args.keywords:
+        rules = TriageRules.from_file(args.keywords, word_boundary=args.word_boundary or None)
+    elif args.word_boundary:
+        rules = TriageRules.build(word_boundary=True)
+    else:
+        rules = DEFAULT_RULES
+
+    client = GitHubClient(
+        api_url=args.api_url,
+        token=os.getenv("GITHUB_TOKEN") or os.getenv("GH_TOKEN"),
+        cache_dir=args.cache_dir or None,
+        workers=args.workers,
     )
+    now = dt.datetime.now(dt.timezone.utc)
+    repos = list(dict.fromkeys(args.repo))
+    if args.org:
+        repos = list(dict.fromkeys(repos + list_org_repos(args.org, client)))
+    elif not repos:
+        repos = ["LexBANK/BSM"]
+    single = len(repos) == 1 and not args.org
+
+    def run(repo: str) -> RepoTriage:
+        try:
+            with span("triage.repo", repo=repo):
+                return triage_repo(repo, now, client, rules, open_limit=args.open_limit or None)
+        except (HTTPError, URLError, RuntimeError) as exc:
+            if single:
+                raise
+            return RepoTriage(repo, error=str(exc))
+
+    with span("triage.run", repos=len(repos)), TriageReportWriter(
+        args.output, now, repos, jsonl=args.jsonl or None, org=args.org or None
+    ) as writer:
+        workers = max(1, args.repo_workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Results come back in submission order, so sections are written in
+            # repository order while the next few repositories are fetching.
+            for result in map_window(pool, propagate(run), repos, workers * 2):
+                writer.write_repo(result)
 
-    out = Path(args.output)
-    out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    print(f"Wrote {out}")
+    print(f"Wrote {writer.path}")
+    if writer.failed:
+        print(f"Could not triage: {', '.join(writer.failed)}", file=sys.stderr)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""Columnar analytics over the weekly CSV, run locally before the AI report.
+
+The CSV is loaded once into NumPy arrays (floats for numeric columns,
+``datetime64[D]`` for dates, integer codes for text) and cached as ``.npz``
+keyed by the file's size/mtime and content hash. Group-bys, week-over-week
+deltas, top-N tables and anomaly flags are computed on those arrays, and
+only the resulting small tables are sent to the provider.
+
+    python scripts/report_analytics.py data/latest.csv --group-by agent
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT / ".cache" / "report-analytics"
+# Bump when the cached array layout or column inference changes.
+CACHE_FORMAT = 1
+MAX_GROUP_CARDINALITY = 50
+# Share of filled cells that must parse as numbers for a numeric column; the
+# rest become NaN and are reported as missing.
+NUMERIC_THRESHOLD = 0.9
+DATE_HINTS = ("date", "day", "time", "week", "timestamp")
+
+
+@dataclass
+class ColumnarTable:
+    """A CSV as typed NumPy columns, in the file's column order."""
+
+    rows: int = 0
+    kinds: dict[str, str] = field(default_factory=dict)
+    numeric: dict[str, np.ndarray] = field(default_factory=dict)
+    dates: dict[str, np.ndarray] = field(default_factory=dict)
+    codes: dict[str, np.ndarray] = field(default_factory=dict)
+    categories: dict[str, list[str]] = field(default_factory=dict)
+
+    def text(self, name: str) -> np.ndarray:
+        """Decoded text column (missing values as "")."""
+        cats = np.array(self.categories[name] + [""], dtype=object)
+        return cats[self.codes[name]]
+
+
+def _parse_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        return math.nan
+    return number if math.isfinite(number) else math.nan
+
+
+def _parse_dates(values: list[str]) -> np.ndarray:
+    cleaned = [v[:10] if v else "NaT" for v in values]
+    try:
+        return np.array(cleaned, dtype="datetime64[D]")
+    except ValueError:
+        out = np.empty(len(cleaned), dtype="datetime64[D]")
+        for i, value in enumerate(cleaned):
+            try:
+                out[i] = np.datetime64(value, "D")
+            except ValueError:
+                out[i] = np.datetime64("NaT")
+        return out
+
+
+def _infer_kind(name: str, values: list[str]) -> str:
+    filled = [v for v in values if v]
+    if not filled:
+        return "text"
+    parsed = sum(not math.isnan(_parse_float(v)) for v in filled)
+    if parsed >= NUMERIC_THRESHOLD * len(filled):
+        return "numeric"
+    if any(hint in name.lower() for hint in DATE_HINTS) and not np.isnat(_parse_dates(filled[:200])).any():
+        return "date"
+    return "text"
+
+
+def load_csv(path: Path, batch_rows: int = 50000) -> ColumnarTable:
+    """Read ``path`` in row batches straight into typed columns.
+
+    Kinds are inferred from the first batch. Numeric cells that do not parse
+    become NaN; text is dictionary-encoded with code ``-1`` for empty cells.
+    """
+    table = ColumnarTable()
+    parts: dict[str, list[np.ndarray]] = {}
+    lookup: dict[str, dict[str, int]] = {}
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        header = [h.strip() for h in next(reader, [])]
+        batch: list[list[str]] = []
+
+        def flush() -> None:
+            columns = [[(row[i].strip() if i < len(row) else "") for row in batch] for i in range(len(header))]
+            if not table.kinds:
+                table.kinds = {name: _infer_kind(name, col) for name, col in zip(header, columns)}
+                for name in header:
+                    parts[name] = []
+                    if table.kinds[name] == "text":
+                        lookup[name] = {}
+                        table.categories[name] = []
+            for name, col in zip(header, columns):
+                kind = table.kinds[name]
+                if kind == "numeric":
+                    parts[name].append(np.fromiter((_parse_float(v) if v else math.nan for v in col), float, len(col)))
+                elif kind == "date":
+                    parts[name].append(_parse_dates(col))
+                else:
+                    index, cats = lookup[name], table.categories[name]
+                    codes = np.empty(len(col), dtype=np.int32)
+                    for i, value in enumerate(col):
+                        if not value:
+                            codes[i] = -1
+                            continue
+                        code = index.get(value)
+                        if code is None:
+                            code = index[value] = len(cats)
+                            cats.append(value)
+                        codes[i] = code
+                    parts[name].append(codes)
+            table.rows += len(batch)
+
+        for row in reader:
+            if not row:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                flush()
+                batch = []
+        if batch or not table.kinds:
+            flush()
+
+    for name, kind in table.kinds.items():
+        empty = {"numeric": np.empty(0, float), "date": np.empty(0, "datetime64[D]")}.get(kind, np.empty(0, np.int32))
+        column = np.concatenate(parts[name]) if parts[name] else empty
+        if kind == "numeric":
+            table.numeric[name] = column
+        elif kind == "date":
+            table.dates[name] = column
+        else:
+            # Missing text maps to the extra trailing slot used by ``text()``.
+            column[column < 0] = len(table.categories[name])
+            table.codes[name] = column
+    return table
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """``.npz`` snapshots of loaded CSVs.
+
+    A size/mtime match reuses the snapshot without reading the CSV; otherwise
+    the content hash is checked, so a touched but unchanged file still hits.
+    Only the latest snapshot per source path is kept.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR) -> None:
+        self.directory = directory
+        self.index_path = directory / "index.json"
+
+    def _index(self) -> dict[str, Any]:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    def load(self, path: Path) -> ColumnarTable:
+        source = str(path.resolve())
+        stat = path.stat()
+        index = self._index()
+        entry = index.get(source, {})
+        if entry.get("format") == CACHE_FORMAT and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            table = self._read(entry["sha256"])
+            if table is not None:
+                return table
+
+        sha = file_digest(path)
+        table = self._read(sha) if entry.get("format") == CACHE_FORMAT else None
+        if table is None:
+            table = load_csv(path)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._write(sha, table)
+        old = entry.get("sha256")
+        if old and old != sha and not any(e.get("sha256") == old for k, e in index.items() if k != source):
+            (self.directory / f"{old}.npz").unlink(missing_ok=True)
+        index[source] = {"format": CACHE_FORMAT, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+        self._write_index(index)
+        return table
+
+    def _read(self, sha: str) -> ColumnarTable | None:
+        try:
+            with np.load(self.directory / f"{sha}.npz", allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                table = ColumnarTable(rows=meta["rows"], kinds=dict(meta["kinds"]))
+                for i, (name, kind) in enumerate(meta["kinds"]):
+                    if kind == "numeric":
+                        table.numeric[name] = data[f"c{i}"]
+                    elif kind == "date":
+                        table.dates[name] = data[f"c{i}"]
+                    else:
+                        table.codes[name] = data[f"c{i}"]
+                        table.categories[name] = data[f"k{i}"].tolist()
+                return table
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _write(self, sha: str, table: ColumnarTable) -> None:
+        arrays: dict[str, np.ndarray] = {}
+        for i, (name, kind) in enumerate(table.kinds.items()):
+            if kind == "numeric":
+                arrays[f"c{i}"] = table.numeric[name]
+            elif kind == "date":
+                arrays[f"c{i}"] = table.dates[name]
+            else:
+                arrays[f"c{i}"] = table.codes[name]
+                arrays[f"k{i}"] = np.array(table.categories[name], dtype=str)
+        meta = json.dumps({"rows": table.rows, "kinds": list(table.kinds.items())})
+        tmp = self.directory / f"{sha}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, meta=np.array(meta), **arrays)
+        tmp.replace(self.directory / f"{sha}.npz")
+
+
+def _round(value: Any, digits: int = 4) -> Any:
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return None if math.isnan(value) else round(value, digits)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _pct(new: float, old: float) -> float | None:
+    return None if not old else _round(100.0 * (new - old) / abs(old), 2)
+
+
+def _group_sums(codes: np.ndarray, groups: int, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=groups)
+    counts = np.bincount(codes[valid], minlength=groups)
+    return sums, counts
+
+
+def _robust_z(values: np.ndarray) -> np.ndarray:
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return np.zeros_like(values, dtype=float)
+    return 0.6745 * (values - median) / mad
+
+
+def pick_dimensions(table: ColumnarTable, requested: Iterable[str] | None = None) -> list[str]:
+    if requested:
+        missing = [name for name in requested if name not in table.codes]
+        if missing:
+            raise ValueError(f"Not text columns: {', '.join(missing)}; available: {', '.join(table.codes)}")
+        return list(requested)
+    return [
+        name
+        for name, cats in table.categories.items()
+        if 1 < len(cats) <= MAX_GROUP_CARDINALITY and len(cats) < max(2, table.rows // 2)
+    ]
+
+
+def analyze(
+    table: ColumnarTable,
+    group_by: Iterable[str] | None = None,
+    date_column: str | None = None,
+    top_n: int = 10,
+    z_threshold: float = 3.5,
+) -> dict[str, Any]:
+    """Compute the compact result tables sent to the provider."""
+    metrics = list(table.numeric)
+    dims = pick_dimensions(table, group_by)
+    if date_column is None and table.dates:
+        date_column = next(iter(table.dates))
+    result: dict[str, Any] = {"rows": table.rows, "metrics": {}, "group_by": {}, "anomalies": []}
+
+    for name, values in table.numeric.items():
+        valid = values[~np.isnan(values)]
+        result["metrics"][name] = {
+            "count": int(valid.size),
+            "missing": int(values.size - valid.size),
+            **(
+                {
+                    "sum": _round(valid.sum()),
+                    "mean": _round(valid.mean()),
+                    "std": _round(valid.std()),
+                    "min": _round(valid.min()),
+                    "p50": _round(np.percentile(valid, 50)),
+                    "p95": _round(np.percentile(valid, 95)),
+                    "max": _round(valid.max()),
+                }
+                if valid.size
+                else {}
+            ),
+        }
+
+    for dim in dims:
+        codes, groups = table.codes[dim], len(table.categories[dim]) + 1
+        rows = np.bincount(codes, minlength=groups)[:-1]
+        columns: dict[str, np.ndarray] = {"rows": rows}
+        for metric in metrics:
+            sums, counts = _group_sums(codes, groups, table.numeric[metric])
+            columns[f"{metric}_sum"] = sums[:-1]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns[f"{metric}_mean"] = (sums / counts)[:-1]
+        rank_by = f"{metrics[0]}_sum" if metrics else "rows"
+        order = np.argsort(-columns[rank_by], kind="stable")[:top_n]
+        result["group_by"][dim] = {
+            "ranked_by": rank_by,
+            "groups": len(table.categories[dim]),
+            "top": [
+                {dim: table.categories[dim][i], **{key: _round(col[i]) for key, col in columns.items()}} for i in order
+            ],
+        }
+
+    if date_column and date_column in table.dates:
+        result["date_column"] = date_column
+        dates = table.dates[date_column]
+        has_date = ~np.isnat(dates)
+        days, day_index = np.unique(dates[has_date], return_inverse=True)
+        # Monday-based ISO weeks: 1970-01-05 was a Monday.
+        week_of_day = (days - np.datetime64("1970-01-05")).astype(int) // 7
+        weeks = np.unique(week_of_day)
+        if weeks.size >= 2:
+            current, previous = weeks[-1], weeks[-2]
+            row_week = week_of_day[day_index]
+            in_current, in_previous = row_week == current, row_week == previous
+            wow: dict[str, Any] = {
+                "week": str(np.datetime64("1970-01-05") + np.timedelta64(int(current) * 7, "D")),
+                "previous_week": str(np.datetime64("1970-01-05") + np.timedelta64(int(previous) * 7, "D")),
+                "days": {"current": int((week_of_day == current).sum()), "previous": int((week_of_day == previous).sum())},
+            }
+            cur_rows, prev_rows = int(in_current.sum()), int(in_previous.sum())
+            wow["rows"] = {"current": cur_rows, "previous": prev_rows, "delta": cur_rows - prev_rows, "delta_pct": _pct(cur_rows, prev_rows)}
+            for metric in metrics:
+                values = table.numeric[metric][has_date]
+                cur, prev = float(np.nansum(values[in_current])), float(np.nansum(values[in_previous]))
+                wow[metric] = {"current": _round(cur), "previous": _round(prev), "delta": _round(cur - prev), "delta_pct": _pct(cur, prev)}
+            if dims:
+                dim = dims[0]
+                codes = table.codes[dim][has_date]
+                groups = len(table.categories[dim]) + 1
+                weights = table.numeric[metrics[0]][has_date] if metrics else np.ones(codes.size)
+                weights = np.nan_to_num(weights)
+                cur = np.bincount(codes[in_current], weights=weights[in_current], minlength=groups)[:-1]
+                prev = np.bincount(codes[in_previous], weights=weights[in_previous], minlength=groups)[:-1]
+                delta = cur - prev
+                order = np.argsort(-np.abs(delta), kind="stable")[:top_n]
+                wow["movers"] = {
+                    "by": dim,
+                    "metric": metrics[0] if metrics else "rows",
+                    "top": [
+                        {dim: table.categories[dim][i], "current": _round(cur[i]), "previous": _round(prev[i]), "delta": _round(delta[i]), "delta_pct": _pct(cur[i], prev[i])}
+                        for i in order
+                    ],
+                }
+            result["week_over_week"] = wow
+
+        if days.size >= 7:
+            daily = {"rows": np.bincount(day_index, minlength=days.size).astype(float)}
+            for metric in metrics:
+                values = np.nan_to_num(table.numeric[metric][has_date])
+                daily[metric] = np.bincount(day_index, weights=values, minlength=days.size)
+            flags = []
+            for metric, series in daily.items():
+                scores = _robust_z(series)
+                for i in np.flatnonzero(np.abs(scores) > z_threshold):
+                    flags.append(
+                        {"date": str(days[i]), "metric": metric, "value": _round(series[i]), "median": _round(np.median(series)), "z": _round(scores[i], 2)}
+                    )
+            flags.sort(key=lambda flag: -abs(flag["z"]))
+            result["anomalies"] = flags[:top_n]
+    return result
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.4g}"
+    return str(value)
+
+
+def _table(rows: list[dict[str, Any]]) -> list[str]:
+    if not rows:
+        return ["_None._"]
+    keys = list(rows[0])
+    lines = ["| " + " | ".join(keys) + " |", "|" + "---|" * len(keys)]
+    lines += ["| " + " | ".join(_cell(row.get(key)) for key in keys) + " |" for row in rows]
+    return lines
+
+
+def to_markdown(result: dict[str, Any]) -> list[str]:
+    """Render ``analyze()`` output as Markdown sections (heading level 3)."""
+    lines = [f"### Metrics ({result['rows']} rows)", ""]
+    lines += _table([{"metric": name, **stats} for name, stats in result["metrics"].items()])
+    for dim, grouped in result["group_by"].items():
+        lines += ["", f"### Top {dim} by {grouped['ranked_by']} ({grouped['groups']} groups)", ""]
+        lines += _table(grouped["top"])
+    wow = result.get("week_over_week")
+    if wow:
+        days = wow["days"]
+        lines += [
+            "",
+            f"### Week over week ({wow['week']}, {days['current']} days vs {wow['previous_week']}, {days['previous']} days)",
+            "",
+        ]
+        lines += _table(
+            [{"metric": key, **value} for key, value in wow.items() if isinstance(value, dict) and key not in ("movers", "days")]
+        )
+        movers = wow.get("movers")
+        if movers:
+            lines += ["", f"### Biggest {movers['by']} movers ({movers['metric']})", ""]
+            lines += _table(movers["top"])
+    if "date_column" in result:
+        lines += ["", "### Anomalies (daily totals, robust z-score)", ""]
+        lines += _table(result["anomalies"])
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv", nargs="?", default="data/latest.csv")
+    parser.add_argument("--group-by", action="append", default=[], help="Text column to group by (repeatable)")
+    parser.add_argument("--date-column", default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--format", choices=["json", "markdown"], default="markdown")
+    args = parser.parse_args()
+
+    path = Path(args.csv)
+    table = load_csv(path) if args.no_cache else ColumnarCache().load(path)
+    result = analyze(table, args.group_by or None, args.date_column, args.top)
+    if args.format == "json":
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print("\n".join(to_markdown(result)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Submit, inspect and run jobs in the durable job queue (bsm_config/src/jobs.py).
+
+    python scripts/report_jobs.py worker --workers 4           # run workers until interrupted
+    python scripts/report_jobs.py worker --drain               # run until the queue is empty
+    python scripts/report_jobs.py submit generateReport '{"providers": ["openai"], "params": {"title": "Weekly"}}' \\
+        --lane high --key weekly-2026-42
+    python scripts/report_jobs.py status JOB_ID
+    python scripts/report_jobs.py result JOB_ID --wait 600
+    python scripts/report_jobs.py list --status failed
+    python scripts/report_jobs.py cancel JOB_ID
+
+generate_report_with_ai.py --enqueue queues the weekly report the same way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bsm_config.src.jobs import HANDLERS, LANES, JobQueue, WorkerPool
+
+
+def show(value: object) -> None:
+    print(json.dumps(value, indent=2, ensure_ascii=False, default=str))
+
+
+def _interrupt(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def run_workers(queue: JobQueue, workers: int, lease: float, drain: bool) -> int:
+    # SIGTERM (CI cancellation, container stop) stops the pool like Ctrl-C does.
+    signal.signal(signal.SIGTERM, _interrupt)
+    pool = WorkerPool(queue.path, workers, lease=lease)
+    print(f"Running {pool.workers} worker(s) on {queue.path}", file=sys.stderr)
+    pool.start()
+    try:
+        while True:
+            time.sleep(1.0)
+            if drain:
+                statuses = queue.stats()["statuses"]
+                if not statuses.get("queued") and not statuses.get("running"):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+    show(queue.stats())
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Durable job queue for report generation.")
+    parser.add_argument("--db", default=os.getenv("BSM_JOB_DB", ""), help="Queue database (default: .cache/jobs.sqlite3)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue a job and print it")
+    submit.add_argument("kind", choices=sorted(HANDLERS))
+    submit.add_argument("payload", help="JSON payload for the handler")
+    submit.add_argument("--lane", choices=list(LANES), default="normal")
+    submit.add_argument("--key", default="", help="Idempotency key: resubmitting returns the existing job")
+    submit.add_argument("--max-attempts", type=int, default=3)
+
+    status = commands.add_parser("status", help="Print a job without its result")
+    status.add_argument("job_id")
+
+    result = commands.add_parser("result", help="Print a job's result (exit 1 if it failed, 2 if unfinished)")
+    result.add_argument("job_id")
+    result.add_argument("--wait", type=float, default=0.0, help="Seconds to wait for the job to finish")
+
+    listing = commands.add_parser("list", help="Most recent jobs")
+    listing.add_argument("--status", choices=["queued", "running", "succeeded", "failed", "cancelled"])
+    listing.add_argument("--limit", type=int, default=20)
+
+    commands.add_parser("stats", help="Job counts by status and lane")
+
+    cancel = commands.add_parser("cancel", help="Cancel a job that has not started")
+    cancel.add_argument("job_id")
+
+    worker = commands.add_parser("worker", help="Run a worker pool")
+    worker.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU)")
+    worker.add_argument("--lease", type=float, default=30.0, help="Seconds before a silent worker's job is retried")
+    worker.add_argument("--drain", action="store_true", help="Exit once nothing is queued or running")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db or None)
+    if args.command == "submit":
+        job = queue.submit(args.kind, json.loads(args.payload), args.lane, args.key or None, args.max_attempts)
+        show(asdict(job))
+        return 0
+    if args.command == "list":
+        show([{**asdict(job), "payload": None, "result": None} for job in queue.recent(args.status, args.limit)])
+        return 0
+    if args.command == "stats":
+        show(queue.stats())
+        return 0
+    if args.command == "worker":
+        return run_workers(queue, args.workers, args.lease, args.drain)
+
+    job = queue.get(args.job_id)
+    if job is None:
+        print(f"No job {args.job_id}", file=sys.stderr)
+        return 2
+    if args.command == "status":
+        show({**asdict(job), "result": None})
+        return 0
+    if args.command == "cancel":
+        if not queue.cancel(job.id):
+            print(f"Job {job.id} is {job.status}; only queued jobs can be cancelled", file=sys.stderr)
+            return 1
+        return 0
+    if args.wait and not job.done:
+        try:
+            job = queue.wait(job.id, timeout=args.wait)
+        except TimeoutError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+    if not job.done:
+        print(f"Job {job.id} is {job.status}", file=sys.stderr)
+        return 2
+    if job.status != "succeeded":
+        print(f"Job {job.id} {job.status}: {job.error or ''}", file=sys.stderr)
+        return 1
+    show(job.result)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,21 +1,41 @@
 #!/usr/bin/env python3
-"""Validate *.agent.md files against scripts/schema.yaml."""
+"""Validate *.agent.md files against scripts/schema.yaml.
+
+Only the front-matter block of each file is read and parsed (with libyaml
+when available). Results are cached in ``.cache/validate-agent.json`` keyed on
+the schema hash and a hash of that block, so unchanged files are not re-parsed;
+when every target is a cache hit, pydantic is never imported, and runs with
+nothing to validate do not import PyYAML either. ``--jobs N`` spreads cache
+misses over a process pool, and ``--format json|junit`` writes a
+machine-readable report.
+"""
 
 from __future__ import annotations
 
 import argparse
 import glob
+import hashlib
+import json
+import os
 import re
+import subprocess
 import sys
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, TextIO
 
-import yaml
-from pydantic import BaseModel, ConfigDict, ValidationError, create_model
-from pydantic import Field as PydanticField
+if TYPE_CHECKING:
+    from pydantic import BaseModel
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bsm_config.src.instrumentation import TELEMETRY, counter, span
+
 SCHEMA_PATH = ROOT / "scripts" / "schema.yaml"
+DEFAULT_CACHE_PATH = ROOT / ".cache" / "validate-agent.json"
+VALIDATED_FILES = counter("bsm_agent_files_validated_total", "Agent files checked, by result")
 
 
 class DynamicModelFactory:
@@ -23,6 +43,8 @@ class DynamicModelFactory:
 
     @staticmethod
     def _string_field(spec: dict[str, Any]) -> tuple[type[str], Any]:
+        from pydantic import Field as PydanticField
+
         kwargs: dict[str, Any] = {}
         if "minLength" in spec:
             kwargs["min_length"] = spec["minLength"]
@@ -36,6 +58,9 @@ class DynamicModelFactory:
 
     @classmethod
     def _from_spec(cls, name: str, spec: dict[str, Any]) -> tuple[Any, Any]:
+        from pydantic import ConfigDict, create_model
+        from pydantic import Field as PydanticField
+
         spec_type = spec.get("type", "string")
 
         if spec_type == "string":
@@ -61,6 +86,8 @@ class DynamicModelFactory:
 
     @classmethod
     def build_root_model(cls, schema: dict[str, Any]) -> type[BaseModel]:
+        from pydantic import ConfigDict, create_model
+
         fields: dict[str, tuple[Any, Any]] = {}
         for key, spec in schema.items():
             field_type, field_def = cls._from_spec(f"Root_{key}", spec)
@@ -69,21 +96,103 @@ class DynamicModelFactory:
 
 
 def load_schema() -> dict[str, Any]:
+    import yaml
+
     if not SCHEMA_PATH.exists():
         raise FileNotFoundError(f"Schema not found: {SCHEMA_PATH}")
     with SCHEMA_PATH.open("r", encoding="utf-8") as handle:
         return yaml.safe_load(handle) or {}
 
 
+def schema_hash() -> str:
+    """Hash of the schema and of this validator, which together decide a verdict."""
+    if not SCHEMA_PATH.exists():
+        raise FileNotFoundError(f"Schema not found: {SCHEMA_PATH}")
+    digest = hashlib.sha256(SCHEMA_PATH.read_bytes())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """Per-file verdicts from earlier runs, valid for one schema hash."""
+
+    def __init__(self, path: Path | None, schema: str) -> None:
+        self.path = path
+        self.schema = schema
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.dirty = False
+        if path and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("schema") == schema:
+                self.entries = data.get("files", {})
+
+    def get(self, key: str, digest: str) -> dict[str, Any] | None:
+        entry = self.entries.get(key)
+        if entry and entry.get("sha256") == digest:
+            return entry
+        return None
+
+    def put(self, key: str, digest: str, ok: bool, error: str = "") -> None:
+        self.entries[key] = {"sha256": digest, "ok": ok, "error": error}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        self.entries = {k: v for k, v in self.entries.items() if (ROOT / k).exists()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"schema": self.schema, "files": self.entries}, indent=0, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def _load_yaml(text: str) -> Any:
+    import yaml
+
+    # libyaml's C loader parses several times faster when PyYAML was built with it.
+    return yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def read_front_matter(path: Path) -> tuple[str, bool]:
+    """Return ``(text, is_front_matter)`` without reading past the front matter.
+
+    Files that start with a ``---`` line are read only up to the closing
+    ``---``; anything else is returned whole, as it is parsed as plain YAML.
+    """
+    with path.open("r", encoding="utf-8") as handle:
+        first = handle.readline()
+        if first != "---\n":
+            return first + handle.read(), False
+        lines: list[str] = []
+        for line in handle:
+            if line.endswith("---\n"):
+                lines.append(line[:-4])
+                return "".join(lines), True
+            lines.append(line)
+        return first + "".join(lines), False
+
+
 def extract_front_matter(path: Path) -> dict[str, Any]:
-    content = path.read_text(encoding="utf-8")
+    text, is_front_matter = read_front_matter(path)
+    if is_front_matter:
+        parsed = _load_yaml(text)
+        if isinstance(parsed, dict):
+            return parsed
+        return parse_front_matter(path.read_text(encoding="utf-8"))
+    return parse_front_matter(text)
+
+
+def parse_front_matter(content: str) -> dict[str, Any]:
     if content.startswith("---\n"):
         chunks = content.split("---\n", 2)
         if len(chunks) >= 3:
-            parsed = yaml.safe_load(chunks[1])
+            parsed = _load_yaml(chunks[1])
             if isinstance(parsed, dict):
                 return parsed
-    parsed = yaml.safe_load(content)
+    parsed = _load_yaml(content)
     if isinstance(parsed, dict):
         return parsed
     raise ValueError("File does not contain a YAML object or YAML front matter")
@@ -97,35 +206,189 @@ def resolve_targets(globs: list[str]) -> list[Path]:
     return [p for p in unique_sorted if p.is_file()]
 
 
+def changed_files(ref: str) -> set[Path]:
+    """Files changed since ``ref`` (committed, staged, unstaged or untracked)."""
+    def git(*args: str) -> list[str]:
+        out = subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+        return [line for line in out.splitlines() if line]
+
+    names = git("diff", "--name-only", "--diff-filter=ACMR", ref, "--")
+    names += git("ls-files", "--others", "--exclude-standard")
+    return {(ROOT / name).resolve() for name in names}
+
+
+def _display(path: Path) -> Path:
+    try:
+        return path.relative_to(ROOT)
+    except ValueError:
+        return path
+
+
+@dataclass
+class FileResult:
+    path: str
+    ok: bool
+    error: str = ""
+    cached: bool = False
+
+
+_worker_model: type[BaseModel] | None = None
+
+
+def _init_worker(schema: dict[str, Any]) -> None:
+    global _worker_model
+    _worker_model = DynamicModelFactory.build_root_model(schema)
+
+
+def _check(job: tuple[str, str, bool]) -> tuple[bool, str]:
+    """Validate one file's YAML text; runs in-process or in a pool worker."""
+    import yaml
+    from pydantic import ValidationError
+
+    path, text, is_front_matter = job
+    assert _worker_model is not None
+    try:
+        payload = _load_yaml(text) if is_front_matter else parse_front_matter(text)
+        if not isinstance(payload, dict):
+            payload = extract_front_matter(Path(path))
+        _worker_model.model_validate(payload)
+        return True, ""
+    except (ValidationError, ValueError, yaml.YAMLError) as exc:
+        return False, str(exc)
+
+
+def validate_targets(targets: list[Path], cache: ValidationCache | None = None, jobs: int = 1) -> list[FileResult]:
+    """Validate ``targets`` and return one result per file, in ``targets`` order.
+
+    Cache hits are resolved up front; the remaining files are parsed and
+    validated in-process, or across ``jobs`` worker processes when ``jobs > 1``.
+    """
+    results: list[FileResult | None] = []
+    pending: list[tuple[int, str, tuple[str, str, bool]]] = []
+    for target in targets:
+        key = str(_display(target))
+        try:
+            text, is_front_matter = read_front_matter(target)
+        except (OSError, ValueError) as exc:
+            # UnicodeDecodeError is a ValueError.
+            results.append(FileResult(key, False, str(exc)))
+            continue
+        digest = hashlib.sha256(f"{is_front_matter}:{text}".encode("utf-8")).hexdigest()
+        entry = cache.get(key, digest) if cache else None
+        if entry is not None:
+            results.append(FileResult(key, entry["ok"], entry["error"], cached=True))
+            continue
+        pending.append((len(results), digest, (str(target), text, is_front_matter)))
+        results.append(None)
+
+    if pending:
+        with span("validate.parse", files=len(pending)):
+            schema = load_schema()
+            work = [job for _, _, job in pending]
+            if jobs > 1 and len(pending) > 1:
+                from concurrent.futures import ProcessPoolExecutor
+
+                workers = min(jobs, len(pending))
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema,)) as pool:
+                    verdicts = list(pool.map(_check, work, chunksize=max(1, len(work) // (workers * 4))))
+            else:
+                _init_worker(schema)
+                verdicts = [_check(job) for job in work]
+        for (index, digest, _), (ok, error) in zip(pending, verdicts):
+            key = str(_display(targets[index]))
+            results[index] = FileResult(key, ok, error)
+            if cache:
+                cache.put(key, digest, ok, error)
+
+    return [r for r in results if r is not None]
+
+
+def write_report(results: list[FileResult], fmt: str, stream: TextIO) -> None:
+    failures = [r for r in results if not r.ok]
+    if fmt == "json":
+        payload = {
+            "total": len(results),
+            "failures": len(failures),
+            "cached": sum(r.cached for r in results),
+            "files": [asdict(r) for r in results],
+        }
+        stream.write(json.dumps(payload, indent=2, ensure_ascii=False) + "\n")
+    elif fmt == "junit":
+        from xml.etree import ElementTree as ET
+
+        suite = ET.Element("testsuite", name="agent-schema", tests=str(len(results)), failures=str(len(failures)), errors="0")
+        for result in results:
+            case = ET.SubElement(suite, "testcase", classname="validate_agent", name=result.path)
+            if not result.ok:
+                failure = ET.SubElement(case, "failure", message=result.error.splitlines()[0] if result.error else "invalid")
+                failure.text = result.error
+        ET.indent(suite)
+        stream.write(ET.tostring(suite, encoding="unicode") + "\n")
+    else:
+        for result in results:
+            if result.ok:
+                stream.write(f"✅ {result.path}\n")
+            else:
+                stream.write(f"❌ {result.path}\n{result.error}\n")
+        cached = sum(r.cached for r in results)
+        stream.write(f"Checked {len(results)} file(s), {cached} unchanged since the last run.\n")
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--glob", action="append", default=[], help="Glob for .agent.md files")
     parser.add_argument("--file", action="append", default=[], help="Explicit file(s) to validate")
+    parser.add_argument(
+        "--changed-since",
+        default="",
+        metavar="REF",
+        help="Only validate matched files changed since this git ref (all of them if the schema changed)",
+    )
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH), help="Validation cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the cache")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes; 0 uses every CPU")
+    parser.add_argument("--format", choices=["text", "json", "junit"], default="text")
+    parser.add_argument("--output", default="", help="Write the report here instead of stdout")
+    parser.add_argument("--metrics-out", default="", help="Write timings here at exit (.json: OTLP, else Prometheus text)")
     args = parser.parse_args()
+    if args.metrics_out:
+        TELEMETRY.configure(out=args.metrics_out)
 
-    targets = [Path(f).resolve() for f in args.file]
-    targets.extend(resolve_targets(args.glob or ["agents/*.agent.md", ".github/agents/*.agent.md"]))
-    targets = sorted(set(targets))
+    explicit = [Path(f).resolve() for f in args.file]
+    targets = resolve_targets(args.glob or ["agents/*.agent.md", ".github/agents/*.agent.md"])
+    if args.changed_since:
+        try:
+            changed = changed_files(args.changed_since)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            print(f"Could not diff against {args.changed_since}: {exc}", file=sys.stderr)
+            return 2
+        if SCHEMA_PATH.resolve() not in changed:
+            targets = [t for t in targets if t in changed]
+    targets = sorted(set(targets + explicit))
 
-    if not targets:
-        print("No agent files found; skipping validation.")
+    if not targets and args.format == "text":
+        if args.changed_since:
+            print(f"No agent files changed since {args.changed_since}; skipping validation.")
+        else:
+            print("No agent files found; skipping validation.")
         return 0
 
-    schema = load_schema()
-    model = DynamicModelFactory.build_root_model(schema)
+    cache = None if args.no_cache else ValidationCache(Path(args.cache), schema_hash())
+    with span("validate.run", files=len(targets)):
+        results = validate_targets(targets, cache, jobs=args.jobs or os.cpu_count() or 1)
+    for result in results:
+        VALIDATED_FILES.add(result="cached" if result.cached else "valid" if result.ok else "invalid")
+    if cache:
+        cache.save()
 
-    failures = 0
-    for target in targets:
-        try:
-            payload = extract_front_matter(target)
-            model.model_validate(payload)
-            print(f"✅ {target.relative_to(ROOT)}")
-        except (ValidationError, ValueError, yaml.YAMLError) as exc:
-            failures += 1
-            print(f"❌ {target.relative_to(ROOT)}")
-            print(exc)
-
-    return 1 if failures else 0
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as handle:
+            write_report(results, args.format, handle)
+    else:
+        write_report(results, args.format, sys.stdout)
+    return 1 if any(not r.ok for r in results) else 0
 
 
 if __name__ == "__main__":